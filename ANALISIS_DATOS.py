@@ -3,1194 +3,1263 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 import seaborn as sns
-import io
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-import base64
-import openpyxl
+import os
+import sqlite3
+import uuid
 from datetime import datetime
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
-
-# Esto debe ser lo primero después de importar Streamlit
-st.set_page_config(
-    page_title="📊 Insights Automáticos",  # Título que aparecerá en la pestaña del navegador
-    page_icon="📊"  # Emoji como favicon (puedes reemplazarlo con una ruta de archivo de imagen)
-)
-
-
-# Personalizar el estilo
-st.markdown("""
-    <style>
-        .block-container {
-            max-width: 1200px;
-            margin: 0 auto;
-        }
-        .stMetric {
-            font-size: 18px;
-            font-weight: bold;
-        }
-        .stDataFrame {
-            font-size: 18px;
-            color: #333;
-        }
-        .stBarChart {
-            padding: 20px;
-        }
-        .stSelectbox {
-            font-size: 14px;
-        }
-        .stDateInput {
-            font-size: 14px;
-        }
-        .stWarning {
-            color: red;
-        }
-        .stError {
-            color: darkred;
-        }
-    </style>
-""", unsafe_allow_html=True)
-
-# Función para cargar el archivo de datos
-@st.cache_data
-def load_data(file):
-    if file.name.endswith('.csv'):
-        return pd.read_csv(file)
-    elif file.name.endswith('.xlsx'):
-        return pd.read_excel(file)
-    else:
-        st.error("Tipo de archivo no soportado. Por favor, carga un archivo CSV o XLSX.")
+from analisis_ventas.ingesta import clave_a_mes, etiquetas_presentes, leer_ventas, mes_a_clave
+from analisis_ventas.cache_columnar import leer_ventas_con_copia
+from analisis_ventas.agregados import agregar_csv_por_bloques, TAMANO_BLOQUE
+from analisis_ventas.cubo import CuboVentas
+from analisis_ventas.almacen_sql import AlmacenSQL, MOTOR_SQL
+from analisis_ventas.cache import CacheResultados, normalizar_filtros, huella_archivo
+from analisis_ventas.indice import IndiceVentas
+from analisis_ventas.registro import RegistroDatos
+from analisis_ventas.particiones import huella_particiones, leer_particiones, particiones_de, podar_particiones
+from analisis_ventas.abc import clasificar_abc, color_abc, COLORES_ABC
+from analisis_ventas.calculos import (HORIZONTE_PROYECCION, analisis_abc, calcular_kpis, dias_extremos, pivote_mensual,
+                                       proyeccion_mensual, tabla_proyeccion, tabla_resumen, validar_columnas_proyeccion, ventas_diarias,
+                                       ventas_estacionales)
+from analisis_ventas.pronosticos import series_mensuales, pronosticar_lote, tabla_pronostico
+from analisis_ventas.almacen_modelos import AlmacenModelos, pronosticar_con_almacen
+from analisis_ventas.incremental import HistorialVentas
+from analisis_ventas.graficos import (anotar_celdas, etiquetar_barras, etiquetar_puntos, grafico_en_cache, graficar_cajas,
+                                      graficar_histograma, imagen_grafico, nueva_figura)
+from analisis_ventas.distribuciones import estadisticas_caja, histograma_fechas, muestra_estratificada
+from analisis_ventas.interactivos import dispersion_interactiva
+from analisis_ventas.medicion import Medidor, RUTA_MEDICIONES
+
+
+# Registro de conjuntos de datos del proceso: una sola copia de solo lectura por contenido
+@st.cache_resource
+def obtener_registro():
+    return RegistroDatos()
+
+
+# Función para identificar la sesión del navegador en el registro de conjuntos de datos
+def id_sesion():
+    if 'id_sesion' not in st.session_state:
+        st.session_state['id_sesion'] = uuid.uuid4().hex
+    return st.session_state['id_sesion']
+
+
+# Función para cargar el archivo de datos (tipos compactos y fechas ya convertidas).
+# Todas las sesiones que abren el mismo contenido reciben vistas de una sola copia en el registro,
+# leída de la copia columnar mapeada en memoria que deja la primera carga.
+def load_data(file, huella):
+    try:
+        return obtener_registro().obtener(
+            huella, lambda: leer_ventas_con_copia(file, huella, mapear=True), sesion=id_sesion())
+    except ValueError as error:
+        st.error(str(error))
         return None
 
 
-# Interfaz de usuario para cargar el archivo
-st.title('📊 Reporte de Insights de Datos Por: 👨‍💻 Juancito Peña V')
-
-uploaded_file = st.sidebar.file_uploader("Carga tu archivo de ventas", type=['csv', 'xlsx'])
+# Función para cargar un conjunto repartido en varios archivos: solo los que quedan tras la poda, leídos
+# en procesos en paralelo y unidos en el esquema normalizado. El registro lo comparte como a un archivo.
+def load_partitions(particiones, huella):
+    try:
+        return obtener_registro().obtener(huella, lambda: leer_particiones(particiones), sesion=id_sesion())
+    except ValueError as error:
+        st.error(str(error))
+        return None
 
-if uploaded_file is not None:
-    # Cargar los datos
-    df = load_data(uploaded_file)
-    
-    if df is not None:
-        # Convertir la columna 'FechaPedidoServerN' a formato datetime
-        if 'FechaPedidoServerN' in df.columns:
-            df['FechaPedidoServerN'] = pd.to_datetime(df['FechaPedidoServerN'], format='%d/%m/%Y')
 
-            # Filtros de fecha en la barra lateral
-            st.sidebar.header("Filtros")
-            fecha_inicio = st.sidebar.date_input('Fecha de Inicio', df['FechaPedidoServerN'].min().date())
-            fecha_fin = st.sidebar.date_input('Fecha de Fin', df['FechaPedidoServerN'].max().date())
+# Función para elegir en la barra lateral los meses y las localidades que se leen de un conjunto repartido
+# en varios archivos. Los archivos fuera de la selección (según su carpeta o su nombre) no se leen.
+def seleccionar_particiones(fuentes):
+    particiones = particiones_de(fuentes)
+    meses = sorted({particion['mes'] for particion in particiones if particion['mes'] is not None})
+    localidades = sorted({particion['localidad'] for particion in particiones if particion['localidad'] is not None})
+    fecha_inicio = fecha_fin = None
+    if len(meses) > 1:
+        opciones = [clave_a_mes(mes) for mes in meses]
+        desde, hasta = st.select_slider('Meses', options=opciones, value=(opciones[0], opciones[-1]))
+        fecha_inicio, fecha_fin = pd.Timestamp(desde), pd.Timestamp(hasta)
+    elegidas = st.multiselect('Localidades (todas si no se elige ninguna)', localidades) if localidades else None
+    seleccion = podar_particiones(particiones, fecha_inicio, fecha_fin, elegidas)
+    st.caption(f"Se leen {len(seleccion)} de {len(particiones)} archivos.")
+    return seleccion
+
+
+# Función para construir una sola vez por archivo el cubo de agregación que usan todas las secciones
+def load_cube(huella):
+    return obtener_registro().derivado(huella, 'cubo', CuboVentas.desde_ventas)
+
+
+# Tabla del archivo en la base SQL embebida, cargada una vez por contenido y compartida entre sesiones.
+# Devuelve None si la base no está disponible (p. ej. disco de solo lectura).
+@st.cache_resource(show_spinner=False)
+def load_sql(huella, _df):
+    try:
+        return AlmacenSQL().cargar(_df, huella)
+    except (OSError, sqlite3.Error) as error:
+        st.sidebar.warning(f"No se pudo usar la base SQL ({error}); se calcula con pandas.")
+        return None
 
-            # Convertir las fechas seleccionadas a datetime para la comparación
-            fecha_inicio = pd.Timestamp(fecha_inicio)
-            fecha_fin = pd.Timestamp(fecha_fin)
 
-            if fecha_inicio > fecha_fin:
-                st.error('La fecha de inicio debe ser anterior a la fecha de fin.')
+# Índice de filas por fecha y categoría, construido una vez por archivo y compartido entre sesiones
+def load_index(huella):
+    return obtener_registro().derivado(huella, 'indice', IndiceVentas)
+
+
+# Caché de tablas y figuras compartida por todas las sesiones del servidor
+@st.cache_resource
+def obtener_cache():
+    return CacheResultados()
+
+
+# Función para obtener la huella del archivo cargado, calculada una sola vez por carga
+def huella_carga(archivo):
+    clave = f"huella_{getattr(archivo, 'file_id', archivo.name)}"
+    if clave not in st.session_state:
+        st.session_state[clave] = huella_archivo(archivo)
+    return st.session_state[clave]
+
+
+# Función para mostrar en la barra lateral el presupuesto y los contadores de la caché
+def mostrar_estado_cache(cache):
+    with st.sidebar.expander('Caché de resultados'):
+        presupuesto_mb = st.number_input('Memoria máxima (MB)', min_value=16,
+                                         value=int(cache.presupuesto_bytes / 1024 ** 2), step=64)
+        cache.cambiar_presupuesto(int(presupuesto_mb * 1024 ** 2))
+        estadisticas = cache.estadisticas()
+        st.write(f"Entradas: {estadisticas['entradas']} | "
+                 f"Uso: {estadisticas['mb_usados']:,.1f} MB de {estadisticas['mb_presupuesto']:,.0f} MB")
+        st.write(f"Aciertos: {estadisticas['aciertos']} | Fallos: {estadisticas['fallos']} | "
+                 f"Desalojos: {estadisticas['desalojos']} | Tasa de aciertos: {estadisticas['tasa_aciertos']:.0%}")
+        registro = obtener_registro().estadisticas()
+        st.write(f"Conjuntos de datos: {registro['conjuntos']} ({registro['mb_datos']:,.1f} MB) | "
+                 f"Sesiones: {registro['sesiones']} | Desalojados: {registro['desalojos']}")
+        if st.button('Vaciar caché'):
+            cache.limpiar()
+
+
+# Pronósticos de todas las entidades de una dimensión, ajustados por lotes una vez por archivo.
+# Elegir un producto o cliente en la barra lateral es solo una búsqueda en este diccionario.
+# Los modelos se guardan en disco: solo se reajustan las series que cambiaron desde la última carga.
+@st.cache_resource(show_spinner=False)
+def load_forecasts(huella, dimension, _cubo):
+    series = series_mensuales(_cubo, dimension)
+    try:
+        almacen = AlmacenModelos()
+    except (OSError, sqlite3.Error):
+        # Sin almacén disponible (p. ej. disco de solo lectura) se ajusta todo en memoria
+        return pronosticar_lote(series), None
+    return pronosticar_con_almacen(series, dimension, almacen)
+
+
+# Secciones de gráficos que se pueden mostrar u ocultar; las ocultas no se calculan
+SECCIONES_GRAFICOS = [
+    ('localidad', 'Distribución por localidad'),
+    ('top10', 'Top 10 de clientes, vendedores y productos'),
+    ('diarias', 'Ventas diarias del mes'),
+    ('mejores_dias', 'Mejores y peores días'),
+    ('dispersion', 'Dispersión de ventas por fecha'),
+    ('embudos', 'Embudos de ventas'),
+    ('condicion_pago', 'Ventas por condición de pago'),
+    ('proyeccion', 'Proyección de ventas mensuales'),
+    ('abc', 'Análisis ABC'),
+    ('estacional', 'Ventas estacionales por mes'),
+    ('detalle', 'Mapa de calor, distribuciones y localidades'),
+    ('pronosticos', 'Pronósticos por producto y cliente'),
+]
+
+# Productos que se muestran en la tabla de proyección, los de mayor proyección
+PRODUCTOS_PROYECCION = 50
+
+# Vendedores que se muestran en el mapa de calor, los de mayor venta
+VENDEDORES_MAPA_CALOR = 30
+
+# Tamaños de letra de los gráficos de detalle; solo se aplican a esas figuras
+ESTILO_DETALLE = {
+    'axes.titlesize': 8,   # Tamaño del título de los gráficos
+    'axes.labelsize': 8,   # Tamaño de las etiquetas de los ejes
+    'xtick.labelsize': 8,  # Tamaño de las etiquetas de los ticks en el eje x
+    'ytick.labelsize': 8,  # Tamaño de las etiquetas de los ticks en el eje y
+    'legend.fontsize': 8,  # Tamaño de la leyenda
+    'font.size': 8,        # Tamaño de la fuente general
+}
+
+
+# Función para elegir en la barra lateral qué secciones de gráficos se muestran
+def seleccionar_secciones():
+    etiquetas = dict(SECCIONES_GRAFICOS)
+    with st.sidebar.expander('Secciones de gráficos'):
+        elegidas = st.multiselect('Secciones a mostrar', options=list(etiquetas), default=list(etiquetas),
+                                  format_func=etiquetas.get)
+    return set(elegidas)
+
+
+# Función para mostrar un gráfico de matplotlib desde la caché de imágenes.
+# `dibujar` devuelve la figura y solo se llama si la imagen de esa clave no está guardada
+# (sin clave se dibuja siempre); la figura se cierra después de renderizarla para que la
+# memoria no crezca entre recargas. El tiempo de cada gráfico queda en el medidor de la recarga
+# con el nombre de la clave y, si se indican, las filas que dibuja.
+def mostrar_grafico(clave, dibujar, estilo=None, filas=None, nombre=None):
+    with medidor.etapa(nombre or (clave[-1] if clave else dibujar.__name__), filas):
+        if clave is None:
+            imagen = imagen_grafico(dibujar, estilo=estilo)
+        else:
+            imagen = grafico_en_cache(obtener_cache(), clave, dibujar, estilo=estilo)
+        st.image(imagen, use_container_width=True)
+
+
+# Función para mostrar un gráfico de Plotly desde la caché de resultados. `construir` devuelve la
+# figura con los puntos ya reducidos, así que lo que se envía al navegador no crece con las filas.
+def mostrar_grafico_interactivo(clave, construir, filas=None):
+    with medidor.etapa(clave[-1], filas):
+        st.plotly_chart(obtener_cache().obtener_o_calcular(clave + ('plotly',), construir), use_container_width=True)
+
+
+# Función para elegir por defecto el mes actual, o el último mes con datos si el actual no tiene ventas
+def indice_mes(meses, mes):
+    return meses.index(mes) if mes in meses else len(meses) - 1
+
+
+# Función para agregar un CSV por bloques sin mantener las filas en memoria
+@st.cache_data
+def load_aggregates(file, tamano_bloque, modificado=None):
+    return agregar_csv_por_bloques(file, tamano_bloque)
+
+
+# Historial acumulado por entregas, compartido por todas las sesiones del servidor
+@st.cache_resource
+def obtener_historial():
+    return HistorialVentas()
+
+
+# Función para sumar al historial la entrega cargada (solo sus líneas nuevas) y mostrar el reporte
+# con los totales acumulados. Los pronósticos se actualizan solo para los productos y clientes de la entrega.
+def mostrar_historial(archivo):
+    historial = obtener_historial()
+    if archivo is not None and st.sidebar.button('Agregar la entrega al historial'):
+        try:
+            almacen = AlmacenModelos()
+        except (OSError, sqlite3.Error):
+            almacen = None
+        try:
+            archivo.seek(0)
+            with st.spinner('Agregando la entrega y actualizando los pronósticos...'), medidor.etapa('entrega'):
+                resumen = historial.agregar(leer_ventas(archivo), almacen)
+        except ValueError as error:
+            st.error(str(error))
+        else:
+            st.sidebar.success(f"{resumen['nuevas']:,} líneas nuevas y {resumen['duplicadas']:,} repetidas "
+                               f"en {len(resumen['meses'])} meses.")
+            for dimension, contadores in resumen['pronosticos'].items():
+                st.sidebar.caption(f"Modelos de {dimension}: {contadores['reutilizados']} reutilizados, "
+                                   f"{contadores['reajustados']} reajustados, {contadores['nuevos']} nuevos")
+    if len(historial) == 0:
+        st.info('El historial está vacío: carga una entrega y pulsa «Agregar la entrega al historial».')
+        return
+    mostrar_reporte_agregado(historial.agregados, aviso=(
+        f'Modo incremental: el reporte muestra los totales acumulados de todas las entregas ({len(historial):,} líneas). '
+        'Los filtros por fecha, localidad, cliente y vendedor no aplican.'))
+
+
+# Función para mostrar la tabla de KPIs con estilos aplicados
+def mostrar_kpis(num_vendedores, num_pedidos, num_clientes, num_productos, total_cantidad, total_monto_vendido):
+    # Crear un DataFrame con los KPIs en una fila, aplicando estilos a los números
+    kpi_data = {
+        '📊 Número de Vendedores': [f"<div style='text-align:center; font-size:20px;'>{num_vendedores}</div>"],
+        '📦 Número de Pedidos': [f"<div style='text-align:center; font-size:20px;'>{num_pedidos}</div>"],
+        '👥 Número de Clientes': [f"<div style='text-align:center; font-size:20px;'>{num_clientes}</div>"],
+        '🛍️ Número de Productos': [f"<div style='text-align:center; font-size:20px;'>{num_productos}</div>"],
+        '📉 Total Cantidad Vendida': [f"<div style='text-align:center; font-size:20px;'>{total_cantidad}</div>"],
+        '💰 Total Monto Vendido': [f"<div style='text-align:center; font-size:20px;'>${total_monto_vendido:,.2f}</div>"]
+    }
+
+    # Definir el DataFrame df_kpis
+    df_kpis = pd.DataFrame(kpi_data)
+
+    # Mostrar la tabla de KPIs en Streamlit con estilos aplicados
+    st.write('**Resumen de KPIs**')
+
+    # Mostrar la tabla de KPIs con HTML para aplicar estilos personalizados
+    st.markdown(df_kpis.to_html(escape=False, index=False), unsafe_allow_html=True)
+
+
+# Dimensiones del análisis ABC: columna, etiqueta del eje y nombre en plural
+SECCIONES_ABC = [('Cliente', 'Cliente', 'Clientes'), ('Descripcion', 'Producto', 'Productos'), ('Vendedor', 'Vendedor', 'Vendedores')]
+
+
+# Función para mostrar el gráfico de Pareto y la tabla estilizada de un análisis ABC
+def mostrar_analisis_abc(resultado, etiqueta, titulo, n=30, clave=None):
+    top = resultado.top(n)
+
+    # Crear gráfico de Pareto
+    def dibujar():
+        fig, ax1 = nueva_figura(figsize=(12, 6))
+
+        # Colores de las barras basados en la clasificación ABC
+        colores = top['Clasificación ABC'].astype(str).map({clase: fondo for clase, (fondo, _) in COLORES_ABC.items()})
+
+        nombres = top[resultado.columna].astype(str)
+        ax1.bar(nombres, top['Total Vendido'], color=colores, label='Total Vendido')
+        ax1.set_xlabel(etiqueta, fontsize=10)
+        ax1.set_ylabel('Total Vendido', color='blue', fontsize=10)
+        ax1.tick_params(axis='y', labelcolor='blue')
+        ax1.set_title(titulo, fontsize=12)
+        ax1.tick_params(axis='x', rotation=90, labelsize=8)  # Rotar etiquetas x para mejor legibilidad
+
+        ax2 = ax1.twinx()
+        ax2.plot(nombres, top['Porcentaje Acumulado'], color='red', marker='o', label='Porcentaje Acumulado')
+        ax2.set_ylabel('Porcentaje Acumulado (%)', color='red', fontsize=10)
+        ax2.tick_params(axis='y', labelcolor='red')
+
+        fig.tight_layout()
+        return fig
+    mostrar_grafico(clave, dibujar, nombre=f'grafico_abc_{resultado.columna}')
+
+    # Aplicar estilo a la tabla y mostrarla en Streamlit
+    st.write(titulo)
+    st.dataframe(top.style.map(color_abc, subset=['Clasificación ABC']))
+
+    # Resumen de la clasificación sobre todas las entidades, no solo las mostradas
+    st.write(f"Resumen por clase ({len(resultado)} en total)")
+    st.dataframe(resultado.resumen.style.map(color_abc, subset=['Clasificación ABC']), hide_index=True)
+
+
+# Función para mostrar la tabla y el gráfico de proyección de un producto o cliente
+def mostrar_pronostico(pronostico, dimension, entidad, titulo_tabla, titulo_grafico, mensaje_error, clave=None):
+    if pronostico is None:
+        st.error(mensaje_error)
+        return
+
+    # Mostrar la tabla pivotante en Streamlit
+    st.write(titulo_tabla)
+    st.dataframe(tabla_pronostico(pronostico, dimension, entidad), use_container_width=True)
+
+    # Gráfico de las ventas actuales y la proyección
+    def dibujar():
+        historia = pronostico['historia']
+        fig, ax = nueva_figura(figsize=(12, 6))
+        ax.plot(historia.index, historia.to_numpy(), label='Ventas Actuales', marker='o')
+        ax.plot(pronostico['indice'], pronostico['pronostico'], label='Proyección', marker='o', linestyle='--')
+        ax.set_title(titulo_grafico, fontsize=16)
+        ax.set_xlabel('Fecha', fontsize=12)
+        ax.set_ylabel('Total Vendido', fontsize=12)
+        ax.legend()
+        ax.grid(True)
+        return fig
+
+    # Mostrar el gráfico en Streamlit
+    mostrar_grafico(clave, dibujar, filas=len(pronostico['historia']), nombre=f'grafico_pronostico_{dimension}')
+
+
+# Función para mostrar el reporte a partir de los totales agregados (modo streaming)
+def mostrar_reporte_agregado(agregados, aviso=None):
+    st.info(aviso or 'Modo streaming: el reporte se calcula con totales agregados por bloques, '
+            'sin cargar las filas del archivo. Los filtros por fecha, localidad, cliente y vendedor no aplican.')
+
+    mostrar_kpis(**agregados.kpis())
+
+    st.subheader('Tablas de Resumen')
+    st.write('Ventas por Cliente')
+    st.dataframe(agregados.totales_por('Cliente')[['Total Vendido']].reset_index(), use_container_width=True)
+    st.write('Ventas por Vendedor')
+    st.dataframe(agregados.totales_por('Vendedor')[['Total Vendido']].reset_index(), use_container_width=True)
+    st.write('Ventas por Producto')
+    st.dataframe(agregados.totales_por('Descripcion')[['Cantidad', 'Total Vendido']].rename(
+        columns={'Cantidad': 'cantidad_vendida', 'Total Vendido': 'total_vendido'}).reset_index(), use_container_width=True)
+    st.write('Ventas por Localidad')
+    st.dataframe(agregados.totales_por('Localidad Nombre')[['Cantidad', 'Total Vendido']].rename(
+        columns={'Cantidad': 'cantidad_vendida', 'Total Vendido': 'total_vendido'}).reset_index(), use_container_width=True)
+
+    # Ventas mensuales a partir de la clave de mes
+    ventas_mes = agregados.totales_por('MesClave')['Total Vendido']
+
+    def dibujar_ventas_mes():
+        fig_mes, ax_mes = nueva_figura(figsize=(12, 6))
+        ax_mes.plot([clave_a_mes(clave) for clave in ventas_mes.index], ventas_mes.values, marker='o')
+        ax_mes.set_title('Ventas Totales por Mes')
+        ax_mes.set_xlabel('Mes')
+        ax_mes.set_ylabel('Total Vendido')
+        ax_mes.tick_params(axis='x', rotation=45)
+        return fig_mes
+    mostrar_grafico(None, dibujar_ventas_mes, nombre='grafico_ventas_mes')
+
+    # Análisis ABC de cada dimensión a partir de sus totales
+    for columna, etiqueta, plural in SECCIONES_ABC:
+        resultado_abc = clasificar_abc(agregados.totales_por(columna)['Total Vendido'].rename_axis(columna), columna)
+        mostrar_analisis_abc(resultado_abc, etiqueta, f"Análisis ABC de los 30 Mejores {plural}")
+
+
+# Tiempo, filas y memoria de cada sección. Streamlit vuelve a ejecutar el módulo en cada
+# recarga, así que cada recarga (y cada sesión) tiene su propio medidor.
+medidor = Medidor()
+
+
+# Página de Streamlit: solo lee los controles y muestra los resultados de analisis_ventas
+def main():
+    # Esto debe ser lo primero que se llama de Streamlit en cada recarga
+    st.set_page_config(
+        page_title="📊 Insights Automáticos",  # Título que aparecerá en la pestaña del navegador
+        page_icon="📊"  # Emoji como favicon (puedes reemplazarlo con una ruta de archivo de imagen)
+    )
+
+
+    # Personalizar el estilo
+    st.markdown("""
+        <style>
+            .block-container {
+                max-width: 1200px;
+                margin: 0 auto;
+            }
+            .stMetric {
+                font-size: 18px;
+                font-weight: bold;
+            }
+            .stDataFrame {
+                font-size: 18px;
+                color: #333;
+            }
+            .stBarChart {
+                padding: 20px;
+            }
+            .stSelectbox {
+                font-size: 14px;
+            }
+            .stDateInput {
+                font-size: 14px;
+            }
+            .stWarning {
+                color: red;
+            }
+            .stError {
+                color: darkred;
+            }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # Interfaz de usuario para cargar el archivo
+    st.title('📊 Reporte de Insights de Datos Por: 👨‍💻 Juancito Peña V')
+
+    uploaded_file = st.sidebar.file_uploader("Carga tu archivo de ventas", type=['csv', 'xlsx'])
+
+    # Modo streaming para archivos CSV más grandes que la memoria disponible
+    modo_streaming = st.sidebar.checkbox('Modo streaming para archivos grandes (solo CSV)', value=False)
+    ruta_servidor = ''
+    if modo_streaming:
+        tamano_bloque = int(st.sidebar.number_input('Filas por bloque', min_value=10_000, value=TAMANO_BLOQUE, step=100_000))
+        ruta_servidor = st.sidebar.text_input('Ruta del CSV en el servidor (opcional)')
+
+    # Modo incremental: el archivo cargado es una entrega (p. ej. la del día) que se suma al historial guardado
+    modo_incremental = not modo_streaming and st.sidebar.checkbox('Modo incremental (agregar entregas al historial)', value=False)
+
+    # Conjunto repartido en varios archivos (p. ej. uno por localidad y mes), subidos juntos o en una carpeta del servidor
+    particiones = None
+    if not modo_streaming and not modo_incremental:
+        with st.sidebar.expander('Varios archivos o carpeta'):
+            archivos_varios = st.file_uploader('Archivos de ventas', type=['csv', 'xlsx'], accept_multiple_files=True)
+            carpeta_servidor = st.text_input('Carpeta en el servidor (opcional)')
+            if carpeta_servidor and not os.path.isdir(carpeta_servidor):
+                st.error(f"No se encontró la carpeta {carpeta_servidor}.")
+            elif carpeta_servidor or archivos_varios:
+                particiones = seleccionar_particiones(carpeta_servidor or archivos_varios)
+
+    # Tiempos de cada sección en esta recarga; se muestran al final en la barra lateral
+    # y, con la variable ANALISIS_MEDICIONES, se agregan a un registro JSON o CSV
+    panel_tiempos = st.sidebar.expander('Tiempos por sección')
+    mostrar_tiempos = panel_tiempos.checkbox('Mostrar los tiempos de esta recarga', value=False)
+
+    if modo_streaming and ruta_servidor:
+        if os.path.isfile(ruta_servidor):
+            mostrar_reporte_agregado(load_aggregates(ruta_servidor, tamano_bloque, os.path.getmtime(ruta_servidor)))
+        else:
+            st.error(f"No se encontró el archivo {ruta_servidor}.")
+    elif modo_streaming and uploaded_file is not None and uploaded_file.name.endswith('.csv'):
+        mostrar_reporte_agregado(load_aggregates(uploaded_file, tamano_bloque))
+    elif modo_incremental:
+        mostrar_historial(uploaded_file)
+    elif uploaded_file is not None or particiones is not None:
+        # Cargar los datos y el cubo de agregación; con varios archivos, solo los que quedan tras la poda
+        with medidor.etapa('carga'):
+            if particiones is not None:
+                huella = huella_particiones(particiones)
+                df = load_partitions(particiones, huella)
             else:
-                # Filtrar los datos por el rango de fechas
-                df_filtrado = df[(df['FechaPedidoServerN'] >= fecha_inicio) & (df['FechaPedidoServerN'] <= fecha_fin)]
-
-                # Filtrar por localidad
-                if 'Localidad Nombre' in df.columns:
-                    venta_por_localidad = df.groupby('Localidad Nombre').agg(
-                        cantidad_vendida=pd.NamedAgg(column='Cantidad', aggfunc='sum'),
-                        total_vendido=pd.NamedAgg(column='Total Vendido', aggfunc='sum')
-                    ).reset_index().sort_values('total_vendido', ascending=False)
-                    
-                    localidades = df['Localidad Nombre'].unique()
-                    localidad_seleccionada = st.sidebar.selectbox('Selecciona una Localidad', ['Todas'] + list(localidades))
-                    
-                    if localidad_seleccionada != 'Todas':
-                        df_filtrado = df_filtrado[df_filtrado['Localidad Nombre'] == localidad_seleccionada]
-                else:
-                    st.warning("La columna 'Localidad' no se encuentra en el archivo.")
-                    venta_por_localidad = pd.DataFrame()
-
-
-                # Cálculo de KPIs con datos filtrados
-                num_vendedores = df_filtrado['Vendedor'].nunique()
-                num_pedidos = df_filtrado['NoPedidoStr'].nunique()
-                num_clientes = df_filtrado['Cliente'].nunique()
-                num_productos = df_filtrado['Descripcion'].nunique()
-                total_cantidad = df_filtrado['Cantidad'].sum()
-                total_monto_vendido = df_filtrado['Total Vendido'].sum()
-
-                # Crear un DataFrame con los KPIs en una fila, aplicando estilos a los números
-                kpi_data = {
-                    '📊 Número de Vendedores': [f"<div style='text-align:center; font-size:20px;'>{num_vendedores}</div>"],
-                    '📦 Número de Pedidos': [f"<div style='text-align:center; font-size:20px;'>{num_pedidos}</div>"],
-                    '👥 Número de Clientes': [f"<div style='text-align:center; font-size:20px;'>{num_clientes}</div>"],
-                    '🛍️ Número de Productos': [f"<div style='text-align:center; font-size:20px;'>{num_productos}</div>"],
-                    '📉 Total Cantidad Vendida': [f"<div style='text-align:center; font-size:20px;'>{total_cantidad}</div>"],
-                    '💰 Total Monto Vendido': [f"<div style='text-align:center; font-size:20px;'>${total_monto_vendido:,.2f}</div>"]
-                }
-
-                # Definir el DataFrame df_kpis
-                df_kpis = pd.DataFrame(kpi_data)
-
-                # Mostrar la tabla de KPIs en Streamlit con estilos aplicados
-                st.write('**Resumen de KPIs**')
-
-                # Mostrar la tabla de KPIs con HTML para aplicar estilos personalizados
-                st.markdown(df_kpis.to_html(escape=False, index=False), unsafe_allow_html=True)
-
-
-                st.subheader('Tablas de Resumen')
-                st.write('Ventas por Cliente')
-                st.dataframe(df_filtrado.groupby('Cliente')['Total Vendido'].sum().reset_index().sort_values('Total Vendido', ascending=False), use_container_width=True)
-                st.write('Ventas por Vendedor')
-                st.dataframe(df_filtrado.groupby('Vendedor')['Total Vendido'].sum().reset_index().sort_values('Total Vendido', ascending=False), use_container_width=True)
-                st.write('Ventas por Producto')
-                st.dataframe(df_filtrado.groupby('Descripcion').agg(
-                    cantidad_vendida=pd.NamedAgg(column='Cantidad', aggfunc='sum'),
-                    total_vendido=pd.NamedAgg(column='Total Vendido', aggfunc='sum')
-                ).reset_index().sort_values('total_vendido', ascending=False), use_container_width=True)
-
-                if not venta_por_localidad.empty:
-                    st.write('Ventas por Localidad')
-                    st.dataframe(venta_por_localidad, use_container_width=True)
-
-                    # Gráfico de pastel para Ventas por Localidad
-                    fig_localidad, ax_localidad = plt.subplots(figsize=(10, 7))
-                    ax_localidad.pie(
-                        venta_por_localidad['total_vendido'],
-                        labels=venta_por_localidad['Localidad Nombre'],
-                        autopct='%1.1f%%',
-                        colors=sns.color_palette('Set2', n_colors=len(venta_por_localidad)),
-                        startangle=140
-                    )
-                    ax_localidad.set_title('Distribución de Ventas por Localidad')
-                    st.pyplot(fig_localidad)
-
-                # Asegúrate de que el DataFrame tenga la columna 'Total Vendido' después de las agregaciones
-                if 'Total Vendido' not in df_filtrado.columns:
-                    st.error("La columna 'Total Vendido' no está en el DataFrame. Verifica las agregaciones.")
+                huella = huella_carga(uploaded_file)
+                df = load_data(uploaded_file, huella)
+            cubo = load_cube(huella) if df is not None else None
+
+        # Caché de resultados por (huella del archivo, filtros, sección)
+        cache = obtener_cache()
+        mostrar_estado_cache(cache)
+        indice = load_index(huella) if df is not None else None
+        secciones = seleccionar_secciones()
+        # Los gráficos de dispersión pueden dibujarse en el navegador (Plotly WebGL) con los puntos agregados
+        interactivos = st.sidebar.checkbox('Dispersión interactiva (WebGL)', value=False)
+        # Las tablas, KPIs, series, ABC y matrices se pueden calcular con SQL sobre la base embebida
+        motor = st.sidebar.selectbox('Motor de cálculo', ['pandas', f'SQL ({MOTOR_SQL})'])
+        cubo_base = load_sql(huella, df) if motor != 'pandas' and df is not None else None
+        if cubo_base is None:
+            cubo_base = cubo
+        seccion_cubo = 'cubo' if cubo_base is cubo else 'cubo_sql'
+
+        if df is not None:
+            # La columna 'FechaPedidoServerN' ya llega convertida a datetime desde load_data
+            if 'FechaPedidoServerN' in df.columns:
+                # Filtros de fecha en la barra lateral
+                st.sidebar.header("Filtros")
+                fecha_inicio = st.sidebar.date_input('Fecha de Inicio', df['FechaPedidoServerN'].min().date())
+                fecha_fin = st.sidebar.date_input('Fecha de Fin', df['FechaPedidoServerN'].max().date())
+
+                # Convertir las fechas seleccionadas a datetime para la comparación
+                fecha_inicio = pd.Timestamp(fecha_inicio)
+                fecha_fin = pd.Timestamp(fecha_fin)
+
+                if fecha_inicio > fecha_fin:
+                    st.error('La fecha de inicio debe ser anterior a la fecha de fin.')
                 else:
-                    # Crear los gráficos solo si la columna existe
-                    st.subheader('Gráficos')
-
-                    # Gráfico de Ventas por Cliente
-                    fig_clientes, ax_clientes = plt.subplots(figsize=(12, 6))
-                    df_clientes = df_filtrado.groupby('Cliente')['Total Vendido'].sum().reset_index().sort_values('Total Vendido', ascending=False).head(10)
-                    sns.barplot(x='Cliente', y='Total Vendido', data=df_clientes, ax=ax_clientes, palette="husl")
-                    ax_clientes.set_title('Top 10 Clientes por Ventas Totales')
-                    ax_clientes.set_xlabel('Cliente')
-                    ax_clientes.set_ylabel('Total Vendido')
-                    ax_clientes.tick_params(axis='x', rotation=45)
-
-                    # Añadir etiquetas de monto en cada barra
-                    for p in ax_clientes.patches:
-                        ax_clientes.annotate(f'${p.get_height():,.0f}', (p.get_x() + p.get_width() / 2., p.get_height()),
-                                            ha='center', va='center', fontsize=10, color='black', xytext=(0, 10),
-                                            textcoords='offset points')
-                    st.pyplot(fig_clientes)
-
-                    # Gráfico de Ventas por Vendedor
-                    fig_vendedores, ax_vendedores = plt.subplots(figsize=(12, 6))
-                    df_vendedores = df_filtrado.groupby('Vendedor')['Total Vendido'].sum().reset_index().sort_values('Total Vendido', ascending=False).head(10)
-                    sns.barplot(x='Vendedor', y='Total Vendido', data=df_vendedores, ax=ax_vendedores, palette="Set2")
-                    ax_vendedores.set_title('Top 10 Vendedores por Ventas Totales')
-                    ax_vendedores.set_xlabel('Vendedor')
-                    ax_vendedores.set_ylabel('Total Vendido')
-                    ax_vendedores.tick_params(axis='x', rotation=45)
-
-                    # Añadir etiquetas de monto en cada barra
-                    for p in ax_vendedores.patches:
-                        ax_vendedores.annotate(f'${p.get_height():,.0f}', (p.get_x() + p.get_width() / 2., p.get_height()),
-                                            ha='center', va='center', fontsize=10, color='black', xytext=(0, 10),
-                                            textcoords='offset points')
-                    st.pyplot(fig_vendedores)
-
-                    # Gráfico de Ventas por Producto
-                    fig_productos, ax_productos = plt.subplots(figsize=(12, 6))
-                    df_productos = df_filtrado.groupby('Descripcion').agg(
-                        cantidad_vendida=pd.NamedAgg(column='Cantidad', aggfunc='sum'),
-                        total_vendido=pd.NamedAgg(column='Total Vendido', aggfunc='sum')
-                    ).reset_index().sort_values('total_vendido', ascending=False).head(10)
-                    sns.barplot(x='Descripcion', y='total_vendido', data=df_productos, ax=ax_productos, palette="magma")
-                    ax_productos.set_title('Top 10 Productos por Ventas Totales')
-                    ax_productos.set_xlabel('Producto')
-                    ax_productos.set_ylabel('Total Vendido')
-                    ax_productos.tick_params(axis='x', rotation=45)
-
-                    # Añadir etiquetas de monto en cada barra
-                    for p in ax_productos.patches:
-                        ax_productos.annotate(f'${p.get_height():,.0f}', (p.get_x() + p.get_width() / 2., p.get_height()),
-                                            ha='center', va='center', fontsize=10, color='black', xytext=(0, 10),
-                                            textcoords='offset points')
-                    st.pyplot(fig_productos)
-
-                    # Crear una columna para el mes
-                    df['Mes'] = df['FechaPedidoServerN'].dt.to_period('M').astype(str)
-
-                    # Obtener la lista de meses disponibles
-                    meses_disponibles = df['Mes'].unique()
-                    meses_disponibles = sorted(meses_disponibles)
-
-                    # Establecer el mes actual como el valor predeterminado
-                    mes_actual = pd.Timestamp.now().to_period('M').strftime('%Y-%m')  # Usa strftime para convertir a string
-                    mes_seleccionado = st.sidebar.selectbox('Selecciona el Mes', options=meses_disponibles, index=meses_disponibles.index(mes_actual))
-
-                    # Filtrar los datos por el mes seleccionado
-                    df_filtrado = df[df['Mes'] == mes_seleccionado]
-
-                    # Agrupar las ventas por fecha
-                    df_fecha = df_filtrado.groupby('FechaPedidoServerN')['Total Vendido'].sum().reset_index()
-
-                    # Crear el gráfico de líneas para ventas totales por fecha
-                    fig_fecha, ax_fecha = plt.subplots(figsize=(12, 6))
-                    sns.lineplot(x='FechaPedidoServerN', y='Total Vendido', data=df_fecha, ax=ax_fecha, marker='o')
-
-                    # Configurar títulos y etiquetas con ajustes de tamaño
-                    ax_fecha.set_title('Ventas Totales por Fecha', pad=30, fontsize=16)  # Aumentar el espacio superior del título y ajustar el tamaño de fuente
-                    ax_fecha.set_xlabel('Fecha', labelpad=10, fontsize=12)  # Ajustar el tamaño de fuente y el espacio para la etiqueta del eje X
-                    ax_fecha.set_ylabel('Total Vendido', labelpad=10, fontsize=12)  # Ajustar el tamaño de fuente y el espacio para la etiqueta del eje Y
-                    ax_fecha.tick_params(axis='x', rotation=45, labelsize=10)  # Ajustar el tamaño de fuente de las etiquetas del eje X
-                    ax_fecha.tick_params(axis='y', labelsize=10)  # Ajustar el tamaño de fuente de las etiquetas del eje Y
-
-                   # Añadir etiquetas de monto en cada punto
-                    for x, y in zip(df_fecha['FechaPedidoServerN'], df_fecha['Total Vendido']):
-                        ax_fecha.annotate(f'${y:,.0f}', (x, y), textcoords="offset points", xytext=(0, 7), ha='center', fontsize=9)  # Ajustar el tamaño de fuente y la posición de las etiquetas
-
-                    # Mostrar el gráfico
-                    st.pyplot(fig_fecha)
-
-
-
-
-                    # Supongamos que df es el DataFrame original
-                    # Convertir la columna 'FechaPedidoServerN' a formato datetime
-                    df['FechaPedidoServerN'] = pd.to_datetime(df['FechaPedidoServerN'], format='%d/%m/%Y')
-
-                    # Crear una columna para el mes y año
-                    df['Mes'] = df['FechaPedidoServerN'].dt.to_period('M').astype(str)
-
-                    # Crear una lista de meses únicos disponibles para el segmentador
-                    meses_disponibles = sorted(df['Mes'].unique())
-
-                    # Obtener el mes actual para usar como valor predeterminado
-                    mes_actual = pd.Timestamp.now().to_period('M').strftime('%Y-%m')
-
-                    # Crear el selector de mes en la barra lateral con el mes actual como valor predeterminado
-                    mes_seleccionado = st.sidebar.selectbox('Selecciona el mes', options=meses_disponibles, index=meses_disponibles.index(mes_actual), key='selector_mes_unico')
-
-                    # Filtrar los datos según el mes seleccionado
-                    df_filtrado = df[df['Mes'] == mes_seleccionado]
-
-                    # Gráfico de Ventas Diarias con barras destacadas para mayores y menores ventas
-                    fig, ax = plt.subplots(figsize=(12, 6))
-
-                    # Calcular ventas diarias
-                    df_diarias = df_filtrado.groupby('FechaPedidoServerN')['Total Vendido'].sum().reset_index()
-
-                    # Identificar el máximo y mínimo de ventas diarias
-                    max_venta = df_diarias['Total Vendido'].max()
-                    min_venta = df_diarias['Total Vendido'].min()
-
-                    # Crear una columna para el color de las barras
-                    df_diarias['Color'] = df_diarias['Total Vendido'].apply(lambda x: 'green' if x == max_venta else ('red' if x == min_venta else 'grey'))
-
-                    # Crear el gráfico de barras
-                    sns.barplot(x='FechaPedidoServerN', y='Total Vendido', data=df_diarias, ax=ax, palette=df_diarias['Color'].values)
-
-                    # Añadir etiquetas de monto en cada barra
-                    for p in ax.patches:
-                        ax.annotate(f'${p.get_height():,.0f}', (p.get_x() + p.get_width() / 2., p.get_height()), 
-                                    ha='center', va='center', fontsize=10, color='black', xytext=(0, 10),
-                                    textcoords='offset points')
-
-                    # Configurar títulos y etiquetas con un margen superior ajustado
-                    ax.set_title(f'Ventas Diarias para {mes_seleccionado} con Días de Mayor y Menor Venta Destacados', pad=20)  # Ajusta el espacio superior del título con pad
-
-                    # Ajustar el espacio entre las etiquetas de los ejes y el gráfico
-                    ax.set_xlabel('Fecha', labelpad=15)  # Incrementa el espacio para la etiqueta del eje X
-                    ax.set_ylabel('Total Vendido', labelpad=15)  # Incrementa el espacio para la etiqueta del eje Y
-                    ax.tick_params(axis='x', rotation=45)
-
-                    # Mostrar el gráfico
-                    st.pyplot(fig)
+                    # Filtrar por localidad
+                    localidad_seleccionada = 'Todas'
+                    if 'Localidad Nombre' in df.columns:
+                        venta_por_localidad = tabla_resumen(cubo_base, 'Localidad Nombre', cantidad=True)
+
+                        # Opciones desde el índice del archivo: las etiquetas con filas, sin recorrer las filas
+                        localidades = indice.valores('Localidad Nombre')
+                        localidad_seleccionada = st.sidebar.selectbox('Selecciona una Localidad', ['Todas'] + list(localidades))
+                    else:
+                        st.warning("La columna 'Localidad' no se encuentra en el archivo.")
+                        venta_por_localidad = pd.DataFrame()
+
+                    # Filtrar los datos por el rango de fechas y la localidad. Las filas, el cubo y
+                    # los KPIs de cada combinación de filtros quedan en la caché de resultados.
+                    filtros_fecha = normalizar_filtros(fecha_inicio=fecha_inicio, fecha_fin=fecha_fin,
+                                                       localidad=localidad_seleccionada)
+
+                    with medidor.etapa('filtros', len(df)):
+                        df_filtrado = cache.obtener_o_calcular(
+                            (huella, filtros_fecha, 'filas'),
+                            lambda: indice.filtrar(df, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin,
+                                                   localidad=localidad_seleccionada))
+                        cubo_filtrado = cache.obtener_o_calcular(
+                            (huella, filtros_fecha, seccion_cubo),
+                            lambda: cubo_base.filtrar(fecha_inicio, fecha_fin, localidad=localidad_seleccionada))
+
+                    # Cálculo de KPIs con datos filtrados
+                    with medidor.etapa('kpis', len(df_filtrado)):
+                        kpis = cache.obtener_o_calcular(
+                            (huella, filtros_fecha, 'kpis'),
+                            lambda: calcular_kpis(df_filtrado if cubo_base is cubo else cubo_filtrado))
+
+                        mostrar_kpis(**kpis)
+
+
+                    with medidor.etapa('resumen', len(cubo_filtrado)):
+                        st.subheader('Tablas de Resumen')
+                        st.write('Ventas por Cliente')
+                        st.dataframe(tabla_resumen(cubo_filtrado, 'Cliente'), use_container_width=True)
+                        st.write('Ventas por Vendedor')
+                        st.dataframe(tabla_resumen(cubo_filtrado, 'Vendedor'), use_container_width=True)
+                        st.write('Ventas por Producto')
+                        st.dataframe(tabla_resumen(cubo_filtrado, 'Descripcion', cantidad=True), use_container_width=True)
+
+                    if not venta_por_localidad.empty:
+                        st.write('Ventas por Localidad')
+                        st.dataframe(venta_por_localidad, use_container_width=True)
+
+                        # Gráfico de pastel para Ventas por Localidad
+                        def dibujar_localidad():
+                            fig_localidad, ax_localidad = nueva_figura(figsize=(10, 7))
+                            ax_localidad.pie(
+                                venta_por_localidad['total_vendido'],
+                                labels=venta_por_localidad['Localidad Nombre'],
+                                autopct='%1.1f%%',
+                                colors=sns.color_palette('Set2', n_colors=len(venta_por_localidad)),
+                                startangle=140
+                            )
+                            ax_localidad.set_title('Distribución de Ventas por Localidad')
+                            return fig_localidad
+                        if 'localidad' in secciones:
+                            mostrar_grafico((huella, (), 'grafico_localidad'), dibujar_localidad)
+
+                    # Asegúrate de que el DataFrame tenga la columna 'Total Vendido' después de las agregaciones
+                    if 'Total Vendido' not in df_filtrado.columns:
+                        st.error("La columna 'Total Vendido' no está en el DataFrame. Verifica las agregaciones.")
+                    else:
+                        # Crear los gráficos solo si la columna existe
+                        st.subheader('Gráficos')
+
+                        # Gráfico de Ventas por Cliente
+                        def dibujar_top_clientes():
+                            fig_clientes, ax_clientes = nueva_figura(figsize=(12, 6))
+                            df_clientes = cubo_filtrado.top('Cliente', 10)
+                            sns.barplot(x='Cliente', y='Total Vendido', data=df_clientes, order=df_clientes['Cliente'], ax=ax_clientes, palette="husl")
+                            ax_clientes.set_title('Top 10 Clientes por Ventas Totales')
+                            ax_clientes.set_xlabel('Cliente')
+                            ax_clientes.set_ylabel('Total Vendido')
+                            ax_clientes.tick_params(axis='x', rotation=45)
+
+                            # Añadir etiquetas de monto en cada barra
+                            etiquetar_barras(ax_clientes)
+                            return fig_clientes
+
+                        # Gráfico de Ventas por Vendedor
+                        def dibujar_top_vendedores():
+                            fig_vendedores, ax_vendedores = nueva_figura(figsize=(12, 6))
+                            df_vendedores = cubo_filtrado.top('Vendedor', 10)
+                            sns.barplot(x='Vendedor', y='Total Vendido', data=df_vendedores, order=df_vendedores['Vendedor'], ax=ax_vendedores, palette="Set2")
+                            ax_vendedores.set_title('Top 10 Vendedores por Ventas Totales')
+                            ax_vendedores.set_xlabel('Vendedor')
+                            ax_vendedores.set_ylabel('Total Vendido')
+                            ax_vendedores.tick_params(axis='x', rotation=45)
+
+                            # Añadir etiquetas de monto en cada barra
+                            etiquetar_barras(ax_vendedores)
+                            return fig_vendedores
+
+                        # Gráfico de Ventas por Producto
+                        def dibujar_top_productos():
+                            fig_productos, ax_productos = nueva_figura(figsize=(12, 6))
+                            df_productos = tabla_resumen(cubo_filtrado, 'Descripcion', cantidad=True).head(10)
+                            sns.barplot(x='Descripcion', y='total_vendido', data=df_productos, order=df_productos['Descripcion'], ax=ax_productos, palette="magma")
+                            ax_productos.set_title('Top 10 Productos por Ventas Totales')
+                            ax_productos.set_xlabel('Producto')
+                            ax_productos.set_ylabel('Total Vendido')
+                            ax_productos.tick_params(axis='x', rotation=45)
+
+                            # Añadir etiquetas de monto en cada barra
+                            etiquetar_barras(ax_productos)
+                            return fig_productos
+
+                        if 'top10' in secciones:
+                            mostrar_grafico((huella, filtros_fecha, 'grafico_top_clientes'), dibujar_top_clientes)
+                            mostrar_grafico((huella, filtros_fecha, 'grafico_top_vendedores'), dibujar_top_vendedores)
+                            mostrar_grafico((huella, filtros_fecha, 'grafico_top_productos'), dibujar_top_productos)
+
+                        # Obtener la lista de meses disponibles a partir de la clave entera de mes
+                        meses_disponibles = [clave_a_mes(clave) for clave in sorted(df['MesClave'].unique())]
+
+                        # Establecer el mes actual como el valor predeterminado
+                        mes_actual = pd.Timestamp.now().to_period('M').strftime('%Y-%m')  # Usa strftime para convertir a string
+                        mes_seleccionado = st.sidebar.selectbox('Selecciona el Mes', options=meses_disponibles, index=indice_mes(meses_disponibles, mes_actual))
+
+                        # Filtrar los datos por el mes seleccionado
+                        filtros_mes = normalizar_filtros(mes=mes_a_clave(mes_seleccionado))
+                        df_filtrado = cache.obtener_o_calcular(
+                            (huella, filtros_mes, 'filas'), lambda: indice.filtrar(df, mes=mes_a_clave(mes_seleccionado)))
+                        cubo_mes = cache.obtener_o_calcular(
+                            (huella, filtros_mes, seccion_cubo), lambda: cubo_base.filtrar(mes=mes_a_clave(mes_seleccionado)))
+
+                        # Agrupar las ventas por fecha
+                        df_fecha = ventas_diarias(cubo_mes).reset_index()
+
+                        # Crear el gráfico de líneas para ventas totales por fecha
+                        def dibujar_ventas_fecha():
+                            fig_fecha, ax_fecha = nueva_figura(figsize=(12, 6))
+                            sns.lineplot(x='FechaPedidoServerN', y='Total Vendido', data=df_fecha, ax=ax_fecha, marker='o')
+
+                            # Configurar títulos y etiquetas con ajustes de tamaño
+                            ax_fecha.set_title('Ventas Totales por Fecha', pad=30, fontsize=16)  # Aumentar el espacio superior del título y ajustar el tamaño de fuente
+                            ax_fecha.set_xlabel('Fecha', labelpad=10, fontsize=12)  # Ajustar el tamaño de fuente y el espacio para la etiqueta del eje X
+                            ax_fecha.set_ylabel('Total Vendido', labelpad=10, fontsize=12)  # Ajustar el tamaño de fuente y el espacio para la etiqueta del eje Y
+                            ax_fecha.tick_params(axis='x', rotation=45, labelsize=10)  # Ajustar el tamaño de fuente de las etiquetas del eje X
+                            ax_fecha.tick_params(axis='y', labelsize=10)  # Ajustar el tamaño de fuente de las etiquetas del eje Y
+
+                           # Añadir etiquetas de monto en cada punto
+                            etiquetar_puntos(ax_fecha, df_fecha['FechaPedidoServerN'], df_fecha['Total Vendido'], fontsize=9)
+
+                            return fig_fecha
+                        if 'diarias' in secciones:
+                            mostrar_grafico((huella, filtros_mes, 'grafico_ventas_fecha'), dibujar_ventas_fecha)
+
+
+
+
+                        # La lista de meses disponibles para el segmentador ya se calculó arriba
+
+                        # Obtener el mes actual para usar como valor predeterminado
+                        mes_actual = pd.Timestamp.now().to_period('M').strftime('%Y-%m')
+
+                        # Crear el selector de mes en la barra lateral con el mes actual como valor predeterminado
+                        mes_seleccionado = st.sidebar.selectbox('Selecciona el mes', options=meses_disponibles, index=indice_mes(meses_disponibles, mes_actual), key='selector_mes_unico')
+
+                        # Filtrar los datos según el mes seleccionado
+                        filtros_mes = normalizar_filtros(mes=mes_a_clave(mes_seleccionado))
+                        df_filtrado = cache.obtener_o_calcular(
+                            (huella, filtros_mes, 'filas'), lambda: indice.filtrar(df, mes=mes_a_clave(mes_seleccionado)))
+                        cubo_mes = cache.obtener_o_calcular(
+                            (huella, filtros_mes, seccion_cubo), lambda: cubo_base.filtrar(mes=mes_a_clave(mes_seleccionado)))
+
+                        # Gráfico de Ventas Diarias con barras destacadas para mayores y menores ventas
+                        def dibujar_ventas_diarias():
+                            fig, ax = nueva_figura(figsize=(12, 6))
+
+                            # Calcular ventas diarias
+                            df_diarias = ventas_diarias(cubo_mes).reset_index()
+
+                            # Identificar el máximo y mínimo de ventas diarias
+                            max_venta = df_diarias['Total Vendido'].max()
+                            min_venta = df_diarias['Total Vendido'].min()
+
+                            # Crear una columna para el color de las barras
+                            df_diarias['Color'] = df_diarias['Total Vendido'].apply(lambda x: 'green' if x == max_venta else ('red' if x == min_venta else 'grey'))
+
+                            # Crear el gráfico de barras
+                            sns.barplot(x='FechaPedidoServerN', y='Total Vendido', data=df_diarias, ax=ax, palette=df_diarias['Color'].values)
+
+                            # Añadir etiquetas de monto en cada barra
+                            etiquetar_barras(ax)
+
+                            # Configurar títulos y etiquetas con un margen superior ajustado
+                            ax.set_title(f'Ventas Diarias para {mes_seleccionado} con Días de Mayor y Menor Venta Destacados', pad=20)  # Ajusta el espacio superior del título con pad
 
-                    # Suponiendo que 'FechaPedidoServerN' es una columna de tipo datetime y 'Localidad Nombre' es el nombre correcto de la columna con nombres de localidades.
+                            # Ajustar el espacio entre las etiquetas de los ejes y el gráfico
+                            ax.set_xlabel('Fecha', labelpad=15)  # Incrementa el espacio para la etiqueta del eje X
+                            ax.set_ylabel('Total Vendido', labelpad=15)  # Incrementa el espacio para la etiqueta del eje Y
+                            ax.tick_params(axis='x', rotation=45)
+
+                            return fig
+                        if 'diarias' in secciones:
+                            mostrar_grafico((huella, filtros_mes, 'grafico_ventas_diarias'), dibujar_ventas_diarias)
 
-                    # Obtener el mes actual
-                    mes_actual = datetime.now().strftime('%Y-%m')
+                        # Suponiendo que 'FechaPedidoServerN' es una columna de tipo datetime y 'Localidad Nombre' es el nombre correcto de la columna con nombres de localidades.
 
-                    # Generar una lista de meses desde enero de 2020 hasta el mes actual
-                    fechas_disponibles = pd.date_range(start='2020-01-01', end=datetime.now(), freq='M').strftime('%Y-%m').tolist()
+                        # Obtener el mes actual
+                        mes_actual = datetime.now().strftime('%Y-%m')
 
-                    # Asegurarse de que el mes actual esté incluido en la lista
-                    if mes_actual not in fechas_disponibles:
-                        fechas_disponibles.append(mes_actual)
+                        # Generar una lista de meses desde enero de 2020 hasta el mes actual
+                        fechas_disponibles = pd.date_range(start='2020-01-01', end=datetime.now(), freq='M').strftime('%Y-%m').tolist()
 
-                    # Selector de mes (ya está en la barra lateral)
-                    mes_seleccionado = st.sidebar.selectbox(
-                        "Seleccionar Mes",
-                        fechas_disponibles,
-                        index=fechas_disponibles.index(mes_actual),
-                        key='selector_mes_kpis'
-                    )
+                        # Asegurarse de que el mes actual esté incluido en la lista
+                        if mes_actual not in fechas_disponibles:
+                            fechas_disponibles.append(mes_actual)
 
-                    # Verificar si la columna 'Localidad Nombre' existe
-                    if 'Localidad Nombre' in df_filtrado.columns:
-                        # Filtro por localidad (ya está en la barra lateral)
-                        localidades = df_filtrado['Localidad Nombre'].unique()
-                        localidad_seleccionada = st.sidebar.selectbox("Seleccionar Localidad", ['Todas'] + list(localidades), key='selector_localidad_kpis')
-                        
-                        # Filtrar datos por mes y localidad
-                        df_filtrado_mes = df_filtrado[df_filtrado['FechaPedidoServerN'].dt.strftime('%Y-%m') == mes_seleccionado]
-                        
-                        if localidad_seleccionada != 'Todas':
-                            df_filtrado_final = df_filtrado_mes[df_filtrado_mes['Localidad Nombre'] == localidad_seleccionada]
-                        else:
-                            df_filtrado_final = df_filtrado_mes
-                    else:
-                        st.warning("La columna 'Localidad Nombre' no se encuentra en el archivo.")
-                        df_filtrado_final = pd.DataFrame()  # Crear un DataFrame vacío si la columna no existe
-
-                    # Verificar si el DataFrame filtrado no está vacío
-                    if not df_filtrado_final.empty:
-                        # Calcular el total vendido por los top 10 clientes
-                        top_clientes = df_filtrado_final.groupby('Cliente')['Total Vendido'].sum().nlargest(10).sum()
-
-                        # Calcular el total vendido por los top 10 vendedores
-                        top_vendedores = df_filtrado_final.groupby('Vendedor')['Total Vendido'].sum().nlargest(10).sum()
-
-                        # Mostrar los KPIs con espacio entre ellos
-                        st.metric("Ventas Totales - Top 10 Clientes", f"${top_clientes:,.2f}")
-                        st.write("")  # Añadir espacio
-                        st.metric("Ventas Totales - Top 10 Vendedores", f"${top_vendedores:,.2f}")
-
-                        # Filtrar los 10 días con ventas más altas y bajas
-                        mejores_dias = df_filtrado_final.groupby('FechaPedidoServerN')['Total Vendido'].sum().nlargest(10)
-                        peores_dias = df_filtrado_final.groupby('FechaPedidoServerN')['Total Vendido'].sum().nsmallest(10)
-
-                        # Crear gráficos separados para mejores y peores días
-                        fig, ax = plt.subplots(1, 2, figsize=(16, 6))
-
-                        # Graficar los mejores días en verde
-                        mejores_dias.plot(kind='bar', color='green', edgecolor='black', ax=ax[0])
-                        ax[0].set_title('Top 10 Mejores Días por Ventas Totales')
-                        ax[0].set_xlabel('Fecha')
-                        ax[0].set_ylabel('Total Vendido')
-                        ax[0].tick_params(axis='x', rotation=45)
-                        for i, (fecha, total) in enumerate(zip(mejores_dias.index, mejores_dias.values)):
-                            ax[0].text(i, total + 0.05 * total, f"${total:,.2f}", ha='center', va='bottom', fontsize=8, color='green')
-
-                        # Graficar los peores días en rojo
-                        peores_dias.plot(kind='bar', color='red', edgecolor='black', ax=ax[1])
-                        ax[1].set_title('Top 10 Peores Días por Ventas Totales')
-                        ax[1].set_xlabel('Fecha')
-                        ax[1].set_ylabel('Total Vendido')
-                        ax[1].tick_params(axis='x', rotation=45)
-                        for i, (fecha, total) in enumerate(zip(peores_dias.index, peores_dias.values)):
-                            ax[1].text(i, total + 0.05 * total, f"${total:,.2f}", ha='center', va='bottom', fontsize=8, color='red')
-
-                        # Mostrar los gráficos en Streamlit
-                        st.pyplot(fig)
-                    else:
-                        st.warning("No hay datos disponibles para el mes y la localidad seleccionados.")
-                        
-                    # Gráfico de dispersión de ventas por fecha
-                    fig_dispersion, ax_dispersion = plt.subplots(figsize=(12, 6))
-                    sns.scatterplot(x='FechaPedidoServerN', y='Total Vendido', data=df_filtrado, ax=ax_dispersion)
-
-                    # Configurar títulos y etiquetas
-                    ax_dispersion.set_title('Ventas Totales por Fecha (Dispersión)')
-                    ax_dispersion.set_xlabel('Fecha')
-                    ax_dispersion.set_ylabel('Total Vendido')
-                    ax_dispersion.tick_params(axis='x', rotation=45)
-
-                    # Mostrar el gráfico
-                    st.pyplot(fig_dispersion)
-
-                    # Calcular las ventas totales por cliente
-                    ventas_por_cliente = df_filtrado.groupby('Cliente')['Total Vendido'].sum().nlargest(20).reset_index()
-
-                    # Crear el gráfico de embudo para los clientes
-                    fig_embudo_cliente = go.Figure(go.Funnel(
-                        y = ventas_por_cliente['Cliente'],
-                        x = ventas_por_cliente['Total Vendido'],
-                        textinfo = "value+percent initial"
-                    ))
-
-                    fig_embudo_cliente.update_layout(title_text='Embudo de Ventas por Cliente (Top 20)')
-                    st.plotly_chart(fig_embudo_cliente, use_container_width=True)
-
-                    # Calcular las ventas totales por vendedor
-                    ventas_por_vendedor = df_filtrado.groupby('Vendedor')['Total Vendido'].sum().nlargest(20).reset_index()
-
-                    # Crear el gráfico de embudo para los vendedores
-                    fig_embudo_vendedor = go.Figure(go.Funnel(
-                        y = ventas_por_vendedor['Vendedor'],
-                        x = ventas_por_vendedor['Total Vendido'],
-                        textinfo = "value+percent initial"
-                    ))
-
-                    fig_embudo_vendedor.update_layout(title_text='Embudo de Ventas por Vendedor (Top 20)')
-                    st.plotly_chart(fig_embudo_vendedor, use_container_width=True)
-
-                    # Calcular las ventas totales por producto
-                    ventas_por_producto = df_filtrado.groupby('Descripcion')['Total Vendido'].sum().nlargest(20).reset_index()
-
-                    # Crear el gráfico de embudo para los productos
-                    fig_embudo_producto = go.Figure(go.Funnel(
-                        y = ventas_por_producto['Descripcion'],
-                        x = ventas_por_producto['Total Vendido'],
-                        textinfo = "value+percent initial"
-                    ))
-
-                    fig_embudo_producto.update_layout(title_text='Embudo de Ventas por Producto (Top 20)')
-                    st.plotly_chart(fig_embudo_producto, use_container_width=True)
-                    
-                    
-                    
-                    # Filtrar por Condición de Pago
-                    if 'Condicion Pago' in df.columns:
-                        condiciones_pago = df['Condicion Pago'].unique()
-                        condicion_pago_seleccionada = st.sidebar.selectbox('Selecciona Condición de Pago', ['Todas'] + list(condiciones_pago))
-                    else:
-                        st.warning("La columna 'Condicion Pago' no se encuentra en el archivo.")
-                        condicion_pago_seleccionada = 'Todas'
+                        # Selector de mes (ya está en la barra lateral)
+                        mes_kpis = st.sidebar.selectbox(
+                            "Seleccionar Mes",
+                            fechas_disponibles,
+                            index=fechas_disponibles.index(mes_actual),
+                            key='selector_mes_kpis'
+                        )
 
-                    # Filtrar por Cliente
-                    if 'Cliente' in df.columns:
-                        clientes = df['Cliente'].unique()
-                        cliente_seleccionado = st.sidebar.selectbox('Selecciona un Cliente', ['Todos'] + list(clientes))
-                    else:
-                        st.warning("La columna 'Cliente' no se encuentra en el archivo.")
-                        cliente_seleccionado = 'Todos'
+                        # Verificar si la columna 'Localidad Nombre' existe
+                        if 'Localidad Nombre' in df_filtrado.columns:
+                            # Filtro por localidad (ya está en la barra lateral)
+                            localidades = etiquetas_presentes(df_filtrado['Localidad Nombre'])
+                            localidad_seleccionada = st.sidebar.selectbox("Seleccionar Localidad", ['Todas'] + list(localidades), key='selector_localidad_kpis')
 
-                    # Filtrar por Vendedor
-                    if 'Vendedor' in df.columns:
-                        vendedores = df['Vendedor'].unique()
-                        vendedor_seleccionado = st.sidebar.selectbox('Selecciona un Vendedor', ['Todos'] + list(vendedores))
-                    else:
-                        st.warning("La columna 'Vendedor' no se encuentra en el archivo.")
-                        vendedor_seleccionado = 'Todos'
-
-                    # Aplicar filtros
-                    if condicion_pago_seleccionada != 'Todas':
-                        df_filtrado = df_filtrado[df_filtrado['Condicion Pago'] == condicion_pago_seleccionada]
-
-                    if cliente_seleccionado != 'Todos':
-                        df_filtrado = df_filtrado[df_filtrado['Cliente'] == cliente_seleccionado]
-
-                    if vendedor_seleccionado != 'Todos':
-                        df_filtrado = df_filtrado[df_filtrado['Vendedor'] == vendedor_seleccionado]
-                        
-                        
-                    # Gráfico de Ventas por Condición de Pago
-                    fig_condicion_pago, ax_condicion_pago = plt.subplots(figsize=(12, 6))
-                    df_condicion_pago = df_filtrado.groupby('Condicion Pago')['Total Vendido'].sum().reset_index().sort_values('Total Vendido', ascending=False)
-                    sns.barplot(x='Condicion Pago', y='Total Vendido', data=df_condicion_pago, ax=ax_condicion_pago, palette="coolwarm")
-                    ax_condicion_pago.set_title('Ventas Totales por Condición de Pago')
-                    ax_condicion_pago.set_xlabel('Condición de Pago')
-                    ax_condicion_pago.set_ylabel('Total Vendido')
-                    for p in ax_condicion_pago.patches:
-                        ax_condicion_pago.annotate(f'${p.get_height():,.0f}', (p.get_x() + p.get_width() / 2., p.get_height()),
-                                                ha='center', va='center', fontsize=10, color='black', xytext=(0, 10),
-                                                textcoords='offset points')
-                    st.pyplot(fig_condicion_pago)
-                    
-  
-  
-
-
-                    # Verificar que las columnas necesarias están presentes
-                    required_columns = ['Descripcion', 'FechaPedidoServerN', 'Cantidad']
-                    missing_columns = [col for col in required_columns if col not in df.columns]
-                    if missing_columns:
-                        raise ValueError(f"Faltan las siguientes columnas en el archivo CSV: {', '.join(missing_columns)}")
-
-                    # Convertir 'FechaPedidoServerN' a datetime si no lo es ya
-                    df['FechaPedidoServerN'] = pd.to_datetime(df['FechaPedidoServerN'], errors='coerce')
-
-                    # Eliminar filas con fechas nulas después de la conversión
-                    df = df.dropna(subset=['FechaPedidoServerN'])
-
-                    # Crear una columna para el mes y año
-                    df['Mes'] = df['FechaPedidoServerN'].dt.to_period('M')
-
-                    # Crear una tabla pivote de productos y cantidades por mes
-                    tabla_pivote = df.pivot_table(index='Descripcion', columns='Mes', values='Cantidad', aggfunc='sum', fill_value=0)
-
-                    # Proyección de ventas futuras utilizando una media móvil simple de 3 meses
-                    ventas_mes = df.groupby('Mes')['Cantidad'].sum()
-                    proyeccion = ventas_mes.rolling(window=3).mean().shift(-1)
-
-                    # Rellenar la proyección para los meses faltantes hasta el 31 de diciembre
-                    meses_futuros = pd.date_range(start=df['FechaPedidoServerN'].max(), end='2024-12-31', freq='M').to_period('M')
-                    for mes in meses_futuros:
-                        if mes not in proyeccion.index:
-                            proyeccion.loc[mes] = proyeccion.iloc[-1]  # Utilizar la última proyección conocida para los meses futuros
-
-                    # Crear un gráfico de la proyección de ventas
-                    plt.figure(figsize=(12, 6))
-                    plt.plot(ventas_mes.index.astype(str), ventas_mes.values, label='Ventas Históricas', marker='o')
-                    plt.plot(proyeccion.index.astype(str), proyeccion.values, label='Proyección de Ventas', linestyle='--', marker='x')
-                    plt.title('Proyección de Ventas Mensuales')
-                    plt.xlabel('Mes')
-                    plt.ylabel('Cantidad Vendida')
-                    plt.legend()
-                    plt.grid(True)
-                    plt.xticks(rotation=45)
-                    plt.tight_layout()
-                    plt.show()
-
-                    # Añadir la proyección a la tabla pivote
-                    tabla_pivote = tabla_pivote.join(proyeccion.rename('Proyección'), how='outer')
-
-                    # Mostrar la tabla pivote
-                    print(tabla_pivote)
-                   
-  
-  
-  
-  
-  
-  
-  
-                    # --- Análisis ABC de los 30 Mejores Clientes ---
-
-                    # Filtrar los 30 mejores clientes basados en Total Vendido
-                    top_30_clientes = df_filtrado.groupby('Cliente')['Total Vendido'].sum().nlargest(30).reset_index()
-
-                    # Calcular el total acumulado y el porcentaje acumulado
-                    top_30_clientes['Total Acumulado'] = top_30_clientes['Total Vendido'].cumsum()
-                    top_30_clientes['Porcentaje Acumulado'] = 100 * top_30_clientes['Total Acumulado'] / top_30_clientes['Total Vendido'].sum()
-
-                    # Clasificar en A, B, C según el análisis Pareto (80/20)
-                    def clasificar_abc(porcentaje_acumulado):
-                        if porcentaje_acumulado <= 80:
-                            return 'A'
-                        elif porcentaje_acumulado <= 95:
-                            return 'B'
+                            # Filtrar datos por mes y localidad
+                            filtros_final = filtros_mes + normalizar_filtros(mes_kpis=mes_a_clave(mes_kpis),
+                                                                             localidad=localidad_seleccionada)
+                            cubo_final = cache.obtener_o_calcular(
+                                (huella, filtros_final, seccion_cubo),
+                                lambda: cubo_mes.filtrar(mes=mes_a_clave(mes_kpis), localidad=localidad_seleccionada))
                         else:
-                            return 'C'
-
-                    top_30_clientes['Clasificación ABC'] = top_30_clientes['Porcentaje Acumulado'].apply(clasificar_abc)
-
-                    # Funciones de color basadas en la clasificación ABC
-                    def color_abc(val):
-                        color = ''
-                        text_color = ''
-                        if val == 'A':
-                            color = 'background-color: #00FF00;'  # Verde para categoría A
-                            text_color = 'color: #000000;'  # Negro para contraste
-                        elif val == 'B':
-                            color = 'background-color: #FFFF00;'  # Amarillo para categoría B
-                            text_color = 'color: #000000;'  # Negro para contraste
-                        elif val == 'C':
-                            color = 'background-color: #FF0000;'  # Rojo para categoría C
-                            text_color = 'color: #FFFFFF;'  # Blanco para contraste
-                        return f'{color} {text_color}'
-
-                    # Aplicar estilo a la tabla
-                    styled_df = top_30_clientes.style.applymap(color_abc, subset=['Clasificación ABC'])
-
-                    # Mostrar la tabla en Streamlit
-                    st.write("Análisis ABC de los 30 Mejores Clientes")
-                    st.dataframe(styled_df)
-
-                    
-
-  
-  
-  
-                    # --- Análisis ABC de los Productos ---
-
-                    # Filtrar los productos con mayores ventas basadas en Total Vendido
-                    top_productos = df_filtrado.groupby('Descripcion')['Total Vendido'].sum().nlargest(30).reset_index()
-
-                    # Calcular el total acumulado y el porcentaje acumulado
-                    top_productos['Total Acumulado'] = top_productos['Total Vendido'].cumsum()
-                    top_productos['Porcentaje Acumulado'] = 100 * top_productos['Total Acumulado'] / top_productos['Total Vendido'].sum()
-
-                    # Clasificar en A, B, C según el análisis Pareto (80/20)
-                    def clasificar_abc(porcentaje_acumulado):
-                        if porcentaje_acumulado <= 80:
-                            return 'A'
-                        elif porcentaje_acumulado <= 95:
-                            return 'B'
+                            st.warning("La columna 'Localidad Nombre' no se encuentra en el archivo.")
+                            cubo_final = None
+
+                        # Verificar si los datos filtrados no están vacíos
+                        if cubo_final is not None and len(cubo_final) > 0:
+                            # Calcular el total vendido por los top 10 clientes
+                            top_clientes = cubo_final.top('Cliente', 10)['Total Vendido'].sum()
+
+                            # Calcular el total vendido por los top 10 vendedores
+                            top_vendedores = cubo_final.top('Vendedor', 10)['Total Vendido'].sum()
+
+                            # Mostrar los KPIs con espacio entre ellos
+                            st.metric("Ventas Totales - Top 10 Clientes", f"${top_clientes:,.2f}")
+                            st.write("")  # Añadir espacio
+                            st.metric("Ventas Totales - Top 10 Vendedores", f"${top_vendedores:,.2f}")
+
+                            # Filtrar los 10 días con ventas más altas y bajas
+                            mejores_dias, peores_dias = dias_extremos(cubo_final, 10)
+
+                            # Crear gráficos separados para mejores y peores días
+                            def dibujar_mejores_dias():
+                                fig, ax = nueva_figura(1, 2, figsize=(16, 6))
+
+                                # Graficar los mejores días en verde
+                                mejores_dias.plot(kind='bar', color='green', edgecolor='black', ax=ax[0])
+                                ax[0].set_title('Top 10 Mejores Días por Ventas Totales')
+                                ax[0].set_xlabel('Fecha')
+                                ax[0].set_ylabel('Total Vendido')
+                                ax[0].tick_params(axis='x', rotation=45)
+                                etiquetar_barras(ax[0], '${:,.2f}', fontsize=8, color='green')
+
+                                # Graficar los peores días en rojo
+                                peores_dias.plot(kind='bar', color='red', edgecolor='black', ax=ax[1])
+                                ax[1].set_title('Top 10 Peores Días por Ventas Totales')
+                                ax[1].set_xlabel('Fecha')
+                                ax[1].set_ylabel('Total Vendido')
+                                ax[1].tick_params(axis='x', rotation=45)
+                                etiquetar_barras(ax[1], '${:,.2f}', fontsize=8, color='red')
+
+                                return fig
+                            if 'mejores_dias' in secciones:
+                                mostrar_grafico((huella, filtros_final, 'grafico_mejores_dias'), dibujar_mejores_dias)
                         else:
-                            return 'C'
-
-                    top_productos['Clasificación ABC'] = top_productos['Porcentaje Acumulado'].apply(clasificar_abc)
-
-                    # Funciones de color basadas en la clasificación ABC
-                    def color_abc(val):
-                        color = ''
-                        text_color = ''
-                        if val == 'A':
-                            color = 'background-color: #00FF00;'  # Verde para categoría A
-                            text_color = 'color: #000000;'  # Negro para contraste
-                        elif val == 'B':
-                            color = 'background-color: #FFFF00;'  # Amarillo para categoría B
-                            text_color = 'color: #000000;'  # Negro para contraste
-                        elif val == 'C':
-                            color = 'background-color: #FF0000;'  # Rojo para categoría C
-                            text_color = 'color: #FFFFFF;'  # Blanco para contraste
-                        return f'{color} {text_color}'
-
-                    # Aplicar estilo a la tabla
-                    styled_df_productos = top_productos.style.applymap(color_abc, subset=['Clasificación ABC'])
-
-                    # Mostrar la tabla en Streamlit
-                    st.write("Análisis ABC de los Productos")
-                    st.dataframe(styled_df_productos)
-
-  
-  
-  
-  
-  
-                    
-                  
-                  # --- Análisis ABC de los Vendedores ---
-
-                    # Filtrar los vendedores con mayores ventas basadas en Total Vendido
-                    top_vendedores = df_filtrado.groupby('Vendedor')['Total Vendido'].sum().nlargest(30).reset_index()
-
-                    # Calcular el total acumulado y el porcentaje acumulado
-                    top_vendedores['Total Acumulado'] = top_vendedores['Total Vendido'].cumsum()
-                    top_vendedores['Porcentaje Acumulado'] = 100 * top_vendedores['Total Acumulado'] / top_vendedores['Total Vendido'].sum()
-
-                    # Clasificar en A, B, C según el análisis Pareto (80/20)
-                    def clasificar_abc(porcentaje_acumulado):
-                        if porcentaje_acumulado <= 80:
-                            return 'A'
-                        elif porcentaje_acumulado <= 95:
-                            return 'B'
+                            st.warning("No hay datos disponibles para el mes y la localidad seleccionados.")
+
+                        # Gráfico de dispersión de ventas por fecha
+                        def dibujar_dispersion():
+                            fig_dispersion, ax_dispersion = nueva_figura(figsize=(12, 6))
+                            sns.scatterplot(x='FechaPedidoServerN', y='Total Vendido', data=df_filtrado, ax=ax_dispersion)
+
+                            # Configurar títulos y etiquetas
+                            ax_dispersion.set_title('Ventas Totales por Fecha (Dispersión)')
+                            ax_dispersion.set_xlabel('Fecha')
+                            ax_dispersion.set_ylabel('Total Vendido')
+                            ax_dispersion.tick_params(axis='x', rotation=45)
+
+                            return fig_dispersion
+                        if 'dispersion' in secciones and interactivos:
+                            mostrar_grafico_interactivo(
+                                (huella, filtros_mes, 'grafico_dispersion'),
+                                lambda: dispersion_interactiva(df_filtrado, 'FechaPedidoServerN', 'Total Vendido',
+                                                               titulo='Ventas Totales por Fecha (Dispersión)',
+                                                               etiquetas={'FechaPedidoServerN': 'Fecha'}),
+                                len(df_filtrado))
+                        elif 'dispersion' in secciones:
+                            mostrar_grafico((huella, filtros_mes, 'grafico_dispersion'), dibujar_dispersion, filas=len(df_filtrado))
+
+                        if 'embudos' in secciones:
+                            # Calcular las ventas totales por cliente
+                            with medidor.etapa('embudos', len(cubo_mes)):
+                                ventas_por_cliente = cubo_mes.top('Cliente', 20)
+
+                                # Crear el gráfico de embudo para los clientes
+                                fig_embudo_cliente = go.Figure(go.Funnel(
+                                    y = ventas_por_cliente['Cliente'],
+                                    x = ventas_por_cliente['Total Vendido'],
+                                    textinfo = "value+percent initial"
+                                ))
+
+                                fig_embudo_cliente.update_layout(title_text='Embudo de Ventas por Cliente (Top 20)')
+                                st.plotly_chart(fig_embudo_cliente, use_container_width=True)
+
+                                # Calcular las ventas totales por vendedor
+                                ventas_por_vendedor = cubo_mes.top('Vendedor', 20)
+
+                                # Crear el gráfico de embudo para los vendedores
+                                fig_embudo_vendedor = go.Figure(go.Funnel(
+                                    y = ventas_por_vendedor['Vendedor'],
+                                    x = ventas_por_vendedor['Total Vendido'],
+                                    textinfo = "value+percent initial"
+                                ))
+
+                                fig_embudo_vendedor.update_layout(title_text='Embudo de Ventas por Vendedor (Top 20)')
+                                st.plotly_chart(fig_embudo_vendedor, use_container_width=True)
+
+                                # Calcular las ventas totales por producto
+                                ventas_por_producto = cubo_mes.top('Descripcion', 20)
+
+                                # Crear el gráfico de embudo para los productos
+                                fig_embudo_producto = go.Figure(go.Funnel(
+                                    y = ventas_por_producto['Descripcion'],
+                                    x = ventas_por_producto['Total Vendido'],
+                                    textinfo = "value+percent initial"
+                                ))
+
+                                fig_embudo_producto.update_layout(title_text='Embudo de Ventas por Producto (Top 20)')
+                                st.plotly_chart(fig_embudo_producto, use_container_width=True)
+
+
+
+                        # Filtrar por Condición de Pago
+                        if 'Condicion Pago' in df.columns:
+                            condiciones_pago = indice.valores('Condicion Pago')
+                            condicion_pago_seleccionada = st.sidebar.selectbox('Selecciona Condición de Pago', ['Todas'] + list(condiciones_pago))
                         else:
-                            return 'C'
-
-                    top_vendedores['Clasificación ABC'] = top_vendedores['Porcentaje Acumulado'].apply(clasificar_abc)
-
-                    # Funciones de color basadas en la clasificación ABC
-                    def color_abc(val):
-                        color = ''
-                        text_color = ''
-                        if val == 'A':
-                            color = 'background-color: #00FF00;'  # Verde para categoría A
-                            text_color = 'color: #000000;'  # Negro para contraste
-                        elif val == 'B':
-                            color = 'background-color: #FFFF00;'  # Amarillo para categoría B
-                            text_color = 'color: #000000;'  # Negro para contraste
-                        elif val == 'C':
-                            color = 'background-color: #FF0000;'  # Rojo para categoría C
-                            text_color = 'color: #FFFFFF;'  # Blanco para contraste
-                        return f'{color} {text_color}'
-
-                    # Aplicar estilo a la tabla
-                    styled_df_vendedores = top_vendedores.style.applymap(color_abc, subset=['Clasificación ABC'])
-
-                    # Mostrar la tabla en Streamlit
-                    st.write("Análisis ABC de los Vendedores")
-                    st.dataframe(styled_df_vendedores)
-
-
-
-                    # Filtrar los 30 mejores clientes basados en Total Vendido
-                    top_30_clientes = df_filtrado.groupby('Cliente')['Total Vendido'].sum().nlargest(30).reset_index()
-
-                    # Calcular el total acumulado y el porcentaje acumulado
-                    top_30_clientes['Total Acumulado'] = top_30_clientes['Total Vendido'].cumsum()
-                    top_30_clientes['Porcentaje Acumulado'] = 100 * top_30_clientes['Total Acumulado'] / top_30_clientes['Total Vendido'].sum()
-
-                    # Clasificar en A, B, C según el análisis Pareto (80/20)
-                    def clasificar_abc(porcentaje_acumulado):
-                        if porcentaje_acumulado <= 80:
-                            return 'A'
-                        elif porcentaje_acumulado <= 95:
-                            return 'B'
-                        else:
-                            return 'C'
-
-                    top_30_clientes['Clasificación ABC'] = top_30_clientes['Porcentaje Acumulado'].apply(clasificar_abc)
-
-                    # Funciones de color basadas en la clasificación ABC
-                    def color_abc(val):
-                        color = ''
-                        text_color = ''
-                        if val == 'A':
-                            color = 'background-color: #00FF00;'  # Verde para categoría A
-                            text_color = 'color: #000000;'  # Negro para contraste
-                        elif val == 'B':
-                            color = 'background-color: #FFFF00;'  # Amarillo para categoría B
-                            text_color = 'color: #000000;'  # Negro para contraste
-                        elif val == 'C':
-                            color = 'background-color: #FF0000;'  # Rojo para categoría C
-                            text_color = 'color: #FFFFFF;'  # Blanco para contraste
-                        return f'{color} {text_color}'
-
-                    # Crear gráfico de Pareto
-                    fig, ax1 = plt.subplots(figsize=(12, 6))
-
-                    # Colores de las barras basados en la clasificación ABC
-                    colors = top_30_clientes['Clasificación ABC'].map({
-                        'A': '#00FF00',  # Verde
-                        'B': '#FFFF00',  # Amarillo
-                        'C': '#FF0000'   # Rojo
-                    })
-
-                    ax1.bar(top_30_clientes['Cliente'], top_30_clientes['Total Vendido'], color=colors, label='Total Vendido')
-                    ax1.set_xlabel('Cliente', fontsize=10)
-                    ax1.set_ylabel('Total Vendido', color='blue', fontsize=10)
-                    ax1.tick_params(axis='y', labelcolor='blue')
-                    ax1.set_title('Análisis ABC de los 30 Mejores Clientes', fontsize=12)
-                    ax1.tick_params(axis='x', rotation=90, labelsize=8)  # Rotar etiquetas x para mejor legibilidad
-
-                    ax2 = ax1.twinx()
-                    ax2.plot(top_30_clientes['Cliente'], top_30_clientes['Porcentaje Acumulado'], color='red', marker='o', label='Porcentaje Acumulado')
-                    ax2.set_ylabel('Porcentaje Acumulado (%)', color='red', fontsize=10)
-                    ax2.tick_params(axis='y', labelcolor='red')
-
-                    fig.tight_layout()
-                    st.pyplot(fig)
-
-                    # Aplicar estilo a la tabla
-                    styled_df = top_30_clientes.style.applymap(color_abc, subset=['Clasificación ABC'])
-
-                    # Mostrar la tabla en Streamlit
-                    st.write("Análisis ABC de los 30 Mejores Clientes")
-                    st.dataframe(styled_df)
-
-                    # --- Análisis ABC de los Productos ---
-
-                    # Filtrar los productos con mayores ventas basadas en Total Vendido
-                    top_productos = df_filtrado.groupby('Descripcion')['Total Vendido'].sum().nlargest(30).reset_index()
-
-                    # Calcular el total acumulado y el porcentaje acumulado
-                    top_productos['Total Acumulado'] = top_productos['Total Vendido'].cumsum()
-                    top_productos['Porcentaje Acumulado'] = 100 * top_productos['Total Acumulado'] / top_productos['Total Vendido'].sum()
-
-                    # Clasificar en A, B, C según el análisis Pareto (80/20)
-                    top_productos['Clasificación ABC'] = top_productos['Porcentaje Acumulado'].apply(clasificar_abc)
-
-                    # Crear gráfico de Pareto
-                    fig, ax1 = plt.subplots(figsize=(12, 6))
-
-                    # Colores de las barras basados en la clasificación ABC
-                    colors = top_productos['Clasificación ABC'].map({
-                        'A': '#00FF00',  # Verde
-                        'B': '#FFFF00',  # Amarillo
-                        'C': '#FF0000'   # Rojo
-                    })
-
-                    ax1.bar(top_productos['Descripcion'], top_productos['Total Vendido'], color=colors, label='Total Vendido')
-                    ax1.set_xlabel('Producto', fontsize=10)
-                    ax1.set_ylabel('Total Vendido', color='blue', fontsize=10)
-                    ax1.tick_params(axis='y', labelcolor='blue')
-                    ax1.set_title('Análisis ABC de los Productos', fontsize=12)
-                    ax1.tick_params(axis='x', rotation=90, labelsize=8)  # Rotar etiquetas x para mejor legibilidad
-
-                    ax2 = ax1.twinx()
-                    ax2.plot(top_productos['Descripcion'], top_productos['Porcentaje Acumulado'], color='red', marker='o', label='Porcentaje Acumulado')
-                    ax2.set_ylabel('Porcentaje Acumulado (%)', color='red', fontsize=10)
-                    ax2.tick_params(axis='y', labelcolor='red')
-
-                    fig.tight_layout()
-                    st.pyplot(fig)
-
-                    # Aplicar estilo a la tabla
-                    styled_df_productos = top_productos.style.applymap(color_abc, subset=['Clasificación ABC'])
-
-                    # Mostrar la tabla en Streamlit
-                    st.write("Análisis ABC de los Productos")
-                    st.dataframe(styled_df_productos)
-
-                    # --- Análisis ABC de los Vendedores ---
-
-                    # Filtrar los vendedores con mayores ventas basadas en Total Vendido
-                    top_vendedores = df_filtrado.groupby('Vendedor')['Total Vendido'].sum().nlargest(30).reset_index()
-
-                    # Calcular el total acumulado y el porcentaje acumulado
-                    top_vendedores['Total Acumulado'] = top_vendedores['Total Vendido'].cumsum()
-                    top_vendedores['Porcentaje Acumulado'] = 100 * top_vendedores['Total Acumulado'] / top_vendedores['Total Vendido'].sum()
-
-                    # Clasificar en A, B, C según el análisis Pareto (80/20)
-                    top_vendedores['Clasificación ABC'] = top_vendedores['Porcentaje Acumulado'].apply(clasificar_abc)
-
-                    # Crear gráfico de Pareto
-                    fig, ax1 = plt.subplots(figsize=(12, 6))
-
-                    # Colores de las barras basados en la clasificación ABC
-                    colors = top_vendedores['Clasificación ABC'].map({
-                        'A': '#00FF00',  # Verde
-                        'B': '#FFFF00',  # Amarillo
-                        'C': '#FF0000'   # Rojo
-                    })
-
-                    ax1.bar(top_vendedores['Vendedor'], top_vendedores['Total Vendido'], color=colors, label='Total Vendido')
-                    ax1.set_xlabel('Vendedor', fontsize=10)
-                    ax1.set_ylabel('Total Vendido', color='blue', fontsize=10)
-                    ax1.tick_params(axis='y', labelcolor='blue')
-                    ax1.set_title('Análisis ABC de los Vendedores', fontsize=12)
-                    ax1.tick_params(axis='x', rotation=90, labelsize=8)  # Rotar etiquetas x para mejor legibilidad
-
-                    ax2 = ax1.twinx()
-                    ax2.plot(top_vendedores['Vendedor'], top_vendedores['Porcentaje Acumulado'], color='red', marker='o', label='Porcentaje Acumulado')
-                    ax2.set_ylabel('Porcentaje Acumulado (%)', color='red', fontsize=10)
-                    ax2.tick_params(axis='y', labelcolor='red')
-
-                    fig.tight_layout()
-                    st.pyplot(fig)
-
-                    # Aplicar estilo a la tabla
-                    styled_df_vendedores = top_vendedores.style.applymap(color_abc, subset=['Clasificación ABC'])
-
-                    # Mostrar la tabla en Streamlit
-                    st.write("Análisis ABC de los Vendedores")
-                    st.dataframe(styled_df_vendedores)
-
-                  
-                      
-                     # Verificar si la columna 'FechaPedidoServerN' está en el DataFrame
-                    if 'FechaPedidoServerN' in df.columns:
-                        # Asegurarse de que la columna 'FechaPedidoServerN' es de tipo datetime
-                        df['FechaPedidoServerN'] = pd.to_datetime(df['FechaPedidoServerN'])
-                        
-                        # Crear columna de mes
-                        df['Mes'] = df['FechaPedidoServerN'].dt.month_name()
-
-                        # Agrupar ventas por mes
-                        df_mes = df.groupby('Mes')['Total Vendido'].sum().reset_index().sort_values('Total Vendido', ascending=False)
-
-                        st.subheader('Ventas Estacionales por Mes')
-                        st.dataframe(df_mes, use_container_width=True)
-
-                        # Gráfico de barras para ventas por mes
-                        fig_mes, ax_mes = plt.subplots(figsize=(12, 6))
-                        sns.barplot(x='Mes', y='Total Vendido', data=df_mes, ax=ax_mes, palette="summer")
-                        ax_mes.set_title('Ventas Totales por Mes')
-                        ax_mes.set_xlabel('Mes')
-                        ax_mes.set_ylabel('Total Vendido')
-                        ax_mes.tick_params(axis='x', rotation=45)
-
-                        # Añadir etiquetas de monto en cada barra
-                        for p in ax_mes.patches:
-                            ax_mes.annotate(f'${p.get_height():,.0f}', (p.get_x() + p.get_width() / 2., p.get_height()),
-                                            ha='center', va='center', fontsize=10, color='black', xytext=(0, 10),
-                                            textcoords='offset points')
-                        st.pyplot(fig_mes)
-                    else:
-                        st.warning("La columna 'FechaPedidoServerN' no se encuentra en el archivo.")
-
-                    # Configuración global para ajustar el tamaño de las etiquetas y los títulos
-                    plt.rc('axes', titlesize=8)   # Tamaño del título de los gráficos
-                    plt.rc('axes', labelsize=8)   # Tamaño de las etiquetas de los ejes
-                    plt.rc('xtick', labelsize=8)  # Tamaño de las etiquetas de los ticks en el eje x
-                    plt.rc('ytick', labelsize=8)  # Tamaño de las etiquetas de los ticks en el eje y
-                    plt.rc('legend', fontsize=8)  # Tamaño de la leyenda
-                    plt.rc('font', size=8)        # Tamaño de la fuente general
-
-                    # 1. Ventas Mensuales por Vendedor (Heatmap)
-                    df_filtrado['FechaPedidoServerN'] = pd.to_datetime(df_filtrado['FechaPedidoServerN'])
-                    df_filtrado['Mes'] = df_filtrado['FechaPedidoServerN'].dt.to_period('M')
-
-                    ventas_mensuales_vendedor = df_filtrado.groupby(['Vendedor', 'Mes'])['Total Vendido'].sum().unstack(fill_value=0)
-
-                    fig, ax = plt.subplots(figsize=(8, 8))
-                    sns.heatmap(ventas_mensuales_vendedor, cmap='YlGnBu', annot=True, fmt=".0f", linewidths=0.5, ax=ax)
-                    ax.set_title('Ventas Mensuales por Vendedor', pad=20)
-                    ax.set_xlabel('Mes', labelpad=15)
-                    ax.set_ylabel('Vendedor', labelpad=15)
-                    plt.xticks(rotation=45, ha='right')
-                    plt.yticks(rotation=0)
-                    plt.tight_layout()
-                    st.pyplot(fig)
-
-                    # 2. Participación de Mercado por Cliente (Pie Chart)
-                    ventas_por_cliente = df_filtrado.groupby('Cliente')['Total Vendido'].sum().reset_index()
-                    ventas_por_cliente = ventas_por_cliente.sort_values(by='Total Vendido', ascending=False).head(10)  # Top 10 Clientes
-
-                    fig_cliente, ax_cliente = plt.subplots(figsize=(8, 6))
-                    ax_cliente.pie(ventas_por_cliente['Total Vendido'], labels=ventas_por_cliente['Cliente'], autopct='%1.1f%%', startangle=140)
-                    ax_cliente.axis('equal')  # Para que el gráfico sea circular
-                    ax_cliente.set_title('Participación de Mercado - Top 10 Clientes', pad=20)
-                    plt.tight_layout()
-                    st.pyplot(fig_cliente)
-
-                    # 3. Distribución de Ventas por Vendedor (Violin Plot)
-                    fig, ax = plt.subplots(figsize=(8, 6))
-                    sns.violinplot(x='Vendedor', y='Total Vendido', data=df_filtrado, palette="muted", ax=ax)
-                    ax.set_title('Distribución de Ventas por Vendedor', pad=20)
-                    ax.set_xlabel('Vendedor', labelpad=15)
-                    ax.set_ylabel('Total Vendido', labelpad=15)
-                    plt.xticks(rotation=45, ha='right')
-                    plt.tight_layout()
-                    st.pyplot(fig)
-
-                    # 4. KPI - Promedio de Ventas por Cliente
-                    promedio_ventas_cliente = df_filtrado.groupby('Cliente')['Total Vendido'].sum().mean()
-
-                    fig_gauge = go.Figure(go.Indicator(
-                        mode="gauge+number",
-                        value=promedio_ventas_cliente,
-                        title={'text': "Promedio de Ventas por Cliente", 'font': {'size': 14}},
-                        gauge={'axis': {'range': [None, df_filtrado['Total Vendido'].max()]},
-                            'bar': {'color': "darkblue"},
-                            'steps': [
-                                {'range': [0, promedio_ventas_cliente/2], 'color': "lightgray"},
-                                {'range': [promedio_ventas_cliente/2, promedio_ventas_cliente], 'color': "gray"}],
-                            'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': promedio_ventas_cliente}}))
-
-                    st.plotly_chart(fig_gauge)
-
-                    # 5. Análisis de Descuentos (Boxplot)
-                    fig, ax = plt.subplots(figsize=(8, 6))
-                    sns.boxplot(x='Vendedor', y='Descuento', data=df_filtrado, palette="Blues", ax=ax)
-                    ax.set_title('Distribución de Descuentos por Vendedor', pad=20)
-                    ax.set_xlabel('Vendedor', labelpad=15)
-                    ax.set_ylabel('Descuento', labelpad=15)
-                    plt.xticks(rotation=45, ha='right')
-                    plt.tight_layout()
-                    st.pyplot(fig)
-
-                    # 6. Scatter Plot de Ventas por Unidad vs Precio
-                    fig, ax = plt.subplots(figsize=(8, 6))
-                    sns.scatterplot(x='Cantidad', y='Precio', size='Total Vendido', data=df_filtrado, hue='Cliente', palette='viridis', sizes=(20, 200), ax=ax)
-                    ax.set_title('Relación entre Cantidad Vendida y Precio', pad=20)
-                    ax.set_xlabel('Cantidad', labelpad=15)
-                    ax.set_ylabel('Precio', labelpad=15)
-                    ax.legend(bbox_to_anchor=(1, 1), loc='upper left')
-                    plt.tight_layout()
-                    st.pyplot(fig)
-
-                    # 7. Histograma de Frecuencia de Pedidos por Fecha
-                    fig, ax = plt.subplots(figsize=(8, 6))
-                    df_filtrado['FechaPedidoServerN'] = pd.to_datetime(df_filtrado['FechaPedidoServerN'])
-                    df_filtrado['Fecha'] = df_filtrado['FechaPedidoServerN'].dt.date
-
-                    sns.histplot(df_filtrado['Fecha'], bins=20, kde=False, color='blue', ax=ax)
-                    ax.set_title('Frecuencia de Pedidos por Fecha', pad=20)
-                    ax.set_xlabel('Fecha', labelpad=15)
-                    ax.set_ylabel('Número de Pedidos', labelpad=15)
-                    plt.xticks(rotation=45, ha='right')
-                    plt.tight_layout()
-                    st.pyplot(fig)
-
-                    # 8. Bubble Chart de Ventas por Localidad
-                    df_localidad = df_filtrado.groupby('Localidad Nombre').agg({'Total Vendido':'sum', 'Cantidad':'sum'}).reset_index()
-
-                    fig, ax = plt.subplots(figsize=(8, 6))
-                    sns.scatterplot(x='Cantidad', y='Total Vendido', size='Total Vendido', data=df_localidad, hue='Localidad Nombre', palette='coolwarm', sizes=(50, 500), ax=ax)
-                    ax.set_title('Ventas por Localidad', pad=20)
-                    ax.set_xlabel('Cantidad Vendida', labelpad=15)
-                    ax.set_ylabel('Total Vendido', labelpad=15)
-                    ax.legend(bbox_to_anchor=(1, 1), loc='upper left')
-                    plt.tight_layout()
-                    st.pyplot(fig)  
-                    
-
-               # Convertir la columna 'FechaPedidoServerN' a formato datetime
-                df['FechaPedidoServerN'] = pd.to_datetime(df['FechaPedidoServerN'], format='%d/%m/%Y')
-
-                # Crear una columna para el mes y año
-                df['Mes'] = df['FechaPedidoServerN'].dt.to_period('M')
-
-                # Mostrar una lista de productos y clientes disponibles en el sidebar
-                productos_disponibles = df['Descripcion'].unique()
-                clientes_disponibles = df['Cliente'].unique()
-
-                # Selección de producto y cliente
-                producto = st.sidebar.selectbox('Selecciona el Producto', options=productos_disponibles)
-                cliente = st.sidebar.selectbox('Selecciona el Cliente', options=clientes_disponibles)
-
-                # Análisis para el producto seleccionado
-                def analizar_producto(producto):
-                    # Agrupar por mes y producto, y sumar las ventas
-                    df_producto_mensual = df.groupby(['Descripcion', 'Mes'])['Total Vendido'].sum().reset_index()
-
-                    # Filtrar datos para el producto seleccionado
-                    df_producto = df_producto_mensual[df_producto_mensual['Descripcion'] == producto]
-
-                    # Verifica si hay suficientes datos
-                    if df_producto.shape[0] >= 12:  # Necesitamos al menos 12 meses de datos
-                        # Establecer 'Mes' como el índice
-                        df_producto.set_index('Mes', inplace=True)
-                        df_producto.index = df_producto.index.to_timestamp()
-                        
-                        # Verifica si hay suficientes datos para estacionalidad
-                        if len(df_producto) >= 24:
-                            # Usar estacionalidad solo si hay suficientes datos
-                            model = ExponentialSmoothing(df_producto['Total Vendido'], seasonal='add', seasonal_periods=12)
-                        else:
-                            # Usar un modelo sin estacionalidad si hay menos de 24 meses
-                            model = ExponentialSmoothing(df_producto['Total Vendido'], trend='add', seasonal=None)
-                        
-                        model_fit = model.fit()
-                        
-                        # Pronóstico
-                        forecast_steps = 12  # Proyección para los próximos 12 meses
-                        forecast_index = pd.date_range(start=df_producto.index[-1] + pd.DateOffset(months=1), periods=forecast_steps, freq='M')
-                        forecast = model_fit.forecast(steps=forecast_steps)
-                        
-                        # Crear una tabla pivotante
-                        df_pivot = df_producto.copy()
-                        df_pivot = df_pivot.reset_index()
-                        df_pivot = df_pivot.rename(columns={'Total Vendido': 'Ventas Actuales'})
-                        
-                        # Añadir proyección al DataFrame
-                        df_forecast = pd.DataFrame({'Mes': forecast_index, 'Proyección': forecast})
-                        df_pivot = pd.concat([df_pivot, df_forecast], ignore_index=True)
-                        df_pivot.set_index('Mes', inplace=True)
-                        
-                        # Mostrar la tabla pivotante en Streamlit
-                        st.write('**Proyecciones de Ventas por Mes**')
-                        st.dataframe(df_pivot, use_container_width=True)
-
-                        # Gráfico de las ventas actuales y la proyección
-                        fig, ax = plt.subplots(figsize=(12, 6))
-                        ax.plot(df_producto.index, df_producto['Total Vendido'], label='Ventas Actuales', marker='o')
-                        ax.plot(forecast_index, forecast, label='Proyección', marker='o', linestyle='--')
-                        ax.set_title(f'Proyección de Ventas para {producto}', fontsize=16)
-                        ax.set_xlabel('Fecha', fontsize=12)
-                        ax.set_ylabel('Total Vendido', fontsize=12)
-                        ax.legend()
-                        ax.grid(True)
-                        
-                        # Mostrar el gráfico en Streamlit
-                        st.pyplot(fig)
-                    else:
-                        st.error(f"No hay suficientes datos para el producto {producto} para realizar la proyección.")
-
-                # Análisis para el cliente seleccionado
-                def analizar_cliente(cliente):
-                    # Agrupar por mes y cliente, y sumar las ventas
-                    df_cliente_mensual = df.groupby(['Cliente', 'Mes'])['Total Vendido'].sum().reset_index()
-
-                    # Filtrar datos para el cliente seleccionado
-                    df_cliente = df_cliente_mensual[df_cliente_mensual['Cliente'] == cliente]
-
-                    # Verifica si hay suficientes datos
-                    if df_cliente.shape[0] >= 12:  # Necesitamos al menos 12 meses de datos
-                        # Establecer 'Mes' como el índice
-                        df_cliente.set_index('Mes', inplace=True)
-                        df_cliente.index = df_cliente.index.to_timestamp()
-                        
-                        # Verifica si hay suficientes datos para estacionalidad
-                        if len(df_cliente) >= 24:
-                            # Usar estacionalidad solo si hay suficientes datos
-                            model = ExponentialSmoothing(df_cliente['Total Vendido'], seasonal='add', seasonal_periods=12)
-                        else:
-                            # Usar un modelo sin estacionalidad si hay menos de 24 meses
-                            model = ExponentialSmoothing(df_cliente['Total Vendido'], trend='add', seasonal=None)
-                        
-                        model_fit = model.fit()
-                        
-                        # Pronóstico
-                        forecast_steps = 12  # Proyección para los próximos 12 meses
-                        forecast_index = pd.date_range(start=df_cliente.index[-1] + pd.DateOffset(months=1), periods=forecast_steps, freq='M')
-                        forecast = model_fit.forecast(steps=forecast_steps)
-                        
-                        # Crear una tabla pivotante
-                        df_pivot = df_cliente.copy()
-                        df_pivot = df_pivot.reset_index()
-                        df_pivot = df_pivot.rename(columns={'Total Vendido': 'Ventas Actuales'})
-                        
-                        # Añadir proyección al DataFrame
-                        df_forecast = pd.DataFrame({'Mes': forecast_index, 'Proyección': forecast})
-                        df_pivot = pd.concat([df_pivot, df_forecast], ignore_index=True)
-                        df_pivot.set_index('Mes', inplace=True)
-                        
-                        # Mostrar la tabla pivotante en Streamlit
-                        st.write('**Proyecciones de Ventas por Cliente**')
-                        st.dataframe(df_pivot, use_container_width=True)
-
-                        # Gráfico de las ventas actuales y la proyección
-                        fig, ax = plt.subplots(figsize=(12, 6))
-                        ax.plot(df_cliente.index, df_cliente['Total Vendido'], label='Ventas Actuales', marker='o')
-                        ax.plot(forecast_index, forecast, label='Proyección', marker='o', linestyle='--')
-                        ax.set_title(f'Proyección de Ventas para el Cliente {cliente}', fontsize=16)
-                        ax.set_xlabel('Fecha', fontsize=12)
-                        ax.set_ylabel('Total Vendido', fontsize=12)
-                        ax.legend()
-                        ax.grid(True)
-                        
-                        # Mostrar el gráfico en Streamlit
-                        st.pyplot(fig)
-                    else:
-                        st.error(f"No hay suficientes datos para el cliente {cliente} para realizar la proyección.")
-
-                # Llamar a las funciones de análisis
-                analizar_producto(producto)
-                analizar_cliente(cliente)            
-                                            
-
+                            st.warning("La columna 'Condicion Pago' no se encuentra en el archivo.")
+                            condicion_pago_seleccionada = 'Todas'
 
-                
-
-       
-
-                # Cargar FontAwesome
-                st.markdown('<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0-beta3/css/all.min.css">', unsafe_allow_html=True)
+                        # Filtrar por Cliente
+                        if 'Cliente' in df.columns:
+                            clientes = indice.valores('Cliente')
+                            cliente_seleccionado = st.sidebar.selectbox('Selecciona un Cliente', ['Todos'] + list(clientes))
+                        else:
+                            st.warning("La columna 'Cliente' no se encuentra en el archivo.")
+                            cliente_seleccionado = 'Todos'
 
-               
+                        # Filtrar por Vendedor
+                        if 'Vendedor' in df.columns:
+                            vendedores = indice.valores('Vendedor')
+                            vendedor_seleccionado = st.sidebar.selectbox('Selecciona un Vendedor', ['Todos'] + list(vendedores))
+                        else:
+                            st.warning("La columna 'Vendedor' no se encuentra en el archivo.")
+                            vendedor_seleccionado = 'Todos'
+
+                        # Aplicar filtros
+                        filtros_seleccion = filtros_mes + normalizar_filtros(condicion_pago=condicion_pago_seleccionada,
+                                                                             cliente=cliente_seleccionado,
+                                                                             vendedor=vendedor_seleccionado)
+                        df_filtrado = cache.obtener_o_calcular(
+                            (huella, filtros_seleccion, 'filas'),
+                            lambda: indice.filtrar(df, mes=mes_a_clave(mes_seleccionado),
+                                                   condicion_pago=condicion_pago_seleccionada,
+                                                   cliente=cliente_seleccionado, vendedor=vendedor_seleccionado))
+
+                        # Cubo con los mismos filtros, usado por el resto de las secciones
+                        cubo_seleccion = cache.obtener_o_calcular(
+                            (huella, filtros_seleccion, seccion_cubo),
+                            lambda: cubo_mes.filtrar(condicion_pago=condicion_pago_seleccionada,
+                                                     cliente=cliente_seleccionado, vendedor=vendedor_seleccionado))
+
+
+                        # Gráfico de Ventas por Condición de Pago
+                        def dibujar_condicion_pago():
+                            fig_condicion_pago, ax_condicion_pago = nueva_figura(figsize=(12, 6))
+                            df_condicion_pago = cubo_seleccion.totales('Condicion Pago')
+                            sns.barplot(x='Condicion Pago', y='Total Vendido', data=df_condicion_pago, order=df_condicion_pago['Condicion Pago'], ax=ax_condicion_pago, palette="coolwarm")
+                            ax_condicion_pago.set_title('Ventas Totales por Condición de Pago')
+                            ax_condicion_pago.set_xlabel('Condición de Pago')
+                            ax_condicion_pago.set_ylabel('Total Vendido')
+                            etiquetar_barras(ax_condicion_pago)
+                            return fig_condicion_pago
+                        if 'condicion_pago' in secciones:
+                            mostrar_grafico((huella, filtros_seleccion, 'grafico_condicion_pago'), dibujar_condicion_pago)
+
+
+
+
+
+                        # Proyección de ventas futuras con una media móvil simple de 3 meses, sobre todo el archivo
+                        if 'proyeccion' in secciones:
+                            st.subheader('Proyección de Ventas Mensuales')
+                            horizonte = st.slider('Meses a proyectar', min_value=1, max_value=24, value=HORIZONTE_PROYECCION)
+                            filtros_proyeccion = normalizar_filtros(horizonte=horizonte)
+                            try:
+                                # Verificar que las columnas necesarias están presentes
+                                validar_columnas_proyeccion(df)
+                            except ValueError as error:
+                                st.error(str(error))
+                            else:
+                                with medidor.etapa('proyeccion', len(cubo_base)):
+                                    ventas_mes, proyeccion = cache.obtener_o_calcular(
+                                        (huella, filtros_proyeccion, 'proyeccion'),
+                                        lambda: proyeccion_mensual(cubo_base, horizonte=horizonte))
+                                    # Tabla pivote de productos y cantidades por mes con la proyección de cada producto;
+                                    # la matriz completa es dispersa y solo los productos mostrados se pasan a una tabla densa
+                                    tabla_pivote = cache.obtener_o_calcular(
+                                        (huella, filtros_proyeccion, 'tabla_proyeccion'),
+                                        lambda: tabla_proyeccion(cubo_base, horizonte=horizonte, n=PRODUCTOS_PROYECCION))
+                                    num_productos = len(pivote_mensual(cubo_base))
+
+                                def dibujar_proyeccion():
+                                    fig_proyeccion, ax_proyeccion = nueva_figura(figsize=(12, 6))
+                                    ax_proyeccion.plot(ventas_mes.index.astype(str), ventas_mes.values, label='Ventas Históricas', marker='o')
+                                    ax_proyeccion.plot(proyeccion.index.astype(str), proyeccion.values, label='Proyección de Ventas', linestyle='--', marker='x')
+                                    ax_proyeccion.set_title('Proyección de Ventas Mensuales')
+                                    ax_proyeccion.set_xlabel('Mes')
+                                    ax_proyeccion.set_ylabel('Cantidad Vendida')
+                                    ax_proyeccion.legend()
+                                    ax_proyeccion.grid(True)
+                                    ax_proyeccion.tick_params(axis='x', rotation=45)
+                                    fig_proyeccion.tight_layout()
+                                    return fig_proyeccion
+                                mostrar_grafico((huella, filtros_proyeccion, 'grafico_proyeccion'), dibujar_proyeccion, filas=len(proyeccion))
+
+                                # Mostrar la tabla pivote de los productos con mayor proyección
+                                st.write(f'Productos con mayor proyección ({len(tabla_pivote)} de {num_productos})')
+                                st.dataframe(tabla_pivote, use_container_width=True)
+
+
+
+
+
+
+
+
+                        # --- Análisis ABC de Clientes, Productos y Vendedores ---
+
+                        if 'abc' in secciones:
+                            # Umbrales de la clasificación y número de puestos que se muestran
+                            with st.sidebar.expander('Análisis ABC'):
+                                umbral_a = st.slider('Porcentaje acumulado máximo de la clase A', 50, 95, 80)
+                                umbral_b = st.slider('Porcentaje acumulado máximo de la clase B', umbral_a, 99, max(95, umbral_a))
+                                top_abc = int(st.number_input('Puestos a mostrar', min_value=5, max_value=500, value=30, step=5))
+                            umbrales_abc = (umbral_a, umbral_b)
+
+                            # Cada dimensión se clasifica completa una sola vez por estado de filtros;
+                            # el gráfico de Pareto y la tabla muestran solo los primeros puestos
+                            for columna, etiqueta, plural in SECCIONES_ABC:
+                                with medidor.etapa(f'abc_{columna}', len(cubo_seleccion)):
+                                    resultado_abc = cache.obtener_o_calcular(
+                                        (huella, filtros_seleccion + normalizar_filtros(umbrales=umbrales_abc), f'abc_{columna}'),
+                                        lambda: analisis_abc(cubo_seleccion, columna, umbrales_abc))
+                                mostrar_analisis_abc(resultado_abc, etiqueta, f"Análisis ABC de los {top_abc} Mejores {plural}", top_abc,
+                                                     clave=(huella, filtros_seleccion + normalizar_filtros(umbrales=umbrales_abc, top=top_abc),
+                                                            f'grafico_abc_{columna}'))
+
+
+
+                        if 'estacional' in secciones:
+                            # Verificar si la columna 'FechaPedidoServerN' está en el DataFrame
+                            if 'FechaPedidoServerN' in df.columns:
+                                # Agrupar ventas por nombre de mes a partir de los totales mensuales del cubo
+                                with medidor.etapa('estacional', len(cubo_base)):
+                                    df_mes = ventas_estacionales(cubo_base)
+
+                                    st.subheader('Ventas Estacionales por Mes')
+                                    st.dataframe(df_mes, use_container_width=True)
+
+                                # Gráfico de barras para ventas por mes
+                                def dibujar_ventas_estacionales():
+                                    fig_mes, ax_mes = nueva_figura(figsize=(12, 6))
+                                    sns.barplot(x='Mes', y='Total Vendido', data=df_mes, ax=ax_mes, palette="summer")
+                                    ax_mes.set_title('Ventas Totales por Mes')
+                                    ax_mes.set_xlabel('Mes')
+                                    ax_mes.set_ylabel('Total Vendido')
+                                    ax_mes.tick_params(axis='x', rotation=45)
+
+                                    # Añadir etiquetas de monto en cada barra
+                                    etiquetar_barras(ax_mes)
+                                    return fig_mes
+                                mostrar_grafico((huella, (), 'grafico_ventas_estacionales'), dibujar_ventas_estacionales)
+                            else:
+                                st.warning("La columna 'FechaPedidoServerN' no se encuentra en el archivo.")
+
+                        if 'detalle' in secciones:
+                            # Los gráficos de detalle usan letra pequeña (ESTILO_DETALLE) sin cambiar la configuración global
+
+                            # 1. Ventas Mensuales por Vendedor (Heatmap)
+                            def dibujar_mapa_calor():
+                                # La matriz vendedor x mes es dispersa; solo los vendedores que se dibujan se pasan a densa
+                                num_vendedores = len(cubo_seleccion.matriz_dispersa('Vendedor', 'MesClave'))
+                                ventas_mensuales_vendedor = cubo_seleccion.matriz('Vendedor', 'MesClave', n=VENDEDORES_MAPA_CALOR)
+                                fig, ax = nueva_figura(figsize=(8, 8))
+                                sns.heatmap(ventas_mensuales_vendedor, cmap='YlGnBu', annot=anotar_celdas(ventas_mensuales_vendedor), fmt=".0f", linewidths=0.5, ax=ax)
+                                titulo = 'Ventas Mensuales por Vendedor'
+                                if len(ventas_mensuales_vendedor) < num_vendedores:
+                                    titulo += f' ({len(ventas_mensuales_vendedor)} principales de {num_vendedores})'
+                                ax.set_title(titulo, pad=20)
+                                ax.set_xlabel('Mes', labelpad=15)
+                                ax.set_ylabel('Vendedor', labelpad=15)
+                                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+                                plt.setp(ax.get_yticklabels(), rotation=0)
+                                fig.tight_layout()
+                                return fig
+                            mostrar_grafico((huella, filtros_seleccion, 'grafico_mapa_calor'), dibujar_mapa_calor, ESTILO_DETALLE)
+
+                            # 2. Participación de Mercado por Cliente (Pie Chart)
+                            ventas_por_cliente = cubo_seleccion.top('Cliente', 10)  # Top 10 Clientes
+
+                            def dibujar_participacion():
+                                fig_cliente, ax_cliente = nueva_figura(figsize=(8, 6))
+                                ax_cliente.pie(ventas_por_cliente['Total Vendido'], labels=ventas_por_cliente['Cliente'], autopct='%1.1f%%', startangle=140)
+                                ax_cliente.axis('equal')  # Para que el gráfico sea circular
+                                ax_cliente.set_title('Participación de Mercado - Top 10 Clientes', pad=20)
+                                fig_cliente.tight_layout()
+                                return fig_cliente
+                            mostrar_grafico((huella, filtros_seleccion, 'grafico_participacion'), dibujar_participacion, ESTILO_DETALLE)
+
+                            # 3. Distribución de Ventas por Vendedor (Violin Plot)
+                            def dibujar_violin():
+                                fig, ax = nueva_figura(figsize=(8, 6))
+                                # Con muchas filas las densidades se estiman sobre una muestra estratificada por vendedor
+                                muestra = muestra_estratificada(df_filtrado, 'Vendedor')
+                                sns.violinplot(x='Vendedor', y='Total Vendido', data=muestra, order=df_filtrado['Vendedor'].unique(), palette="muted", ax=ax)
+                                titulo = 'Distribución de Ventas por Vendedor'
+                                if len(muestra) < len(df_filtrado):
+                                    titulo += f' (muestra de {len(muestra):,} de {len(df_filtrado):,} filas)'
+                                ax.set_title(titulo, pad=20)
+                                ax.set_xlabel('Vendedor', labelpad=15)
+                                ax.set_ylabel('Total Vendido', labelpad=15)
+                                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+                                fig.tight_layout()
+                                return fig
+                            mostrar_grafico((huella, filtros_seleccion, 'grafico_violin'), dibujar_violin, ESTILO_DETALLE, len(df_filtrado))
+
+                            # 4. KPI - Promedio de Ventas por Cliente
+                            with medidor.etapa('indicador', len(cubo_seleccion)):
+                                promedio_ventas_cliente = cubo_seleccion.totales('Cliente')['Total Vendido'].mean()
+
+                                fig_gauge = go.Figure(go.Indicator(
+                                    mode="gauge+number",
+                                    value=promedio_ventas_cliente,
+                                    title={'text': "Promedio de Ventas por Cliente", 'font': {'size': 14}},
+                                    gauge={'axis': {'range': [None, df_filtrado['Total Vendido'].max()]},
+                                        'bar': {'color': "darkblue"},
+                                        'steps': [
+                                            {'range': [0, promedio_ventas_cliente/2], 'color': "lightgray"},
+                                            {'range': [promedio_ventas_cliente/2, promedio_ventas_cliente], 'color': "gray"}],
+                                        'threshold': {'line': {'color': "red", 'width': 4}, 'thickness': 0.75, 'value': promedio_ventas_cliente}}))
+
+                                st.plotly_chart(fig_gauge)
+
+                            # 5. Análisis de Descuentos (Boxplot)
+                            def dibujar_descuentos():
+                                fig, ax = nueva_figura(figsize=(8, 6))
+                                # Cuartiles y bigotes calculados con todas las filas; solo se dibujan algunos atípicos por vendedor
+                                graficar_cajas(ax, estadisticas_caja(df_filtrado, 'Vendedor', 'Descuento', df_filtrado['Vendedor'].unique()), 'Blues')
+                                ax.set_title('Distribución de Descuentos por Vendedor', pad=20)
+                                ax.set_xlabel('Vendedor', labelpad=15)
+                                ax.set_ylabel('Descuento', labelpad=15)
+                                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+                                fig.tight_layout()
+                                return fig
+                            mostrar_grafico((huella, filtros_seleccion, 'grafico_descuentos'), dibujar_descuentos, ESTILO_DETALLE, len(df_filtrado))
+
+                            # 6. Scatter Plot de Ventas por Unidad vs Precio
+                            def dibujar_cantidad_precio():
+                                fig, ax = nueva_figura(figsize=(8, 6))
+                                sns.scatterplot(x='Cantidad', y='Precio', size='Total Vendido', data=df_filtrado, hue='Cliente', hue_order=df_filtrado['Cliente'].unique(), palette='viridis', sizes=(20, 200), ax=ax)
+                                ax.set_title('Relación entre Cantidad Vendida y Precio', pad=20)
+                                ax.set_xlabel('Cantidad', labelpad=15)
+                                ax.set_ylabel('Precio', labelpad=15)
+                                ax.legend(bbox_to_anchor=(1, 1), loc='upper left')
+                                fig.tight_layout()
+                                return fig
+                            if interactivos:
+                                mostrar_grafico_interactivo(
+                                    (huella, filtros_seleccion, 'grafico_cantidad_precio'),
+                                    lambda: dispersion_interactiva(df_filtrado, 'Cantidad', 'Precio', color='Cliente',
+                                                                   tamano='Total Vendido',
+                                                                   titulo='Relación entre Cantidad Vendida y Precio'),
+                                    len(df_filtrado))
+                            else:
+                                mostrar_grafico((huella, filtros_seleccion, 'grafico_cantidad_precio'), dibujar_cantidad_precio, ESTILO_DETALLE, len(df_filtrado))
+
+                            # 7. Histograma de Frecuencia de Pedidos por Fecha
+                            def dibujar_histograma():
+                                fig, ax = nueva_figura(figsize=(8, 6))
+                                # Conteo por días con numpy, sin convertir cada fecha en un objeto de Python
+                                conteos, bordes = histograma_fechas(df_filtrado['FechaPedidoServerN'], bins=20)
+                                graficar_histograma(ax, conteos, bordes, color='blue')
+                                ax.set_title('Frecuencia de Pedidos por Fecha', pad=20)
+                                ax.set_xlabel('Fecha', labelpad=15)
+                                ax.set_ylabel('Número de Pedidos', labelpad=15)
+                                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+                                fig.tight_layout()
+                                return fig
+                            mostrar_grafico((huella, filtros_seleccion, 'grafico_histograma'), dibujar_histograma, ESTILO_DETALLE, len(df_filtrado))
+
+                            # 8. Bubble Chart de Ventas por Localidad
+                            df_localidad = cubo_seleccion.totales('Localidad Nombre', ['Total Vendido', 'Cantidad'])
+
+                            def dibujar_burbujas():
+                                fig, ax = nueva_figura(figsize=(8, 6))
+                                sns.scatterplot(x='Cantidad', y='Total Vendido', size='Total Vendido', data=df_localidad, hue='Localidad Nombre', hue_order=df_localidad['Localidad Nombre'], palette='coolwarm', sizes=(50, 500), ax=ax)
+                                ax.set_title('Ventas por Localidad', pad=20)
+                                ax.set_xlabel('Cantidad Vendida', labelpad=15)
+                                ax.set_ylabel('Total Vendido', labelpad=15)
+                                ax.legend(bbox_to_anchor=(1, 1), loc='upper left')
+                                fig.tight_layout()
+                                return fig
+                            mostrar_grafico((huella, filtros_seleccion, 'grafico_burbujas'), dibujar_burbujas, ESTILO_DETALLE)
+
+
+                    if 'pronosticos' in secciones:
+                        # Mostrar una lista de productos y clientes disponibles en el sidebar
+                        productos_disponibles = indice.valores('Descripcion')
+                        clientes_disponibles = indice.valores('Cliente')
+
+                        # Selección de producto y cliente
+                        producto = st.sidebar.selectbox('Selecciona el Producto', options=productos_disponibles)
+                        cliente = st.sidebar.selectbox('Selecciona el Cliente', options=clientes_disponibles)
+
+                        # Los modelos de todos los productos y clientes se ajustan en paralelo la primera vez
+                        with st.spinner('Calculando los pronósticos de todos los productos y clientes...'), medidor.etapa('pronosticos', len(cubo)):
+                            pronosticos_productos, contadores_productos = load_forecasts(huella, 'Descripcion', cubo)
+                            pronosticos_clientes, contadores_clientes = load_forecasts(huella, 'Cliente', cubo)
+                        for nombre, contadores in (('productos', contadores_productos), ('clientes', contadores_clientes)):
+                            if contadores is not None:
+                                st.sidebar.caption(f"Modelos de {nombre}: {contadores['reutilizados']} reutilizados, "
+                                                   f"{contadores['reajustados']} reajustados, {contadores['nuevos']} nuevos")
+
+                        # Análisis para el producto y el cliente seleccionados
+                        mostrar_pronostico(pronosticos_productos.get(producto), 'Descripcion', producto,
+                                           '**Proyecciones de Ventas por Mes**', f'Proyección de Ventas para {producto}',
+                                           f"No hay suficientes datos para el producto {producto} para realizar la proyección.",
+                                           clave=(huella, normalizar_filtros(producto=producto), 'grafico_pronostico'))
+                        mostrar_pronostico(pronosticos_clientes.get(cliente), 'Cliente', cliente,
+                                           '**Proyecciones de Ventas por Cliente**', f'Proyección de Ventas para el Cliente {cliente}',
+                                           f"No hay suficientes datos para el cliente {cliente} para realizar la proyección.",
+                                           clave=(huella, normalizar_filtros(cliente=cliente), 'grafico_pronostico'))
+
+
+
+
+
+
+
+                    # Cargar FontAwesome
+                    st.markdown('<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0-beta3/css/all.min.css">', unsafe_allow_html=True)
+
+
+
+                    # Título para la sección final
+                    st.markdown("<h1 style='text-align: center; color: #fffa65;'>QUIÉN SOY?</h1>", unsafe_allow_html=True)
+
+
+                    # Mostrar la foto centrada
+                    st.markdown("""
+                        <div style="text-align: center;">
+                            <img src="https://raw.githubusercontent.com/JUANCITOPENA/ANALISIS_AUTOMATIZADO_PYTHON/main/JuancitoFoto.png" 
+                                alt="Foto de Juancito Peña" 
+                                style="width: 200px; height: auto; border-radius: 50%;">
+                        </div>
+                    """, unsafe_allow_html=True)
+
+                   # Texto de presentación con estilo personalizado
+                    st.markdown("""
+                       <p style='font-size: 25px; color: #ecf0f1; text-align: justify;'>
+                        Mi nombre es <strong>Juancito Peña V</strong>, soy <strong>ingeniero en Sistemas y Computación</strong> 💻, con una Especialidad en <strong>Desarrollo de Software</strong> 🖥️, y una Maestría en <strong>Sistemas Mención Gerencial</strong> 🎓. 
+                        Actualmente estoy cursando una Maestría en <strong>Ciencia de Datos para Negocios</strong> 📊 (Big Data & Business Analytics). 
+                        He realizado varios cursos y certificaciones, soy un amante de la <strong>Tecnología</strong> 🚀, de los <strong>Datos</strong> 📈 y de la <strong>Programación</strong> 👨‍💻. 
+                        Creo en el poder de la tecnología para aportar valor a las personas, a las empresas y a la educación 🎓.
+                        </p>
+                        <p style='font-size: 25px; color: #ecf0f1; text-align: justify;'>
+                        Mis Habilidades van desde Uso con en <strong>SQL</strong> 💾, <strong>Power BI</strong> 📊 y <strong>Python</strong> 🐍 | <strong>Desarrollo de Software</strong> (HTML, CSS, JS, REACT, PHP, C#) 💻, SQL | <strong>Soy Instructor de Grado Universitario</strong> 👨‍🏫, <strong>Padre</strong> 👨‍👩‍👧‍👦 y <strong>Amigo</strong> 🤝.
+                       </p>
+                    </p>
+                    """, unsafe_allow_html=True)
 
-                # Título para la sección final
-                st.markdown("<h1 style='text-align: center; color: #fffa65;'>QUIÉN SOY?</h1>", unsafe_allow_html=True)
 
 
-                # Mostrar la foto centrada
-                st.markdown("""
+                   # Iconos de redes sociales en línea horizontal
+                    st.markdown("""
                     <div style="text-align: center;">
-                        <img src="https://raw.githubusercontent.com/JUANCITOPENA/ANALISIS_AUTOMATIZADO_PYTHON/main/JuancitoFoto.png" 
-                            alt="Foto de Juancito Peña" 
-                            style="width: 200px; height: auto; border-radius: 50%;">
+                        <a href="https://www.linkedin.com/in/tu-perfil" target="_blank" style="text-decoration: none; color: #fff200; margin: 0 10px;">
+                            <i class="fab fa-linkedin" style="font-size: 48px;"></i>
+                        </a>
+                        <a href="https://www.youtube.com/channel/tu-canal" target="_blank" style="text-decoration: none; color: #fff200; margin: 0 10px;">
+                            <i class="fab fa-youtube" style="font-size: 48px;"></i>
+                        </a>
+                        <a href="https://github.com/tu-perfil" target="_blank" style="text-decoration: none; color: #fff200; margin: 0 10px;">
+                            <i class="fab fa-github" style="font-size: 48px;"></i>
+                        </a>
+                        <a href="https://twitter.com/tu-perfil" target="_blank" style="text-decoration: none; color: #fff200; margin: 0 10px;">
+                            <i class="fab fa-twitter" style="font-size: 48px;"></i>
+                        </a>
+                        <a href="https://www.facebook.com/tu-perfil" target="_blank" style="text-decoration: none; color: #fff200; margin: 0 10px;">
+                            <i class="fab fa-facebook" style="font-size: 48px;"></i>
+                        </a>
+                        <a href="https://www.instagram.com/tu-perfil" target="_blank" style="text-decoration: none; color: #fff200; margin: 0 10px;">
+                            <i class="fab fa-instagram" style="font-size: 48px;"></i>
+                        </a>
                     </div>
-                """, unsafe_allow_html=True)
-                
-               # Texto de presentación con estilo personalizado
-                st.markdown("""
-                   <p style='font-size: 25px; color: #ecf0f1; text-align: justify;'>
-                    Mi nombre es <strong>Juancito Peña V</strong>, soy <strong>ingeniero en Sistemas y Computación</strong> 💻, con una Especialidad en <strong>Desarrollo de Software</strong> 🖥️, y una Maestría en <strong>Sistemas Mención Gerencial</strong> 🎓. 
-                    Actualmente estoy cursando una Maestría en <strong>Ciencia de Datos para Negocios</strong> 📊 (Big Data & Business Analytics). 
-                    He realizado varios cursos y certificaciones, soy un amante de la <strong>Tecnología</strong> 🚀, de los <strong>Datos</strong> 📈 y de la <strong>Programación</strong> 👨‍💻. 
-                    Creo en el poder de la tecnología para aportar valor a las personas, a las empresas y a la educación 🎓.
-                    </p>
-                    <p style='font-size: 25px; color: #ecf0f1; text-align: justify;'>
-                    Mis Habilidades van desde Uso con en <strong>SQL</strong> 💾, <strong>Power BI</strong> 📊 y <strong>Python</strong> 🐍 | <strong>Desarrollo de Software</strong> (HTML, CSS, JS, REACT, PHP, C#) 💻, SQL | <strong>Soy Instructor de Grado Universitario</strong> 👨‍🏫, <strong>Padre</strong> 👨‍👩‍👧‍👦 y <strong>Amigo</strong> 🤝.
-                   </p>
-                </p>
-                """, unsafe_allow_html=True)
-
-
-
-               # Iconos de redes sociales en línea horizontal
-                st.markdown("""
-                <div style="text-align: center;">
-                    <a href="https://www.linkedin.com/in/tu-perfil" target="_blank" style="text-decoration: none; color: #fff200; margin: 0 10px;">
-                        <i class="fab fa-linkedin" style="font-size: 48px;"></i>
-                    </a>
-                    <a href="https://www.youtube.com/channel/tu-canal" target="_blank" style="text-decoration: none; color: #fff200; margin: 0 10px;">
-                        <i class="fab fa-youtube" style="font-size: 48px;"></i>
-                    </a>
-                    <a href="https://github.com/tu-perfil" target="_blank" style="text-decoration: none; color: #fff200; margin: 0 10px;">
-                        <i class="fab fa-github" style="font-size: 48px;"></i>
-                    </a>
-                    <a href="https://twitter.com/tu-perfil" target="_blank" style="text-decoration: none; color: #fff200; margin: 0 10px;">
-                        <i class="fab fa-twitter" style="font-size: 48px;"></i>
-                    </a>
-                    <a href="https://www.facebook.com/tu-perfil" target="_blank" style="text-decoration: none; color: #fff200; margin: 0 10px;">
-                        <i class="fab fa-facebook" style="font-size: 48px;"></i>
-                    </a>
-                    <a href="https://www.instagram.com/tu-perfil" target="_blank" style="text-decoration: none; color: #fff200; margin: 0 10px;">
-                        <i class="fab fa-instagram" style="font-size: 48px;"></i>
-                    </a>
-                </div>
-                """, unsafe_allow_html=True)
-
-
-               # Mensaje de contacto con estilo personalizado
-                st.markdown("""
-                    <p style='font-size: 25px; color: #ecf0f1; text-align: center; margin-top: 20px;'>
-                    Si te interesa este Reporte y tenerlo en tus proyectos, contáctame al: 
-                    <a href="mailto:juancito.pena@gmail.com" style='color: #1f77b4;'>juancito.pena@gmail.com</a>. Acordemos un precio.
-                    </p>
-                """, unsafe_allow_html=True)
+                    """, unsafe_allow_html=True)
+
+
+                   # Mensaje de contacto con estilo personalizado
+                    st.markdown("""
+                        <p style='font-size: 25px; color: #ecf0f1; text-align: center; margin-top: 20px;'>
+                        Si te interesa este Reporte y tenerlo en tus proyectos, contáctame al: 
+                        <a href="mailto:juancito.pena@gmail.com" style='color: #1f77b4;'>juancito.pena@gmail.com</a>. Acordemos un precio.
+                        </p>
+                    """, unsafe_allow_html=True)
+
+    if (uploaded_file is None and particiones is None) or modo_streaming or modo_incremental:
+        # Sin archivo cargado la sesión deja de retener su conjunto de datos en el registro
+        obtener_registro().liberar(id_sesion())
+
+    # Tiempos de cada sección de esta recarga
+    if medidor.registros:
+        if mostrar_tiempos:
+            tiempos = pd.DataFrame(medidor.registros)[['etapa', 'segundos', 'filas', 'delta_mb']]
+            panel_tiempos.dataframe(tiempos.sort_values('segundos', ascending=False), hide_index=True, use_container_width=True)
+            panel_tiempos.write(f"Total: {medidor.total_segundos():,.2f} s")
+        if RUTA_MEDICIONES:
+            try:
+                medidor.guardar(RUTA_MEDICIONES, recarga=uuid.uuid4().hex[:12], archivo=getattr(uploaded_file, 'name', ruta_servidor))
+            except OSError as error:
+                st.sidebar.warning(f"No se pudo escribir el registro de tiempos: {error}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+"""Funciones de cálculo del reporte de ventas, independientes de la interfaz de Streamlit."""
+
+from analisis_ventas.ingesta import leer_ventas, normalizar_ventas
@@ -0,0 +1,87 @@
+"""Clasificación ABC (Pareto) vectorizada para clientes, productos y vendedores."""
+
+import numpy as np
+import pandas as pd
+
+from analisis_ventas.ingesta import compactar_etiquetas
+
+
+# Porcentajes acumulados que separan las clases: A hasta 80 %, B hasta 95 %, C el resto
+UMBRALES_ABC = (80, 95)
+CLASES_ABC = ('A', 'B', 'C')
+
+# Colores de cada clase para la tabla y el gráfico de Pareto (fondo, texto)
+COLORES_ABC = {
+    'A': ('#00FF00', '#000000'),  # Verde con texto negro
+    'B': ('#FFFF00', '#000000'),  # Amarillo con texto negro
+    'C': ('#FF0000', '#FFFFFF'),  # Rojo con texto blanco
+}
+
+
+class ResultadoABC:
+    # Clasificación de todas las entidades de una dimensión, ordenadas de mayor a
+    # menor venta, y un resumen por clase. `top(n)` devuelve la parte que se muestra.
+
+    def __init__(self, columna, tabla, resumen):
+        self.columna = columna
+        self.tabla = tabla
+        self.resumen = resumen
+
+    def __len__(self):
+        return len(self.tabla)
+
+    # Función para obtener las n primeras filas de la clasificación, con solo sus etiquetas
+    def top(self, n=30):
+        return compactar_etiquetas(self.tabla.head(n))
+
+
+# Función para clasificar en A, B y C todas las entidades a partir de sus totales de venta.
+# `totales` es una Serie (índice = entidad) o un DataFrame con la columna de la dimensión y la medida.
+def clasificar_abc(totales, columna=None, medida='Total Vendido', umbrales=UMBRALES_ABC, clases=CLASES_ABC):
+    if isinstance(totales, pd.DataFrame):
+        columna = columna or totales.columns[0]
+        etiquetas = totales[columna].array
+        valores = totales[medida].to_numpy(dtype='float64')
+    else:
+        columna = columna or totales.index.name
+        etiquetas = totales.index.array
+        valores = totales.to_numpy(dtype='float64')
+    if len(umbrales) != len(clases) - 1:
+        raise ValueError('Debe haber un umbral menos que clases.')
+
+    # Orden descendente estable (igual que nlargest con keep='first')
+    orden = np.argsort(-valores, kind='stable')
+    valores = valores[orden]
+    acumulado = np.cumsum(valores)
+    total = acumulado[-1] if len(acumulado) else 0.0
+    porcentaje = 100 * acumulado / total if total else np.zeros_like(acumulado)
+    # Un porcentaje igual al umbral queda en la clase inferior (p. ej. 80 % es A)
+    codigos = np.searchsorted(np.asarray(umbrales, dtype='float64'), porcentaje, side='left')
+
+    tabla = pd.DataFrame({
+        # Con categorías se reordenan los códigos; los textos quedan en el diccionario compartido
+        columna: etiquetas.take(orden),
+        medida: valores,
+        'Total Acumulado': acumulado,
+        'Porcentaje Acumulado': porcentaje,
+        'Clasificación ABC': pd.Categorical.from_codes(codigos, categories=list(clases)),
+    })
+
+    conteos = np.bincount(codigos, minlength=len(clases))
+    ventas = np.bincount(codigos, weights=valores, minlength=len(clases))
+    resumen = pd.DataFrame({
+        'Clasificación ABC': list(clases),
+        'Cantidad': conteos,
+        'Porcentaje de Entidades': 100 * conteos / max(len(valores), 1),
+        medida: ventas,
+        'Porcentaje de Ventas': 100 * ventas / total if total else np.zeros(len(clases)),
+    })
+    return ResultadoABC(columna, tabla, resumen)
+
+
+# Función de estilo para resaltar la clasificación ABC en las tablas de Streamlit
+def color_abc(val):
+    if val not in COLORES_ABC:
+        return ''
+    fondo, texto = COLORES_ABC[val]
+    return f'background-color: {fondo}; color: {texto};'
@@ -0,0 +1,82 @@
+"""Agregación por bloques de archivos CSV que no caben en memoria."""
+
+import pandas as pd
+
+from analisis_ventas.ingesta import ESQUEMA_CSV, COLUMNA_FECHA, COLUMNA_MES, normalizar_ventas
+
+
+# Dimensiones para las que se guardan sumas y conteos parciales
+DIMENSIONES = ['Cliente', 'Vendedor', 'Descripcion', 'Localidad Nombre', 'Condicion Pago']
+MEDIDAS = ['Cantidad', 'Total Vendido']
+
+TAMANO_BLOQUE = 500_000
+
+
+class AgregadosVentas:
+    # Sumas de Cantidad y Total Vendido, y número de líneas, por dimensión, día y mes.
+    # Solo se guardan los totales por clave: la memoria depende del número de
+    # clientes, productos, días, etc., no del número de filas del archivo.
+    # Con `pedidos=False` no se guardan los números de pedido: quien agrega los bloques
+    # lleva la cuenta en `num_pedidos` (p. ej. el historial, que los guarda por mes).
+
+    def __init__(self, pedidos=True):
+        self.tablas = {}
+        self.pedidos = pd.Index([], dtype=object) if pedidos else None
+        self.num_pedidos = 0
+        self.filas = 0
+
+    # Función para sumar un bloque de filas normalizadas a los totales acumulados
+    def agregar_bloque(self, bloque):
+        self.filas += len(bloque)
+        medidas = [m for m in MEDIDAS if m in bloque.columns]
+        claves = [d for d in DIMENSIONES if d in bloque.columns] + [COLUMNA_FECHA, COLUMNA_MES]
+        for clave in claves:
+            if clave not in bloque.columns:
+                continue
+            grupos = bloque.groupby(clave, observed=True)
+            parcial = grupos[medidas].sum().astype('float64')
+            parcial['Lineas'] = grupos.size()
+            if clave in DIMENSIONES:
+                # Las categorías cambian de un bloque a otro: se combinan por etiqueta
+                parcial.index = pd.Index(parcial.index.astype(object), name=clave)
+            self._combinar(clave, parcial)
+        if self.pedidos is not None and 'NoPedidoStr' in bloque.columns:
+            self.pedidos = self.pedidos.union(pd.Index(bloque['NoPedidoStr'].unique(), dtype=object))
+            self.num_pedidos = len(self.pedidos)
+
+    def _combinar(self, clave, parcial):
+        acumulado = self.tablas.get(clave)
+        if acumulado is None:
+            self.tablas[clave] = parcial
+        else:
+            self.tablas[clave] = pd.concat([acumulado, parcial]).groupby(level=0).sum()
+
+    # Función para obtener los totales de una dimensión ordenados de mayor a menor venta
+    def totales_por(self, clave):
+        tabla = self.tablas.get(clave)
+        if tabla is None:
+            return pd.DataFrame(columns=MEDIDAS + ['Lineas'])
+        if clave in (COLUMNA_FECHA, COLUMNA_MES):
+            return tabla.sort_index()
+        return tabla.sort_values('Total Vendido', ascending=False)
+
+    # Función para calcular los KPIs del resumen a partir de los totales
+    def kpis(self):
+        por_vendedor = self.totales_por('Vendedor')
+        por_mes = self.totales_por(COLUMNA_MES)
+        return {
+            'num_vendedores': len(por_vendedor),
+            'num_pedidos': self.num_pedidos,
+            'num_clientes': len(self.totales_por('Cliente')),
+            'num_productos': len(self.totales_por('Descripcion')),
+            'total_cantidad': por_mes['Cantidad'].sum() if 'Cantidad' in por_mes else 0,
+            'total_monto_vendido': por_mes['Total Vendido'].sum() if 'Total Vendido' in por_mes else 0,
+        }
+
+
+# Función para recorrer un CSV por bloques y devolver solo los totales agregados
+def agregar_csv_por_bloques(archivo, tamano_bloque=TAMANO_BLOQUE):
+    agregados = AgregadosVentas()
+    for bloque in pd.read_csv(archivo, dtype=ESQUEMA_CSV, chunksize=tamano_bloque):
+        agregados.agregar_bloque(normalizar_ventas(bloque))
+    return agregados
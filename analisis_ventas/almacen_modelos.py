@@ -0,0 +1,164 @@
+"""Almacén en disco (SQLite) de los modelos de pronóstico ajustados, con reajuste incremental."""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+from analisis_ventas.pronosticos import (PASOS_PRONOSTICO, MESES_MINIMOS, indice_pronostico, meses_con_ventas,
+                                         pronosticar_lote)
+
+
+RUTA_ALMACEN = os.environ.get('ANALISIS_MODELOS',
+                              os.path.join(os.path.expanduser('~'), '.analisis_ventas', 'modelos.sqlite'))
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS modelos (
+    dimension TEXT NOT NULL,
+    entidad TEXT NOT NULL,
+    huella_serie TEXT NOT NULL,
+    pasos INTEGER NOT NULL,
+    modelo TEXT NOT NULL,
+    parametros TEXT NOT NULL,
+    ultimo_mes TEXT NOT NULL,
+    pronostico TEXT NOT NULL,
+    actualizado TEXT NOT NULL,
+    PRIMARY KEY (dimension, entidad)
+)
+"""
+
+
+class AlmacenModelos:
+    # Guarda por (dimensión, entidad) la huella de la serie mensual con la que se ajustó
+    # el modelo, sus parámetros y el pronóstico. Una serie con la misma huella no se
+    # vuelve a ajustar; una serie que cambió se reajusta partiendo de los parámetros guardados.
+
+    def __init__(self, ruta=RUTA_ALMACEN):
+        self.ruta = ruta
+        carpeta = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(carpeta, exist_ok=True)
+        with self._conectar() as conexion:
+            conexion.execute(ESQUEMA)
+
+    def _conectar(self):
+        # Una conexión por operación: Streamlit atiende cada sesión en su propio hilo
+        return sqlite3.connect(self.ruta, timeout=30)
+
+    # Función para leer los modelos guardados de una dimensión: {entidad: registro}
+    def leer(self, dimension, entidades=None):
+        with self._conectar() as conexion:
+            filas = conexion.execute(
+                'SELECT entidad, huella_serie, pasos, modelo, parametros, ultimo_mes, pronostico '
+                'FROM modelos WHERE dimension = ?', (dimension,)).fetchall()
+        buscadas = None if entidades is None else set(map(str, entidades))
+        registros = {}
+        for entidad, huella, pasos, modelo, parametros, ultimo_mes, pronostico in filas:
+            if buscadas is not None and entidad not in buscadas:
+                continue
+            registros[entidad] = {
+                'huella_serie': huella,
+                'pasos': pasos,
+                'modelo': modelo,
+                'parametros': json.loads(parametros),
+                'ultimo_mes': ultimo_mes,
+                'pronostico': json.loads(pronostico),
+            }
+        return registros
+
+    # Función para guardar o reemplazar los modelos ajustados de una dimensión
+    def guardar(self, dimension, pronosticos, huellas):
+        ahora = datetime.now().isoformat(timespec='seconds')
+        filas = [
+            (dimension, str(entidad), huellas[entidad], len(p['pronostico']), p['modelo'],
+             json.dumps(p['parametros']), p['historia'].index[-1].strftime('%Y-%m-%d'),
+             json.dumps([float(v) for v in p['pronostico']]), ahora)
+            for entidad, p in pronosticos.items()
+        ]
+        with self._conectar() as conexion:
+            conexion.executemany('INSERT OR REPLACE INTO modelos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', filas)
+
+    def borrar(self, dimension=None):
+        with self._conectar() as conexion:
+            if dimension is None:
+                conexion.execute('DELETE FROM modelos')
+            else:
+                conexion.execute('DELETE FROM modelos WHERE dimension = ?', (dimension,))
+
+
+# Función para calcular la huella de una serie mensual (meses y valores)
+def huella_serie(serie):
+    resumen = hashlib.blake2b(digest_size=16)
+    resumen.update(serie.index.asi8.tobytes())
+    resumen.update(np.ascontiguousarray(serie.to_numpy(dtype='float64')).tobytes())
+    return resumen.hexdigest()
+
+
+# Función para pronosticar todas las series usando el almacén:
+# - misma huella: se reutiliza el pronóstico guardado sin ajustar;
+# - huella distinta: se reajusta arrancando desde los parámetros guardados;
+# - entidad nueva: ajuste completo.
+# Devuelve (pronósticos, contadores).
+def pronosticar_con_almacen(series, dimension, almacen, pasos=PASOS_PRONOSTICO, procesos=None):
+    series = {entidad: serie for entidad, serie in series.items() if meses_con_ventas(serie) >= MESES_MINIMOS}
+    huellas = {entidad: huella_serie(serie) for entidad, serie in series.items()}
+    guardados = almacen.leer(dimension, series.keys())
+
+    pronosticos = {}
+    pendientes = {}
+    iniciales = {}
+    for entidad, serie in series.items():
+        registro = guardados.get(str(entidad))
+        if registro is not None and registro['huella_serie'] == huellas[entidad] and registro['pasos'] == pasos:
+            pronosticos[entidad] = {
+                'modelo': registro['modelo'],
+                'parametros': registro['parametros'],
+                'historia': serie,
+                'indice': indice_pronostico(registro['ultimo_mes'], pasos),
+                'pronostico': np.asarray(registro['pronostico'], dtype='float64'),
+            }
+            continue
+        pendientes[entidad] = serie
+        if registro is not None:
+            iniciales[entidad] = registro
+
+    ajustados = pronosticar_lote(pendientes, pasos, procesos, iniciales)
+    almacen.guardar(dimension, ajustados, huellas)
+    pronosticos.update(ajustados)
+    contadores = {
+        'reutilizados': len(series) - len(pendientes),
+        'reajustados': len(iniciales),
+        'nuevos': len(pendientes) - len(iniciales),
+    }
+    return pronosticos, contadores
+
+
+# Uso nocturno: python -m analisis_ventas.almacen_modelos ventas.csv [--almacen ruta.sqlite]
+def main(argumentos=None):
+    from analisis_ventas.cache_columnar import leer_ventas_con_copia
+    from analisis_ventas.cubo import CuboVentas
+    from analisis_ventas.pronosticos import series_mensuales
+
+    parser = argparse.ArgumentParser(description='Actualiza el almacén de modelos de pronóstico de productos y clientes.')
+    parser.add_argument('archivo', help='Archivo de ventas (CSV o XLSX)')
+    parser.add_argument('--almacen', default=RUTA_ALMACEN, help='Ruta del archivo SQLite del almacén')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos para los ajustes (por defecto, todos los núcleos)')
+    parser.add_argument('--reajustar-todo', action='store_true', help='Descarta los modelos guardados y ajusta todas las series')
+    argumentos = parser.parse_args(argumentos)
+
+    cubo = CuboVentas.desde_ventas(leer_ventas_con_copia(argumentos.archivo))
+    almacen = AlmacenModelos(argumentos.almacen)
+    if argumentos.reajustar_todo:
+        almacen.borrar()
+    for dimension in ('Descripcion', 'Cliente'):
+        _, contadores = pronosticar_con_almacen(series_mensuales(cubo, dimension), dimension, almacen,
+                                                procesos=argumentos.procesos)
+        print(f"{dimension}: {contadores['reutilizados']} reutilizados, "
+              f"{contadores['reajustados']} reajustados, {contadores['nuevos']} nuevos")
+
+
+if __name__ == '__main__':
+    main()
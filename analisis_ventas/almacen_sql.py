@@ -0,0 +1,313 @@
+"""Motor de cálculo alternativo: las ventas en una base embebida (DuckDB si está instalado, si no SQLite) y las consultas del tablero en SQL."""
+
+import argparse
+import os
+import re
+import sqlite3
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from analisis_ventas.ingesta import COLUMNA_FECHA, COLUMNA_MES, ESQUEMA_CSV, normalizar_ventas, resolver_filtros
+from analisis_ventas.matrices import matriz_desde_totales
+
+try:
+    import duckdb
+    DUCKDB_DISPONIBLE = True
+except ImportError:
+    DUCKDB_DISPONIBLE = False
+
+
+MOTOR_SQL = 'duckdb' if DUCKDB_DISPONIBLE else 'sqlite'
+
+# Archivo de la base; sin la variable ANALISIS_SQL se usa ~/.analisis_ventas/ventas.duckdb (o .sqlite)
+RUTA_SQL = os.environ.get('ANALISIS_SQL')
+
+# Columnas que se guardan en la base. La fecha se guarda como día (AAAA-MM-DD), igual que en el cubo.
+DIMENSIONES_SQL = ['Cliente', 'Vendedor', 'Descripcion', 'Localidad Nombre', 'Condicion Pago']
+MEDIDAS_SQL = ['Cantidad', 'Total Vendido', 'Descuento']
+COLUMNAS_SQL = DIMENSIONES_SQL + MEDIDAS_SQL + ['NoPedidoStr', COLUMNA_FECHA, COLUMNA_MES]
+
+FILAS_POR_INSERCION = 50_000
+
+
+# Función para escribir un nombre de columna entre comillas dobles (admite espacios)
+def _columna(nombre):
+    return '"' + nombre.replace('"', '""') + '"'
+
+
+class AlmacenSQL:
+    # Base embebida con una tabla de filas de venta por archivo (ventas_<huella>). Cada archivo
+    # se carga una sola vez y la tabla la comparten todas las sesiones y procesos; las consultas
+    # se hacen con ConsultaSQL. Con DuckDB las consultas usan ejecución columnar en varios hilos.
+
+    def __init__(self, ruta=None, motor=MOTOR_SQL):
+        if motor not in ('duckdb', 'sqlite'):
+            raise ValueError(f"Motor SQL no soportado: {motor}")
+        if motor == 'duckdb' and not DUCKDB_DISPONIBLE:
+            raise ValueError("El motor DuckDB no está instalado (pip install duckdb).")
+        self.motor = motor
+        self.ruta = ruta or RUTA_SQL or os.path.join(os.path.expanduser('~'), '.analisis_ventas', f'ventas.{motor}')
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+
+    def _conectar(self):
+        # Una conexión por operación: Streamlit atiende cada sesión en su propio hilo
+        if self.motor == 'duckdb':
+            return duckdb.connect(self.ruta)
+        return sqlite3.connect(self.ruta, timeout=30)
+
+    # Función para ejecutar una consulta y devolver el resultado como DataFrame
+    def consultar(self, sql, parametros=()):
+        conexion = self._conectar()
+        try:
+            if self.motor == 'duckdb':
+                return conexion.execute(sql, list(parametros)).df()
+            return pd.read_sql_query(sql, conexion, params=list(parametros))
+        finally:
+            conexion.close()
+
+    # Función para escribir en la consulta un parámetro de fecha (AAAA-MM-DD)
+    def parametro_fecha(self):
+        return 'CAST(? AS DATE)' if self.motor == 'duckdb' else '?'
+
+    def existe(self, huella):
+        tabla = nombre_tabla(huella)
+        if self.motor == 'duckdb':
+            sql = 'SELECT COUNT(*) AS n FROM information_schema.tables WHERE table_name = ?'
+        else:
+            sql = "SELECT COUNT(*) AS n FROM sqlite_master WHERE type = 'table' AND name = ?"
+        return int(self.consultar(sql, (tabla,))['n'].iloc[0]) > 0
+
+    # Función para cargar las ventas de un archivo (un DataFrame normalizado o una secuencia de
+    # bloques normalizados, para archivos que no caben en memoria) y devolver su consulta.
+    # Si la tabla de esa huella ya existe no se vuelve a cargar.
+    def cargar(self, datos, huella):
+        tabla = nombre_tabla(huella)
+        if self.existe(huella):
+            return ConsultaSQL(self, tabla)
+        bloques = [datos] if isinstance(datos, pd.DataFrame) else datos
+        # Se carga en una tabla temporal y se renombra al final: otra sesión nunca ve una carga a medias
+        temporal = f'{tabla}_{uuid.uuid4().hex[:8]}'
+        conexion = self._conectar()
+        try:
+            numero = -1
+            for numero, bloque in enumerate(bloques):
+                self._insertar(conexion, temporal, _preparar_bloque(bloque), numero == 0)
+            if numero < 0:
+                raise ValueError("No hay ventas que cargar en la base.")
+            if self.motor == 'sqlite':
+                conexion.execute(f'CREATE INDEX {temporal}_fecha ON {temporal} ({_columna(COLUMNA_FECHA)})')
+            try:
+                conexion.execute(f'ALTER TABLE {temporal} RENAME TO {tabla}')
+            except Exception:
+                # Otra sesión terminó antes la carga del mismo archivo
+                conexion.execute(f'DROP TABLE IF EXISTS {temporal}')
+            if self.motor == 'sqlite':
+                conexion.commit()
+        finally:
+            conexion.close()
+        return ConsultaSQL(self, tabla)
+
+    # Función para obtener la consulta de un archivo ya cargado (None si no está en la base)
+    def consulta(self, huella):
+        return ConsultaSQL(self, nombre_tabla(huella)) if self.existe(huella) else None
+
+    def _insertar(self, conexion, tabla, bloque, crear):
+        if self.motor == 'duckdb':
+            conexion.register('bloque_ventas', bloque)
+            seleccion = f'SELECT * REPLACE (CAST({_columna(COLUMNA_FECHA)} AS DATE) AS {_columna(COLUMNA_FECHA)}) FROM bloque_ventas'
+            conexion.execute(f'CREATE TABLE {tabla} AS {seleccion}' if crear else f'INSERT INTO {tabla} {seleccion}')
+            conexion.unregister('bloque_ventas')
+        else:
+            bloque.to_sql(tabla, conexion, if_exists='replace' if crear else 'append', index=False,
+                          chunksize=FILAS_POR_INSERCION)
+
+    # Función para borrar la tabla de un archivo (o todas las tablas de ventas)
+    def borrar(self, huella=None):
+        if huella is not None:
+            tablas = [nombre_tabla(huella)]
+        elif self.motor == 'duckdb':
+            tablas = list(self.consultar("SELECT table_name FROM information_schema.tables WHERE table_name LIKE 'ventas_%'")['table_name'])
+        else:
+            tablas = list(self.consultar("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'ventas_%'")['name'])
+        conexion = self._conectar()
+        try:
+            for tabla in tablas:
+                conexion.execute(f'DROP TABLE IF EXISTS {tabla}')
+            if self.motor == 'sqlite':
+                conexion.commit()
+        finally:
+            conexion.close()
+
+
+# Función para el nombre de la tabla de un archivo a partir de su huella
+def nombre_tabla(huella):
+    if not re.fullmatch(r'[0-9a-f]+', str(huella)):
+        raise ValueError(f"Huella de archivo no válida: {huella}")
+    return f'ventas_{huella}'
+
+
+# Función para dejar un bloque normalizado con las columnas de la base: textos, números y el día como AAAA-MM-DD
+def _preparar_bloque(bloque):
+    columnas = [columna for columna in COLUMNAS_SQL if columna in bloque.columns]
+    preparado = pd.DataFrame(index=pd.RangeIndex(len(bloque)))
+    for columna in columnas:
+        valores = bloque[columna]
+        if columna == COLUMNA_FECHA:
+            dias = valores.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+            preparado[columna] = np.datetime_as_string(dias, unit='D')
+        elif isinstance(valores.dtype, pd.CategoricalDtype):
+            preparado[columna] = valores.astype(object).to_numpy()
+        else:
+            preparado[columna] = valores.to_numpy()
+    return preparado
+
+
+class ConsultaSQL:
+    # Vista de solo lectura sobre la tabla de un archivo con filtros acumulados. Responde las mismas
+    # consultas que CuboVentas (totales, top, serie, matriz) con SQL, así que las funciones de
+    # analisis_ventas.calculos la aceptan en lugar del cubo y dan los mismos resultados.
+
+    def __init__(self, almacen, tabla, condiciones=(), parametros=()):
+        self.almacen = almacen
+        self.tabla = tabla
+        self.condiciones = tuple(condiciones)
+        self.parametros = tuple(parametros)
+        self._consultas = {}
+
+    def _donde(self):
+        return ' WHERE ' + ' AND '.join(self.condiciones) if self.condiciones else ''
+
+    # Número de filas de venta que cumplen los filtros
+    def __len__(self):
+        if 'filas' not in self._consultas:
+            resultado = self.almacen.consultar(f'SELECT COUNT(*) AS n FROM {self.tabla}{self._donde()}', self.parametros)
+            self._consultas['filas'] = int(resultado['n'].iloc[0])
+        return self._consultas['filas']
+
+    @property
+    def dimensiones(self):
+        return list(DIMENSIONES_SQL)
+
+    # Función para obtener una consulta restringida a un rango de fechas, un mes y valores de dimensiones.
+    # Los valores 'Todas'/'Todos' o None no filtran.
+    def filtrar(self, fecha_inicio=None, fecha_fin=None, mes=None, **igualdades):
+        condiciones = list(self.condiciones)
+        parametros = list(self.parametros)
+        fecha = _columna(COLUMNA_FECHA)
+        if fecha_inicio is not None:
+            # El cubo compara el día a medianoche: un inicio con hora deja fuera ese día
+            inicio = pd.Timestamp(fecha_inicio)
+            dia = inicio.normalize() if inicio == inicio.normalize() else inicio.normalize() + pd.Timedelta(days=1)
+            condiciones.append(f'{fecha} >= {self.almacen.parametro_fecha()}')
+            parametros.append(dia.strftime('%Y-%m-%d'))
+        if fecha_fin is not None:
+            condiciones.append(f'{fecha} <= {self.almacen.parametro_fecha()}')
+            parametros.append(pd.Timestamp(fecha_fin).strftime('%Y-%m-%d'))
+        if mes is not None:
+            condiciones.append(f'{_columna(COLUMNA_MES)} = ?')
+            parametros.append(int(mes))
+        for columna, valor in resolver_filtros(igualdades).items():
+            if valor is None or valor in ('Todas', 'Todos') or columna not in DIMENSIONES_SQL:
+                continue
+            condiciones.append(f'{_columna(columna)} = ?')
+            parametros.append(str(valor))
+        if len(condiciones) == len(self.condiciones):
+            return self
+        return ConsultaSQL(self.almacen, self.tabla, condiciones, parametros)
+
+    # Función para sumar las medidas por una o varias claves (dimensiones, fecha o mes), como
+    # CuboVentas.totales. 'Lineas' es el número de filas. Devuelve un DataFrame ordenado de mayor
+    # a menor por la primera medida (a igual valor, por las claves).
+    def totales(self, claves, medidas=('Total Vendido',), ordenar=True):
+        claves = [claves] if isinstance(claves, str) else list(claves)
+        medidas = list(medidas)
+        llave = ('totales', tuple(claves), tuple(medidas), ordenar)
+        if llave not in self._consultas:
+            agregados = ['COUNT(*)' if medida == 'Lineas' else f'SUM({_columna(medida)})' for medida in medidas]
+            seleccion = ', '.join([_columna(clave) for clave in claves]
+                                  + [f'{agregado} AS {_columna(medida)}' for agregado, medida in zip(agregados, medidas)])
+            grupo = ', '.join(_columna(clave) for clave in claves)
+            orden = grupo if not ordenar else f'{_columna(medidas[0])} DESC, {grupo}'
+            resultado = self.almacen.consultar(
+                f'SELECT {seleccion} FROM {self.tabla}{self._donde()} GROUP BY {grupo} ORDER BY {orden}', self.parametros)
+            self._consultas[llave] = _tipos_resultado(resultado)
+        return self._consultas[llave].copy()
+
+    # Función para obtener los n valores con mayor venta de una dimensión
+    def top(self, dimension, n, medida='Total Vendido'):
+        return self.totales(dimension, [medida]).head(n).reset_index(drop=True)
+
+    # Función para obtener una serie temporal (diaria o mensual) de una medida
+    def serie(self, clave=COLUMNA_FECHA, medida='Total Vendido'):
+        return self.totales(clave, [medida], ordenar=False).set_index(clave)[medida].sort_index()
+
+    # Función para obtener una matriz filas x columnas en formato disperso (como CuboVentas.matriz_dispersa)
+    def matriz_dispersa(self, filas, columnas, medida='Total Vendido'):
+        llave = ('matriz_dispersa', filas, columnas, medida)
+        if llave not in self._consultas:
+            largo = self.totales([filas, columnas], [medida], ordenar=False)
+            self._consultas[llave] = matriz_desde_totales(largo, filas, columnas, medida)
+        return self._consultas[llave]
+
+    # Función para obtener una matriz filas x columnas densa (con `n`, solo las n filas de mayor venta)
+    def matriz(self, filas, columnas, medida='Total Vendido', n=None):
+        dispersa = self.matriz_dispersa(filas, columnas, medida)
+        return dispersa.a_densa(dispersa.principales(n) if n is not None else None)
+
+    # Función para calcular los KPIs del resumen (mismas claves que calculos.calcular_kpis)
+    def kpis(self):
+        if 'kpis' not in self._consultas:
+            distintos = ', '.join(f'COUNT(DISTINCT {_columna(columna)}) AS {nombre}' for nombre, columna in (
+                ('num_vendedores', 'Vendedor'), ('num_pedidos', 'NoPedidoStr'),
+                ('num_clientes', 'Cliente'), ('num_productos', 'Descripcion')))
+            resultado = self.almacen.consultar(
+                f'SELECT {distintos}, SUM({_columna("Cantidad")}) AS total_cantidad, '
+                f'SUM({_columna("Total Vendido")}) AS total_monto_vendido FROM {self.tabla}{self._donde()}',
+                self.parametros)
+            # Sin filas las sumas son NULL: se informan como 0, igual que pandas
+            self._consultas['kpis'] = {clave: (0 if pd.isna(valor) else valor) for clave, valor in
+                                       ((columna, resultado[columna].iloc[0]) for columna in resultado.columns)}
+        return dict(self._consultas['kpis'])
+
+
+# Función para dar a un resultado los tipos del cubo: día como fecha, mes como entero y sumas como números
+def _tipos_resultado(resultado):
+    if COLUMNA_FECHA in resultado.columns:
+        resultado[COLUMNA_FECHA] = pd.to_datetime(resultado[COLUMNA_FECHA]).astype('datetime64[ns]')
+    if COLUMNA_MES in resultado.columns:
+        resultado[COLUMNA_MES] = resultado[COLUMNA_MES].astype('int32')
+    for medida in ('Total Vendido', 'Descuento'):
+        if medida in resultado.columns:
+            resultado[medida] = resultado[medida].astype('float64')
+    return resultado
+
+
+# Uso: python -m analisis_ventas.almacen_sql ventas.csv [--motor sqlite] [--ruta ventas.sqlite]
+# Carga el CSV por bloques (sirve para historiales que no caben en memoria) y muestra los KPIs.
+def main(argumentos=None):
+    from analisis_ventas.cache import huella_archivo
+
+    parser = argparse.ArgumentParser(description='Carga un archivo de ventas en la base SQL del tablero.')
+    parser.add_argument('archivo', help='Archivo de ventas CSV')
+    parser.add_argument('--motor', choices=['duckdb', 'sqlite'], default=MOTOR_SQL, help='Base embebida')
+    parser.add_argument('--ruta', default=None, help='Archivo de la base (por defecto en ~/.analisis_ventas)')
+    parser.add_argument('--filas-por-bloque', type=int, default=500_000, help='Filas que se leen por bloque')
+    parser.add_argument('--recargar', action='store_true', help='Vuelve a cargar el archivo aunque ya esté en la base')
+    argumentos = parser.parse_args(argumentos)
+
+    almacen = AlmacenSQL(argumentos.ruta, argumentos.motor)
+    huella = huella_archivo(argumentos.archivo)
+    if argumentos.recargar:
+        almacen.borrar(huella)
+    bloques = (normalizar_ventas(bloque) for bloque in
+               pd.read_csv(argumentos.archivo, dtype=ESQUEMA_CSV, chunksize=argumentos.filas_por_bloque))
+    consulta = almacen.cargar(bloques, huella)
+    print(f"{almacen.ruta} ({almacen.motor}): tabla {consulta.tabla}, {len(consulta):,} filas")
+    for clave, valor in consulta.kpis().items():
+        print(f"  {clave}: {valor:,}")
+
+
+if __name__ == '__main__':
+    main()
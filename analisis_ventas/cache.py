@@ -0,0 +1,179 @@
+"""Caché de resultados por estado de filtros con límite de memoria y desalojo LRU."""
+
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+
+PRESUPUESTO_MB = int(os.environ.get('ANALISIS_CACHE_MB', '512'))
+
+# Valores de los selectores que equivalen a no filtrar
+SIN_FILTRO = (None, 'Todas', 'Todos')
+
+
+class CacheResultados:
+    # Guarda tablas y figuras bajo la clave (huella del archivo, filtros, sección).
+    # Cuando la suma de tamaños supera el presupuesto se descartan primero las
+    # entradas usadas hace más tiempo. Es seguro usarla desde varias sesiones.
+
+    def __init__(self, presupuesto_bytes=PRESUPUESTO_MB * 1024 ** 2):
+        self.presupuesto_bytes = presupuesto_bytes
+        self.bytes_usados = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self._entradas = OrderedDict()
+        self._candado = threading.RLock()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, clave):
+        return clave in self._entradas
+
+    # Función para leer una entrada; devuelve `defecto` si no existe
+    def obtener(self, clave, defecto=None):
+        with self._candado:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return self._entradas[clave][0]
+            self.fallos += 1
+            return defecto
+
+    # Función para guardar una entrada y desalojar las más antiguas si hace falta
+    def guardar(self, clave, valor):
+        tamano = estimar_tamano(valor)
+        with self._candado:
+            if clave in self._entradas:
+                self.bytes_usados -= self._entradas.pop(clave)[1]
+            if tamano > self.presupuesto_bytes:
+                # Un resultado más grande que todo el presupuesto no se guarda
+                return valor
+            self._entradas[clave] = (valor, tamano)
+            self.bytes_usados += tamano
+            while self.bytes_usados > self.presupuesto_bytes:
+                _, (_, tamano_viejo) = self._entradas.popitem(last=False)
+                self.bytes_usados -= tamano_viejo
+                self.desalojos += 1
+        return valor
+
+    # Función para devolver el resultado guardado o calcularlo y guardarlo
+    def obtener_o_calcular(self, clave, calcular):
+        with self._candado:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return self._entradas[clave][0]
+            self.fallos += 1
+        return self.guardar(clave, calcular())
+
+    # Función para cambiar el presupuesto y desalojar lo que sobre
+    def cambiar_presupuesto(self, presupuesto_bytes):
+        with self._candado:
+            self.presupuesto_bytes = presupuesto_bytes
+            while self._entradas and self.bytes_usados > self.presupuesto_bytes:
+                _, (_, tamano_viejo) = self._entradas.popitem(last=False)
+                self.bytes_usados -= tamano_viejo
+                self.desalojos += 1
+
+    def limpiar(self):
+        with self._candado:
+            self._entradas.clear()
+            self.bytes_usados = 0
+
+    # Función para obtener los contadores de la caché
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            'entradas': len(self._entradas),
+            'mb_usados': self.bytes_usados / 1024 ** 2,
+            'mb_presupuesto': self.presupuesto_bytes / 1024 ** 2,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'desalojos': self.desalojos,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+        }
+
+
+# Función para estimar la memoria que ocupa un resultado guardado en la caché
+def estimar_tamano(valor):
+    if isinstance(valor, pd.DataFrame):
+        return sum(_tamano_columna(valor[columna]) for columna in valor.columns) + int(valor.index.memory_usage())
+    if isinstance(valor, pd.Series):
+        return _tamano_columna(valor) + int(valor.index.memory_usage())
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        return len(valor)
+    if hasattr(valor, 'tabla') and isinstance(valor.tabla, pd.DataFrame):
+        # CuboVentas y objetos similares que envuelven un DataFrame
+        return estimar_tamano(valor.tabla)
+    if hasattr(valor, 'get_size_inches') and hasattr(valor, 'dpi'):
+        # Figura de matplotlib: se estima por el tamaño del lienzo en RGBA
+        ancho, alto = valor.get_size_inches()
+        return int(ancho * alto * valor.dpi ** 2 * 4)
+    if hasattr(valor, 'to_plotly_json'):
+        return len(valor.to_json())
+    if isinstance(valor, (tuple, list)):
+        return sys.getsizeof(valor) + sum(estimar_tamano(v) for v in valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(estimar_tamano(v) for v in valor.values())
+    try:
+        return len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(valor)
+
+
+# Las columnas de texto se miden con una muestra para no recorrer millones de cadenas
+FILAS_MUESTRA = 10_000
+
+
+def _tamano_columna(serie):
+    if serie.dtype != object or len(serie) <= FILAS_MUESTRA:
+        return int(serie.memory_usage(index=False, deep=True))
+    muestra = serie.iloc[::len(serie) // FILAS_MUESTRA]
+    por_fila = muestra.memory_usage(index=False, deep=True) / len(muestra)
+    return int(por_fila * len(serie))
+
+
+# Función para convertir los valores de los filtros en una tupla estable y comparable
+def normalizar_filtros(**filtros):
+    normalizados = []
+    for nombre in sorted(filtros):
+        valor = filtros[nombre]
+        if isinstance(valor, str) and valor in SIN_FILTRO:
+            valor = None
+        elif isinstance(valor, (pd.Timestamp, datetime, date)):
+            valor = pd.Timestamp(valor).isoformat()
+        elif isinstance(valor, np.generic):
+            valor = valor.item()
+        elif isinstance(valor, (list, tuple, set)):
+            valor = tuple(sorted(str(v) for v in valor))
+        normalizados.append((nombre, valor))
+    return tuple(normalizados)
+
+
+# Función para calcular la huella del contenido de un archivo (ruta o archivo en memoria)
+def huella_archivo(archivo, tamano_bloque=8 * 1024 ** 2):
+    resumen = hashlib.blake2b(digest_size=16)
+    if isinstance(archivo, (str, os.PathLike)):
+        with open(archivo, 'rb') as origen:
+            for bloque in iter(lambda: origen.read(tamano_bloque), b''):
+                resumen.update(bloque)
+    elif hasattr(archivo, 'getbuffer'):
+        resumen.update(archivo.getbuffer())
+    else:
+        posicion = archivo.tell()
+        archivo.seek(0)
+        for bloque in iter(lambda: archivo.read(tamano_bloque), b''):
+            resumen.update(bloque)
+        archivo.seek(posicion)
+    return resumen.hexdigest()
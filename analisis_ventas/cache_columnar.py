@@ -0,0 +1,139 @@
+"""Copias columnares (Feather) de los archivos ya normalizados, para no volver a leerlos."""
+
+import argparse
+import os
+import time
+import uuid
+
+import pandas as pd
+
+from analisis_ventas.cache import huella_archivo
+from analisis_ventas.ingesta import PYARROW_DISPONIBLE, leer_ventas, normalizar_ventas
+
+
+CARPETA_COPIAS = os.environ.get('ANALISIS_COPIAS',
+                                os.path.join(os.path.expanduser('~'), '.analisis_ventas', 'copias'))
+LIMITE_COPIAS_MB = int(os.environ.get('ANALISIS_COPIAS_MB', '2048'))
+
+# Cambia cuando cambia la normalización, para no reutilizar copias con otro esquema
+VERSION_COPIA = 1
+
+
+# Función para leer un archivo de ventas usando su copia columnar si ya existe.
+# La primera lectura de un contenido escribe la copia (sin comprimir, para poder
+# mapearla en memoria); las siguientes la leen en lugar de volver a convertir el archivo.
+# Con `mapear` también la primera lectura devuelve la copia mapeada: sus columnas son de solo
+# lectura y sus páginas las comparten todos los procesos que mapean el mismo archivo.
+def leer_ventas_con_copia(archivo, huella=None, carpeta=CARPETA_COPIAS, limite_bytes=LIMITE_COPIAS_MB * 1024 ** 2,
+                          mapear=False):
+    if not PYARROW_DISPONIBLE:
+        return leer_ventas(archivo)
+    huella = huella or huella_archivo(archivo)
+    ruta = ruta_copia(huella, carpeta)
+
+    if os.path.exists(ruta):
+        try:
+            df = leer_copia(ruta)
+            # La fecha de modificación marca el último uso para el desalojo
+            os.utime(ruta)
+            return df
+        except Exception:
+            # Copia dañada o incompleta: se descarta y se vuelve a leer el original
+            _borrar(ruta)
+
+    df = leer_ventas(archivo)
+    try:
+        escribir_copia(df, ruta)
+        desalojar_copias(carpeta, limite_bytes)
+    except OSError:
+        # Sin espacio o sin permisos la copia es opcional
+        return df
+    if mapear and os.path.exists(ruta):
+        return leer_copia(ruta)
+    return df
+
+
+# Función para obtener la ruta de la copia de un contenido
+def ruta_copia(huella, carpeta=CARPETA_COPIAS):
+    return os.path.join(carpeta, f'{huella}-v{VERSION_COPIA}.feather')
+
+
+# Función para leer una copia mapeada en memoria (las columnas numéricas no se copian)
+def leer_copia(ruta):
+    from pyarrow import feather
+
+    tabla = feather.read_table(ruta, memory_map=True)
+    return tabla.to_pandas(split_blocks=True)
+
+
+# Función para escribir la copia de forma atómica: otra sesión nunca ve un archivo a medias
+def escribir_copia(df, ruta):
+    from pyarrow import feather
+
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f'{ruta}.{uuid.uuid4().hex}.tmp'
+    try:
+        feather.write_feather(df, temporal, compression='uncompressed')
+        os.replace(temporal, ruta)
+    finally:
+        _borrar(temporal)
+
+
+# Función para borrar las copias usadas hace más tiempo hasta quedar dentro del límite
+def desalojar_copias(carpeta=CARPETA_COPIAS, limite_bytes=LIMITE_COPIAS_MB * 1024 ** 2):
+    copias = []
+    for nombre in os.listdir(carpeta):
+        if not nombre.endswith('.feather'):
+            continue
+        ruta = os.path.join(carpeta, nombre)
+        try:
+            estado = os.stat(ruta)
+        except OSError:
+            continue
+        copias.append((estado.st_mtime, estado.st_size, ruta))
+    total = sum(tamano for _, tamano, _ in copias)
+    borradas = 0
+    for _, tamano, ruta in sorted(copias):
+        if total <= limite_bytes:
+            break
+        _borrar(ruta)
+        total -= tamano
+        borradas += 1
+    return borradas
+
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+
+# Uso: python -m analisis_ventas.cache_columnar ventas.xlsx [--comparar]
+# Informa las filas por segundo de la lectura directa y de la lectura desde la copia.
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description='Mide la lectura de un archivo de ventas en filas por segundo.')
+    parser.add_argument('archivo', help='Archivo de ventas (CSV o XLSX)')
+    parser.add_argument('--carpeta', default=CARPETA_COPIAS, help='Carpeta de las copias columnares')
+    parser.add_argument('--comparar', action='store_true',
+                        help='Mide también la lectura completa con pandas.read_excel o pandas.read_csv')
+    argumentos = parser.parse_args(argumentos)
+
+    _medir('lectura directa', lambda: leer_ventas(argumentos.archivo))
+    if PYARROW_DISPONIBLE:
+        leer_ventas_con_copia(argumentos.archivo, carpeta=argumentos.carpeta)
+        _medir('copia columnar', lambda: leer_ventas_con_copia(argumentos.archivo, carpeta=argumentos.carpeta))
+    if argumentos.comparar:
+        lector = pd.read_excel if argumentos.archivo.endswith('.xlsx') else pd.read_csv
+        _medir(f'pandas.{lector.__name__}', lambda: normalizar_ventas(lector(argumentos.archivo)))
+
+
+def _medir(nombre, leer):
+    inicio = time.perf_counter()
+    filas = len(leer())
+    segundos = time.perf_counter() - inicio
+    print(f'{nombre}: {filas:,} filas en {segundos:,.2f} s ({filas / max(segundos, 1e-9):,.0f} filas/s)')
+
+
+if __name__ == '__main__':
+    main()
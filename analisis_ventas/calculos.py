@@ -0,0 +1,148 @@
+"""Cálculos del tablero como funciones sobre el DataFrame normalizado (o su cubo), sin Streamlit."""
+
+import numpy as np
+import pandas as pd
+
+from analisis_ventas.abc import UMBRALES_ABC, clasificar_abc
+from analisis_ventas.cubo import CuboVentas
+from analisis_ventas.ingesta import COLUMNA_FECHA, COLUMNA_MES, clave_a_mes
+from analisis_ventas.pronosticos import PASOS_PRONOSTICO, pronosticar_lote, series_mensuales
+
+
+# Nombres de las medidas en las tablas de resumen con cantidad
+NOMBRES_RESUMEN = {'Cantidad': 'cantidad_vendida', 'Total Vendido': 'total_vendido'}
+
+COLUMNAS_PROYECCION = ['Descripcion', COLUMNA_FECHA, 'Cantidad']
+
+
+# Función para obtener el cubo de agregación de los datos; un cubo se devuelve tal cual.
+# Las funciones de este módulo aceptan el DataFrame o su cubo, que es más rápido si ya existe,
+# o cualquier objeto con las mismas consultas (p. ej. almacen_sql.ConsultaSQL).
+def como_cubo(datos):
+    return datos if hasattr(datos, 'totales') else CuboVentas.desde_ventas(datos)
+
+
+# Función para calcular los KPIs del resumen a partir de las filas (o con la consulta SQL que los calcula)
+def calcular_kpis(df):
+    if hasattr(df, 'kpis'):
+        return df.kpis()
+    return {
+        'num_vendedores': df['Vendedor'].nunique(),
+        'num_pedidos': df['NoPedidoStr'].nunique(),
+        'num_clientes': df['Cliente'].nunique(),
+        'num_productos': df['Descripcion'].nunique(),
+        'total_cantidad': df['Cantidad'].sum(),
+        'total_monto_vendido': df['Total Vendido'].sum(),
+    }
+
+
+# Función para la tabla de ventas por una dimensión, de mayor a menor. Con `cantidad`
+# incluye la cantidad vendida (columnas cantidad_vendida y total_vendido), ordenada por el total vendido.
+def tabla_resumen(datos, columna, cantidad=False):
+    cubo = como_cubo(datos)
+    if not cantidad:
+        return cubo.totales(columna)
+    tabla = cubo.totales(columna, ['Total Vendido', 'Cantidad']).rename(columns=NOMBRES_RESUMEN)
+    return tabla[[columna, 'cantidad_vendida', 'total_vendido']]
+
+
+# Función para obtener las ventas de cada día (Serie indexada por fecha)
+def ventas_diarias(datos, medida='Total Vendido'):
+    return como_cubo(datos).serie(COLUMNA_FECHA, medida)
+
+
+# Función para obtener los n días de mayor y de menor venta
+def dias_extremos(datos, n=10):
+    ventas_por_dia = ventas_diarias(datos)
+    return ventas_por_dia.nlargest(n), ventas_por_dia.nsmallest(n)
+
+
+# Función para sumar las ventas por nombre de mes (todas las fechas de enero juntas, etc.)
+def ventas_estacionales(datos):
+    ventas_mensuales = como_cubo(datos).totales(COLUMNA_MES, ordenar=False)
+    ventas_mensuales['Mes'] = pd.to_datetime(ventas_mensuales[COLUMNA_MES].astype(str), format='%Y%m').dt.month_name()
+    return ventas_mensuales.groupby('Mes')['Total Vendido'].sum().reset_index().sort_values('Total Vendido', ascending=False)
+
+
+# Función para clasificar en A, B y C todas las entidades de una dimensión
+def analisis_abc(datos, columna, umbrales=UMBRALES_ABC):
+    return clasificar_abc(como_cubo(datos).totales(columna), columna, umbrales=umbrales)
+
+
+# Función para comprobar que están las columnas de la tabla pivote y la proyección
+def validar_columnas_proyeccion(df):
+    faltantes = [columna for columna in COLUMNAS_PROYECCION if columna not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan las siguientes columnas en el archivo CSV: {', '.join(faltantes)}")
+
+
+# Meses de la media móvil de la proyección y meses que se proyectan después del último mes con ventas
+VENTANA_PROYECCION = 3
+HORIZONTE_PROYECCION = 6
+
+
+# Función para la lista de meses (AAAA-MM) entre el primer y el último mes con ventas, sin huecos
+def meses_continuos(datos):
+    claves = como_cubo(datos).totales(COLUMNA_MES, ['Lineas'], ordenar=False)[COLUMNA_MES]
+    if claves.empty:
+        return pd.PeriodIndex([], freq='M', name='Mes')
+    inicio, fin = claves.min(), claves.max()
+    return pd.period_range(clave_a_mes(inicio), clave_a_mes(fin), freq='M', name='Mes')
+
+
+# Función para la tabla pivote de productos x mes con la medida vendida, como matriz dispersa
+# (MatrizDispersa) con columnas AAAA-MM para todos los meses del archivo aunque alguno no tenga ventas.
+# Se arma desde el cubo, no desde las filas, y solo guarda las combinaciones con ventas.
+def pivote_mensual(datos, medida='Cantidad'):
+    if isinstance(datos, pd.DataFrame):
+        validar_columnas_proyeccion(datos)
+    pivote = como_cubo(datos).matriz_dispersa('Descripcion', COLUMNA_MES, medida)
+    return pivote.con_columnas(meses_continuos(datos).strftime('%Y-%m'))
+
+
+# Función para la serie mensual de una medida indexada por mes, con 0 en los meses sin ventas
+def ventas_por_mes(datos, medida='Cantidad'):
+    serie = como_cubo(datos).serie(COLUMNA_MES, medida)
+    serie.index = pd.PeriodIndex([clave_a_mes(clave) for clave in serie.index], freq='M')
+    return serie.reindex(meses_continuos(datos), fill_value=0)
+
+
+# Función para la proyección de ventas con una media móvil simple de `ventana` meses.
+# Devuelve (ventas por mes, proyección): la proyección de cada mes con historia es la media de los
+# `ventana` meses anteriores, y los `horizonte` meses siguientes al último mes con ventas repiten
+# la media de los últimos `ventana` meses.
+def proyeccion_mensual(datos, medida='Cantidad', ventana=VENTANA_PROYECCION, horizonte=HORIZONTE_PROYECCION):
+    if isinstance(datos, pd.DataFrame):
+        validar_columnas_proyeccion(datos)
+    ventas_mes = ventas_por_mes(datos, medida)
+    proyeccion = ventas_mes.rolling(window=ventana).mean().shift(1)
+    if len(ventas_mes) and horizonte > 0:
+        futuros = pd.period_range(ventas_mes.index[-1] + 1, periods=horizonte, freq='M', name='Mes')
+        siguiente = ventas_mes.iloc[-ventana:].mean() if len(ventas_mes) >= ventana else np.nan
+        proyeccion = pd.concat([proyeccion, pd.Series(siguiente, index=futuros)])
+    return ventas_mes, proyeccion.rename('Proyección')
+
+
+# Función para la tabla pivote con la proyección de cada producto, calculada para todos los productos
+# de una vez sobre la matriz dispersa: 'Proyección' es la media de los últimos `ventana` meses (lo que
+# se espera vender cada mes siguiente) y la última columna es lo proyectado para los `horizonte` meses.
+# Con `n` la tabla densa solo tiene los n productos de mayor proyección, de mayor a menor.
+def tabla_proyeccion(datos, medida='Cantidad', ventana=VENTANA_PROYECCION, horizonte=HORIZONTE_PROYECCION, n=None):
+    pivote = pivote_mensual(datos, medida)
+    if pivote.shape[1] >= ventana:
+        proyeccion = pivote.media_ultimas_columnas(ventana)
+    else:
+        proyeccion = pd.Series(np.nan, index=pivote.etiquetas_filas)
+    productos = None
+    if n is not None:
+        orden = proyeccion if proyeccion.notna().any() else pivote.totales_filas()
+        productos = orden.sort_values(ascending=False, kind='stable').index[:n]
+    tabla = pivote.a_densa(productos)
+    tabla['Proyección'] = proyeccion.reindex(tabla.index).to_numpy()
+    tabla[f'Proyección {horizonte} meses'] = tabla['Proyección'] * horizonte
+    return tabla
+
+
+# Función para pronosticar con Holt-Winters todas las entidades de una dimensión (sin almacén de modelos)
+def pronosticar(datos, dimension, pasos=PASOS_PRONOSTICO, procesos=None):
+    return pronosticar_lote(series_mensuales(datos, dimension), pasos, procesos)
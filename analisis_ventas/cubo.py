@@ -0,0 +1,102 @@
+"""Cubo de agregación de ventas por día y dimensiones, con consultas de resumen."""
+
+import pandas as pd
+
+from analisis_ventas.ingesta import COLUMNA_FECHA, COLUMNA_MES, compactar_etiquetas, resolver_filtros
+from analisis_ventas.matrices import matriz_desde_totales
+
+
+# Grano del cubo: día x Cliente x Vendedor x Descripcion x Localidad x Condicion Pago
+DIMENSIONES_CUBO = ['Cliente', 'Vendedor', 'Descripcion', 'Localidad Nombre', 'Condicion Pago']
+MEDIDAS_CUBO = ['Cantidad', 'Total Vendido', 'Descuento']
+
+
+class CuboVentas:
+    # Tabla de sumas al grano del cubo. Todas las consultas se responden desde
+    # esta tabla, cuyo tamaño depende del número de combinaciones distintas y no
+    # del número de filas del archivo. Los resultados se memorizan por consulta.
+
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self._consultas = {}
+
+    # Función para construir el cubo a partir del DataFrame normalizado
+    @classmethod
+    def desde_ventas(cls, df):
+        dimensiones = [d for d in DIMENSIONES_CUBO if d in df.columns]
+        medidas = [m for m in MEDIDAS_CUBO if m in df.columns]
+        dia = df[COLUMNA_FECHA].dt.normalize()
+        grupos = df.groupby([dia] + [df[d] for d in dimensiones], observed=True, sort=False)
+        tabla = grupos[medidas].sum()
+        # Las sumas se guardan en float64 aunque las columnas de origen sean compactas
+        tabla = tabla.astype({m: 'float64' for m in medidas if m != 'Cantidad'})
+        tabla['Lineas'] = grupos.size().astype('int32')
+        tabla = tabla.reset_index()
+        fechas = tabla[COLUMNA_FECHA].dt
+        tabla[COLUMNA_MES] = (fechas.year * 100 + fechas.month).astype('int32')
+        return cls(tabla)
+
+    def __len__(self):
+        return len(self.tabla)
+
+    @property
+    def dimensiones(self):
+        return [d for d in DIMENSIONES_CUBO if d in self.tabla.columns]
+
+    # Función para obtener un cubo restringido a un rango de fechas, un mes y valores de dimensiones.
+    # Los valores 'Todas'/'Todos' o None no filtran.
+    def filtrar(self, fecha_inicio=None, fecha_fin=None, mes=None, **igualdades):
+        mascara = pd.Series(True, index=self.tabla.index)
+        if fecha_inicio is not None:
+            mascara &= self.tabla[COLUMNA_FECHA] >= pd.Timestamp(fecha_inicio)
+        if fecha_fin is not None:
+            mascara &= self.tabla[COLUMNA_FECHA] <= pd.Timestamp(fecha_fin)
+        if mes is not None:
+            mascara &= self.tabla[COLUMNA_MES] == int(mes)
+        for columna, valor in resolver_filtros(igualdades).items():
+            if valor is None or valor in ('Todas', 'Todos') or columna not in self.tabla.columns:
+                continue
+            mascara &= self.tabla[columna] == valor
+        if mascara.all():
+            return self
+        return CuboVentas(self.tabla[mascara.to_numpy()].reset_index(drop=True))
+
+    # Función para sumar las medidas por una o varias claves (dimensiones, fecha o mes).
+    # Devuelve un DataFrame ordenado de mayor a menor por la primera medida.
+    def totales(self, claves, medidas=('Total Vendido',), ordenar=True):
+        claves = [claves] if isinstance(claves, str) else list(claves)
+        medidas = list(medidas)
+        llave = ('totales', tuple(claves), tuple(medidas), ordenar)
+        if llave not in self._consultas:
+            resultado = self.tabla.groupby(claves, observed=True)[medidas].sum().reset_index()
+            for clave in claves:
+                if isinstance(resultado[clave].dtype, pd.CategoricalDtype):
+                    resultado[clave] = resultado[clave].cat.remove_unused_categories()
+            if ordenar:
+                resultado = resultado.sort_values(medidas[0], ascending=False, ignore_index=True)
+            self._consultas[llave] = resultado
+        return self._consultas[llave].copy()
+
+    # Función para obtener los n valores con mayor venta de una dimensión (con solo sus etiquetas)
+    def top(self, dimension, n, medida='Total Vendido'):
+        return compactar_etiquetas(self.totales(dimension, [medida]).head(n).reset_index(drop=True))
+
+    # Función para obtener una serie temporal (diaria o mensual) de una medida
+    def serie(self, clave=COLUMNA_FECHA, medida='Total Vendido'):
+        return self.totales(clave, [medida], ordenar=False).set_index(clave)[medida].sort_index()
+
+    # Función para obtener una matriz filas x columnas (p. ej. Vendedor x Mes) en formato disperso:
+    # solo las combinaciones con ventas, sin materializar los ceros. Las columnas de mes se
+    # nombran AAAA-MM. La matriz se comparte entre consultas y no se debe modificar.
+    def matriz_dispersa(self, filas, columnas, medida='Total Vendido'):
+        llave = ('matriz_dispersa', filas, columnas, medida)
+        if llave not in self._consultas:
+            largo = self.totales([filas, columnas], [medida], ordenar=False)
+            self._consultas[llave] = matriz_desde_totales(largo, filas, columnas, medida)
+        return self._consultas[llave]
+
+    # Función para obtener una matriz filas x columnas densa con ceros donde no hay ventas.
+    # Con `n` solo se incluyen las n filas de mayor venta (en el orden de las filas).
+    def matriz(self, filas, columnas, medida='Total Vendido', n=None):
+        dispersa = self.matriz_dispersa(filas, columnas, medida)
+        return dispersa.a_densa(dispersa.principales(n) if n is not None else None)
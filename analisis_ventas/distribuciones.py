@@ -0,0 +1,103 @@
+"""Resúmenes por grupo para los gráficos de distribución: muestra estratificada, cajas y histogramas."""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# Filas como máximo que recibe el gráfico de violín; con más filas se dibuja una muestra por grupo
+MAX_FILAS_MUESTRA = int(os.environ.get('ANALISIS_MAX_FILAS_MUESTRA', '50000'))
+
+# Filas que conserva cada grupo aunque sea pequeño, para que su forma no dependa de unas pocas filas
+MIN_FILAS_GRUPO = 200
+
+# Valores atípicos que se dibujan por grupo en el gráfico de caja (siempre el mínimo y el máximo)
+MAX_ATIPICOS_GRUPO = 100
+
+
+# Función para obtener los códigos de grupo de una columna (-1 para los valores vacíos) y sus categorías
+def _codigos_grupo(columna):
+    categorias = columna.array if isinstance(columna.dtype, pd.CategoricalDtype) else pd.Categorical(columna)
+    return np.asarray(categorias.codes, dtype='int64'), categorias.categories
+
+
+# Función para dar a cada fila una posición al azar dentro de su grupo (0, 1, 2, ...).
+# Quedarse con las filas de posición menor que la cuota del grupo es un muestreo sin reemplazo.
+def _posiciones_al_azar(codigos, grupos, semilla=0):
+    aleatorio = np.random.default_rng(semilla).random(len(codigos))
+    orden = np.lexsort((aleatorio, codigos))
+    tamanos = np.bincount(codigos + 1, minlength=grupos + 1)
+    inicios = np.concatenate([[0], np.cumsum(tamanos)[:-1]])
+    posiciones = np.empty(len(codigos), dtype='int64')
+    posiciones[orden] = np.arange(len(codigos)) - np.repeat(inicios, tamanos)
+    return posiciones, tamanos
+
+
+# Función para tomar una muestra de a lo sumo `maximo` filas manteniendo la proporción de cada grupo
+# de `columna`. Cada grupo conserva al menos `minimo_grupo` filas (o todas las que tenga); el resto de
+# la cuota se reparte en proporción al tamaño. Con `maximo` filas o menos se devuelve `df` tal cual.
+# Las filas elegidas mantienen su orden original.
+def muestra_estratificada(df, columna, maximo=MAX_FILAS_MUESTRA, minimo_grupo=MIN_FILAS_GRUPO, semilla=0):
+    if len(df) <= maximo:
+        return df
+    codigos, categorias = _codigos_grupo(df[columna])
+    posiciones, tamanos = _posiciones_al_azar(codigos, len(categorias), semilla)
+    minimo_grupo = min(minimo_grupo, maximo // max(1, np.count_nonzero(tamanos)))
+    minimos = np.minimum(tamanos, minimo_grupo)
+    fraccion = max(0, maximo - minimos.sum()) / len(df)
+    cuotas = np.minimum(tamanos, np.maximum(minimos, np.floor(tamanos * fraccion))).astype('int64')
+    return df[posiciones < cuotas[codigos + 1]]
+
+
+# Función para calcular las estadísticas de un gráfico de caja por grupo (las que espera Axes.bxp):
+# cuartiles y bigotes exactos (1.5 veces el rango intercuartílico, como matplotlib y seaborn) y hasta
+# `max_atipicos` valores atípicos por grupo. `orden` es la lista de grupos a dibujar.
+def estadisticas_caja(df, columna_grupo, columna_valor, orden, max_atipicos=MAX_ATIPICOS_GRUPO, semilla=0):
+    codigos, categorias = _codigos_grupo(df[columna_grupo])
+    valores = df[columna_valor].to_numpy(dtype='float64')
+    validos = (codigos >= 0) & ~np.isnan(valores)
+    codigos, valores = codigos[validos], valores[validos]
+
+    cuartiles = pd.Series(valores).groupby(codigos).quantile([0.25, 0.5, 0.75]).unstack()
+    q1 = cuartiles[0.25].reindex(range(len(categorias))).to_numpy()
+    q3 = cuartiles[0.75].reindex(range(len(categorias))).to_numpy()
+    rango = q3 - q1
+    dentro = (valores >= (q1 - 1.5 * rango)[codigos]) & (valores <= (q3 + 1.5 * rango)[codigos])
+    bigotes = pd.Series(valores[dentro]).groupby(codigos[dentro]).agg(['min', 'max'])
+
+    # Atípicos: una muestra por grupo más el mínimo y el máximo de cada uno
+    atipicos = pd.DataFrame({'grupo': codigos[~dentro], 'valor': valores[~dentro]})
+    if len(atipicos):
+        posiciones, _ = _posiciones_al_azar(atipicos['grupo'].to_numpy(), len(categorias), semilla)
+        por_grupo = atipicos.groupby('grupo')['valor']
+        extremos = (atipicos['valor'] == por_grupo.transform('min')) | (atipicos['valor'] == por_grupo.transform('max'))
+        atipicos = atipicos[(posiciones < max_atipicos) | extremos.to_numpy()]
+    atipicos = atipicos.groupby('grupo')['valor'].apply(np.asarray)
+
+    estadisticas = []
+    for grupo in orden:
+        codigo = categorias.get_loc(grupo) if grupo in categorias else -1
+        if codigo < 0 or codigo not in cuartiles.index:
+            continue
+        estadisticas.append({
+            'label': str(grupo),
+            'q1': q1[codigo],
+            'med': cuartiles.at[codigo, 0.5],
+            'q3': q3[codigo],
+            'whislo': bigotes.at[codigo, 'min'] if codigo in bigotes.index else q1[codigo],
+            'whishi': bigotes.at[codigo, 'max'] if codigo in bigotes.index else q3[codigo],
+            'fliers': atipicos.get(codigo, np.array([])),
+        })
+    return estadisticas
+
+
+# Función para el histograma por días de una columna de fechas: (conteos, bordes de los intervalos).
+# Cuenta todas las filas con numpy en lugar de convertir cada fecha en un objeto de Python.
+def histograma_fechas(fechas, bins=20):
+    dias = np.asarray(fechas, dtype='datetime64[ns]').astype('datetime64[D]')
+    dias = dias[~np.isnat(dias)].astype('int64')
+    if len(dias) == 0:
+        return np.array([], dtype='int64'), np.array([], dtype='datetime64[ns]')
+    conteos, bordes = np.histogram(dias, bins=bins)
+    return conteos, (bordes * 86400e9).astype('int64').astype('datetime64[ns]')
@@ -0,0 +1,112 @@
+"""Construcción y renderizado de figuras de matplotlib: figuras fuera de pyplot, etiquetas por lotes y caché por clave."""
+
+import io
+import math
+
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.container import BarContainer
+from matplotlib.figure import Figure
+
+
+DPI_GRAFICOS = 200  # Misma resolución con la que st.pyplot guarda las figuras
+FORMATOS_GRAFICOS = ('png', 'svg')
+
+# Límites de anotaciones por gráfico: por encima solo se etiquetan las barras de mayor valor
+# (o algunos puntos de la línea), y el mapa de calor se dibuja sin números en las celdas
+MAX_ETIQUETAS = 40
+MAX_CELDAS_ANOTADAS = 400
+
+# Función para guardar una figura como imagen y cerrarla para liberar su memoria
+def figura_a_bytes(fig, formato='png', dpi=DPI_GRAFICOS):
+    if formato not in FORMATOS_GRAFICOS:
+        raise ValueError(f"Formato de gráfico no soportado: {formato}")
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format=formato, dpi=dpi, bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+# Función para dibujar y renderizar una figura. `dibujar` devuelve la figura;
+# `estilo` son parámetros de matplotlib (rcParams) que solo aplican a esta figura.
+def imagen_grafico(dibujar, formato='png', estilo=None):
+    with plt.rc_context(estilo or {}):
+        return figura_a_bytes(dibujar(), formato)
+
+
+# Función para obtener la imagen de un gráfico desde la caché de resultados o dibujarla una sola vez.
+# La clave debe identificar los datos, el gráfico y los filtros, p. ej. (huella, filtros, 'grafico_x').
+def grafico_en_cache(cache, clave, dibujar, formato='png', estilo=None):
+    return cache.obtener_o_calcular(clave + (formato,), lambda: imagen_grafico(dibujar, formato, estilo))
+
+
+# Función para obtener una figura vacía y sus ejes (mismos argumentos que plt.subplots).
+# La figura no pasa por pyplot, así que no queda abierta: se libera cuando deja de usarse.
+def nueva_figura(nrows=1, ncols=1, figsize=(12, 6)):
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.subplots(nrows, ncols)
+
+
+# Función para poner el valor encima de cada barra de los ejes con bar_label (una llamada por
+# grupo de barras). Con más de `maximo` barras solo se etiquetan las `maximo` de mayor valor.
+def etiquetar_barras(ax, formato='${:,.0f}', maximo=MAX_ETIQUETAS, fontsize=10, **propiedades):
+    contenedores = [contenedor for contenedor in ax.containers if isinstance(contenedor, BarContainer)]
+    if not contenedores:
+        return
+    valores = np.abs(np.concatenate([np.asarray(c.datavalues, dtype='float64') for c in contenedores]))
+    valores = valores[np.isfinite(valores)]
+    minimo = np.sort(valores)[-maximo] if len(valores) > maximo else -np.inf
+    for contenedor in contenedores:
+        etiquetas = [formato.format(valor) if np.isfinite(valor) and abs(valor) >= minimo else ''
+                     for valor in contenedor.datavalues]
+        ax.bar_label(contenedor, labels=etiquetas, padding=3, fontsize=fontsize, **propiedades)
+
+
+# Función para poner el valor sobre los puntos de una línea. Con más de `maximo` puntos se
+# etiqueta uno de cada pocos, y siempre el máximo y el mínimo.
+def etiquetar_puntos(ax, x, y, formato='${:,.0f}', maximo=MAX_ETIQUETAS, fontsize=9):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype='float64')
+    if len(y) == 0:
+        return
+    posiciones = np.arange(0, len(y), max(1, math.ceil(len(y) / maximo)))
+    posiciones = np.union1d(posiciones, [np.nanargmax(y), np.nanargmin(y)])
+    for i in posiciones:
+        ax.annotate(formato.format(y[i]), (x[i], y[i]), textcoords='offset points', xytext=(0, 7),
+                    ha='center', fontsize=fontsize)
+
+
+# Función para decidir si un mapa de calor muestra el número de cada celda
+def anotar_celdas(matriz, maximo=MAX_CELDAS_ANOTADAS):
+    return matriz.size <= maximo
+
+
+# Función para dibujar un gráfico de caja a partir de estadísticas ya calculadas (las de
+# distribuciones.estadisticas_caja), con el aspecto de sns.boxplot: una caja por grupo en las
+# posiciones 0, 1, 2, ... con los colores de la paleta de seaborn `paleta`.
+def graficar_cajas(ax, estadisticas, paleta=None):
+    if not estadisticas:
+        return
+    posiciones = np.arange(len(estadisticas))
+    lineas = {'color': '.25', 'linewidth': 1.25}
+    partes = ax.bxp(estadisticas, positions=posiciones, widths=0.8, patch_artist=True, manage_ticks=False,
+                    boxprops={'edgecolor': '.25', 'linewidth': 1.25}, whiskerprops=lineas, capprops=lineas, medianprops=lineas,
+                    flierprops={'marker': 'd', 'markerfacecolor': '.25', 'markeredgecolor': '.25', 'markersize': 5})
+    for caja, color in zip(partes['boxes'], sns.color_palette(paleta, len(estadisticas))):
+        caja.set_facecolor(sns.desaturate(color, 0.75))
+    ax.set_xticks(posiciones, [estadistica['label'] for estadistica in estadisticas])
+    ax.set_xlim(-0.5, len(estadisticas) - 0.5)
+
+
+# Función para dibujar un histograma ya contado (conteos y bordes de los intervalos, p. ej. de
+# distribuciones.histograma_fechas), con el aspecto de sns.histplot
+def graficar_histograma(ax, conteos, bordes, color='blue'):
+    if len(conteos) == 0:
+        return
+    ax.bar(bordes[:-1], conteos, width=np.diff(bordes), align='edge', color=color, alpha=0.75,
+           edgecolor='white', linewidth=0.5)
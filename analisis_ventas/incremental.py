@@ -0,0 +1,290 @@
+"""Historial de ventas acumulado por entregas: cada archivo nuevo se suma a los totales guardados sin releer el historial."""
+
+import argparse
+import os
+import pickle
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from analisis_ventas.abc import UMBRALES_ABC, clasificar_abc
+from analisis_ventas.agregados import AgregadosVentas
+from analisis_ventas.ingesta import COLUMNA_MES, COLUMNAS_VENTAS, leer_ventas
+from analisis_ventas.pronosticos import PASOS_PRONOSTICO, series_mensuales
+
+
+CARPETA_HISTORIAL = os.environ.get('ANALISIS_HISTORIAL',
+                                   os.path.join(os.path.expanduser('~'), '.analisis_ventas', 'historial'))
+
+# Columna opcional con el número de línea dentro del pedido. Si el archivo no la trae, cada línea
+# se identifica por su contenido (pedido, fecha, cliente, producto, cantidades e importes) y por
+# cuántas líneas idénticas la preceden en el archivo, así un pedido repartido entre dos entregas
+# no pierde líneas y uno que se vuelve a exportar completo no se suma dos veces.
+COLUMNA_LINEA = 'Linea'
+
+# Dimensiones con series mensuales guardadas y pronósticos que se actualizan con cada entrega
+DIMENSIONES_PRONOSTICO = ('Descripcion', 'Cliente')
+
+# Subcarpetas con un archivo por mes (AAAAMM)
+CARPETAS_MES = ('lineas', 'pedidos', 'mensuales')
+
+
+class HistorialVentas:
+    # Totales acumulados de todas las entregas en una carpeta:
+    # - estado.pkl: los totales por dimensión, día y mes (AgregadosVentas) y el número de pedidos;
+    # - lineas/AAAAMM.npy: las huellas de las líneas ya sumadas de cada mes, ordenadas;
+    # - pedidos/AAAAMM.npy: las huellas de los pedidos distintos de cada mes, ordenadas;
+    # - mensuales/AAAAMM.pkl: las ventas del mes de cada producto y cliente (para sus pronósticos).
+    # Una entrega solo lee y reescribe los archivos de los meses que trae, y el estado solo crece
+    # con el número de entidades y de días, así que el costo de agregarla depende del tamaño de la
+    # entrega, no de las filas del historial. Las líneas repetidas (mismo pedido y línea en el
+    # mismo mes) no se vuelven a sumar. Un pedido se cuenta en el mes de su fecha.
+
+    def __init__(self, carpeta=CARPETA_HISTORIAL):
+        self.carpeta = carpeta
+        for subcarpeta in CARPETAS_MES:
+            os.makedirs(os.path.join(carpeta, subcarpeta), exist_ok=True)
+        self._cerrojo = threading.Lock()
+        self._estado = None
+        self._modificado = None
+
+    @property
+    def ruta_estado(self):
+        return os.path.join(self.carpeta, 'estado.pkl')
+
+    # Estado guardado, releído si otro proceso agregó una entrega desde la última lectura
+    def _leer_estado(self):
+        try:
+            modificado = os.path.getmtime(self.ruta_estado)
+        except OSError:
+            modificado = None
+        if self._estado is None or modificado != self._modificado:
+            if modificado is None:
+                self._estado = {'agregados': AgregadosVentas(pedidos=False), 'entregas': 0}
+            else:
+                with open(self.ruta_estado, 'rb') as archivo:
+                    self._estado = pickle.load(archivo)
+            self._modificado = modificado
+        return self._estado
+
+    # Totales acumulados por dimensión, día y mes
+    @property
+    def agregados(self):
+        return self._leer_estado()['agregados']
+
+    def __len__(self):
+        return self.agregados.filas
+
+    # Función para agregar una entrega (DataFrame normalizado) al historial. Con `almacen`
+    # (AlmacenModelos) se actualizan los pronósticos de los productos y clientes de la entrega.
+    # Devuelve un resumen: filas, nuevas, duplicadas, meses tocados, entidades con ventas nuevas
+    # por dimensión y los contadores de los pronósticos.
+    def agregar(self, entrega, almacen=None, pasos=PASOS_PRONOSTICO, procesos=None):
+        with self._cerrojo:
+            estado = self._leer_estado()
+            claves = huellas_lineas(entrega)
+            meses = entrega[COLUMNA_MES].to_numpy()
+            # Dentro de la misma entrega también se queda la primera aparición de cada línea
+            nuevas = np.zeros(len(entrega), dtype=bool)
+            nuevas[np.unique(claves, return_index=True)[1]] = True
+            vistas = {}
+            for mes in np.unique(meses):
+                del_mes = meses == mes
+                anteriores = self._leer_huellas('lineas', mes)
+                nuevas[del_mes] &= ~np.isin(claves[del_mes], anteriores)
+                vistas[int(mes)] = np.union1d(anteriores, claves[del_mes & nuevas])
+            filas_nuevas = entrega[nuevas]
+
+            afectadas = {}
+            if len(filas_nuevas):
+                estado['agregados'].agregar_bloque(filas_nuevas)
+                pedidos = self._sumar_pedidos(estado, filas_nuevas)
+                mensuales = self._sumar_mensuales(filas_nuevas, afectadas)
+                estado['entregas'] += 1
+                # Cada archivo se reemplaza completo; las huellas de las líneas van al final
+                _guardar(self.ruta_estado, lambda ruta: _escribir_pickle(estado, ruta))
+                self._modificado = os.path.getmtime(self.ruta_estado)
+                for mes, huellas in pedidos.items():
+                    _guardar(self._ruta_mes('pedidos', mes), lambda ruta, huellas=huellas: _escribir_npy(huellas, ruta))
+                for mes, ventas in mensuales.items():
+                    _guardar(self._ruta_mes('mensuales', mes), lambda ruta, ventas=ventas: _escribir_pickle(ventas, ruta))
+                for mes, huellas in vistas.items():
+                    _guardar(self._ruta_mes('lineas', mes), lambda ruta, huellas=huellas: _escribir_npy(huellas, ruta))
+
+            pronosticos = {}
+            if almacen is not None:
+                pronosticos = self.actualizar_pronosticos(almacen, afectadas, pasos, procesos)
+
+        return {
+            'filas': len(entrega),
+            'nuevas': len(filas_nuevas),
+            'duplicadas': len(entrega) - len(filas_nuevas),
+            'meses': sorted(vistas),
+            'entidades': {dimension: len(entidades) for dimension, entidades in afectadas.items()},
+            'pronosticos': pronosticos,
+        }
+
+    # Función para sumar al número de pedidos del estado los de las filas nuevas que no estaban en su
+    # mes. Devuelve las huellas de pedidos de cada mes tocado, para guardarlas.
+    def _sumar_pedidos(self, estado, filas):
+        if 'NoPedidoStr' not in filas.columns:
+            return {}
+        claves = pd.util.hash_pandas_object(filas['NoPedidoStr'].astype(str), index=False).to_numpy()
+        meses = filas[COLUMNA_MES].to_numpy()
+        vistos = {}
+        for mes in np.unique(meses):
+            anteriores = self._leer_huellas('pedidos', mes)
+            vistos[int(mes)] = np.union1d(anteriores, claves[meses == mes])
+            estado['agregados'].num_pedidos += len(vistos[int(mes)]) - len(anteriores)
+        return vistos
+
+    # Función para sumar las ventas de las filas nuevas a las de cada producto y cliente en cada mes
+    # tocado. Anota en `afectadas` las entidades con ventas por dimensión y devuelve los meses a guardar.
+    def _sumar_mensuales(self, filas, afectadas):
+        dimensiones = [dimension for dimension in DIMENSIONES_PRONOSTICO if dimension in filas.columns]
+        meses = {}
+        for dimension in dimensiones:
+            parcial = filas.groupby([COLUMNA_MES, dimension], observed=True)['Total Vendido'].sum()
+            for mes, ventas in parcial.groupby(level=0):
+                ventas = pd.Series(ventas.to_numpy(), index=pd.Index(ventas.index.get_level_values(1).astype(object),
+                                                                      name=dimension), name='Total Vendido')
+                if int(mes) not in meses:
+                    meses[int(mes)] = self._leer_mensuales(mes)
+                acumulado = meses[int(mes)].get(dimension)
+                meses[int(mes)][dimension] = ventas if acumulado is None else acumulado.add(ventas, fill_value=0)
+            afectadas[dimension] = pd.Index(parcial.index.get_level_values(1).unique().astype(object))
+        return meses
+
+    # Función para las series mensuales de las entidades indicadas de una dimensión (todas si no se indican)
+    def series(self, dimension, entidades=None):
+        partes = []
+        for nombre in sorted(os.listdir(os.path.join(self.carpeta, 'mensuales'))):
+            if not nombre.endswith('.pkl'):
+                continue
+            ventas = self._leer_mensuales(os.path.splitext(nombre)[0]).get(dimension)
+            if ventas is None:
+                continue
+            if entidades is not None:
+                ventas = ventas[ventas.index.isin(entidades)]
+            partes.append(ventas.reset_index().assign(**{COLUMNA_MES: int(os.path.splitext(nombre)[0])}))
+        if not partes:
+            return {}
+        return series_mensuales(pd.concat(partes, ignore_index=True), dimension)
+
+    # Función para actualizar en el almacén de modelos los pronósticos de las entidades indicadas
+    # ({dimensión: entidades}); las demás series no cambiaron y conservan su modelo.
+    def actualizar_pronosticos(self, almacen, entidades, pasos=PASOS_PRONOSTICO, procesos=None):
+        from analisis_ventas.almacen_modelos import pronosticar_con_almacen
+
+        contadores = {}
+        for dimension, afectadas in entidades.items():
+            if len(afectadas):
+                _, contadores[dimension] = pronosticar_con_almacen(
+                    self.series(dimension, afectadas), dimension, almacen, pasos, procesos)
+        return contadores
+
+    # Función para clasificar en A, B y C las entidades de una dimensión con los totales acumulados
+    def abc(self, columna, umbrales=UMBRALES_ABC):
+        return clasificar_abc(self.agregados.totales_por(columna)['Total Vendido'].rename_axis(columna), columna,
+                              umbrales=umbrales)
+
+    # Función para borrar el historial (totales y archivos de cada mes)
+    def borrar(self):
+        with self._cerrojo:
+            for subcarpeta in CARPETAS_MES:
+                carpeta_mes = os.path.join(self.carpeta, subcarpeta)
+                for nombre in os.listdir(carpeta_mes):
+                    _borrar(os.path.join(carpeta_mes, nombre))
+            _borrar(self.ruta_estado)
+            self._estado = None
+            self._modificado = None
+
+    def _ruta_mes(self, subcarpeta, mes):
+        extension = 'pkl' if subcarpeta == 'mensuales' else 'npy'
+        return os.path.join(self.carpeta, subcarpeta, f'{int(mes)}.{extension}')
+
+    def _leer_huellas(self, subcarpeta, mes):
+        ruta = self._ruta_mes(subcarpeta, mes)
+        if not os.path.exists(ruta):
+            return np.array([], dtype='uint64')
+        return np.load(ruta)
+
+    def _leer_mensuales(self, mes):
+        ruta = self._ruta_mes('mensuales', mes)
+        if not os.path.exists(ruta):
+            return {}
+        with open(ruta, 'rb') as archivo:
+            return pickle.load(archivo)
+
+
+# Función para calcular la huella de cada línea de venta: número de pedido y número de línea
+# (la columna 'Linea' o, si no está, el contenido de la línea y su repetición dentro del archivo)
+def huellas_lineas(df):
+    if COLUMNA_LINEA in df.columns:
+        claves = pd.DataFrame({'pedido': df['NoPedidoStr'].astype(str).to_numpy(),
+                               'linea': df[COLUMNA_LINEA].astype(str).to_numpy()})
+    else:
+        columnas = ['NoPedidoStr'] + [columna for columna in COLUMNAS_VENTAS if columna in df.columns and columna != 'NoPedidoStr']
+        contenido = pd.util.hash_pandas_object(df[columnas], index=False).to_numpy()
+        repeticion = pd.Series(contenido).groupby(contenido, sort=False).cumcount().to_numpy()
+        claves = pd.DataFrame({'contenido': contenido, 'repeticion': repeticion})
+    return pd.util.hash_pandas_object(claves, index=False).to_numpy()
+
+
+# Función para escribir un archivo de forma atómica: otro proceso nunca ve un archivo a medias
+def _guardar(ruta, escribir):
+    temporal = f'{ruta}.{uuid.uuid4().hex}.tmp'
+    try:
+        escribir(temporal)
+        os.replace(temporal, ruta)
+    finally:
+        _borrar(temporal)
+
+
+def _escribir_pickle(objeto, ruta):
+    with open(ruta, 'wb') as archivo:
+        pickle.dump(objeto, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _escribir_npy(arreglo, ruta):
+    with open(ruta, 'wb') as archivo:
+        np.save(archivo, arreglo)
+
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
+
+
+# Uso diario: python -m analisis_ventas.incremental entrega.csv [--historial carpeta] [--sin-pronosticos]
+# Suma la entrega al historial y actualiza los pronósticos de los productos y clientes que trae.
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description='Agrega una entrega de ventas al historial acumulado.')
+    parser.add_argument('archivos', nargs='+', help='Archivos de la entrega (CSV o XLSX), en orden')
+    parser.add_argument('--historial', default=CARPETA_HISTORIAL, help='Carpeta del historial')
+    parser.add_argument('--almacen', default=None, help='Ruta del almacén de modelos (por defecto ANALISIS_MODELOS)')
+    parser.add_argument('--sin-pronosticos', action='store_true', help='Solo actualiza los totales')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos para los ajustes (por defecto, todos los núcleos)')
+    argumentos = parser.parse_args(argumentos)
+
+    historial = HistorialVentas(argumentos.historial)
+    almacen = None
+    if not argumentos.sin_pronosticos:
+        from analisis_ventas.almacen_modelos import RUTA_ALMACEN, AlmacenModelos
+        almacen = AlmacenModelos(argumentos.almacen or RUTA_ALMACEN)
+    for ruta in argumentos.archivos:
+        resumen = historial.agregar(leer_ventas(ruta), almacen, procesos=argumentos.procesos)
+        print(f"{ruta}: {resumen['nuevas']:,} líneas nuevas, {resumen['duplicadas']:,} repetidas, "
+              f"{len(resumen['meses'])} meses")
+        for dimension, contadores in resumen['pronosticos'].items():
+            print(f"  {dimension}: {contadores['reutilizados']} reutilizados, "
+                  f"{contadores['reajustados']} reajustados, {contadores['nuevos']} nuevos")
+    print(f"Historial: {len(historial):,} líneas en {historial.carpeta}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""Índice por archivo para resolver los filtros de la barra lateral sin copias intermedias."""
+
+import numpy as np
+import pandas as pd
+
+from analisis_ventas.ingesta import COLUMNA_FECHA, resolver_filtros
+
+
+# Columnas con índice de filas por categoría
+COLUMNAS_INDICE = ['Localidad Nombre', 'Cliente', 'Vendedor', 'Condicion Pago', 'Descripcion']
+
+
+class IndiceVentas:
+    # Índice de solo lectura sobre el DataFrame normalizado:
+    # - las posiciones de fila ordenadas por fecha, para buscar rangos con búsqueda binaria;
+    # - por cada columna categórica, las posiciones de fila de cada categoría (forma
+    #   compacta de un mapa de bits: una lista ordenada de filas por valor).
+    # Los filtros se resuelven intersectando esas listas y se devuelve una sola
+    # selección de filas, sin crear DataFrames intermedios.
+
+    def __init__(self, df, columnas=COLUMNAS_INDICE):
+        self.filas = len(df)
+        fechas = df[COLUMNA_FECHA].to_numpy(dtype='datetime64[ns]')
+        self._orden_fechas = np.argsort(fechas, kind='stable')
+        self._fechas_ordenadas = fechas[self._orden_fechas]
+        self._fechas = fechas
+        self._columnas = {}
+        for columna in columnas:
+            if columna in df.columns and isinstance(df[columna].dtype, pd.CategoricalDtype):
+                self._columnas[columna] = _MapaCategorias(df[columna])
+
+    # Función para obtener las filas dentro de un rango de fechas (ambos extremos incluidos)
+    def filas_rango_fechas(self, fecha_inicio=None, fecha_fin=None):
+        inicio = 0
+        fin = self.filas
+        if fecha_inicio is not None:
+            inicio = np.searchsorted(self._fechas_ordenadas, np.datetime64(pd.Timestamp(fecha_inicio), 'ns'), side='left')
+        if fecha_fin is not None:
+            fin = np.searchsorted(self._fechas_ordenadas, np.datetime64(pd.Timestamp(fecha_fin), 'ns'), side='right')
+        return np.sort(self._orden_fechas[inicio:fin])
+
+    # Función para obtener las filas de un valor de una columna indexada
+    def filas_valor(self, columna, valor):
+        return self._columnas[columna].filas(valor)
+
+    # Función para obtener los valores con filas de una columna indexada, en orden de aparición en el
+    # archivo (el mismo de unique()), sin recorrer las filas. Son las opciones de la barra lateral.
+    def valores(self, columna):
+        return self._columnas[columna].etiquetas()
+
+    # Función para resolver todos los filtros en una sola selección de posiciones de fila (ordenadas).
+    # Los valores 'Todas'/'Todos' o None no filtran; devuelve None si no hay ningún filtro activo.
+    def seleccionar(self, fecha_inicio=None, fecha_fin=None, mes=None, **igualdades):
+        if mes is not None:
+            inicio_mes = pd.Timestamp(year=int(mes) // 100, month=int(mes) % 100, day=1)
+            fin_mes = inicio_mes + pd.offsets.MonthBegin(1) - pd.Timedelta(1, 'ns')
+            fecha_inicio = inicio_mes if fecha_inicio is None else max(pd.Timestamp(fecha_inicio), inicio_mes)
+            fecha_fin = fin_mes if fecha_fin is None else min(pd.Timestamp(fecha_fin), fin_mes)
+
+        condiciones = []
+        for columna, valor in resolver_filtros(igualdades).items():
+            if valor is None or valor in ('Todas', 'Todos'):
+                continue
+            if columna not in self._columnas:
+                raise KeyError(f"La columna '{columna}' no está indexada.")
+            condiciones.append(('valor', columna, valor, self._columnas[columna].conteo(valor)))
+        if fecha_inicio is not None or fecha_fin is not None:
+            condiciones.append(('fechas', fecha_inicio, fecha_fin, self._conteo_fechas(fecha_inicio, fecha_fin)))
+        if not condiciones:
+            return None
+
+        # Se parte de la condición más selectiva y las demás se comprueban solo sobre esas filas
+        condiciones.sort(key=lambda condicion: condicion[3])
+        primera = condiciones[0]
+        if primera[0] == 'valor':
+            filas = self.filas_valor(primera[1], primera[2])
+        else:
+            filas = self.filas_rango_fechas(primera[1], primera[2])
+        for tipo, a, b, _ in condiciones[1:]:
+            if len(filas) == 0:
+                break
+            if tipo == 'valor':
+                filas = filas[self._columnas[a].contiene(filas, b)]
+            else:
+                fechas = self._fechas[filas]
+                mascara = np.ones(len(filas), dtype=bool)
+                if a is not None:
+                    mascara &= fechas >= np.datetime64(pd.Timestamp(a), 'ns')
+                if b is not None:
+                    mascara &= fechas <= np.datetime64(pd.Timestamp(b), 'ns')
+                filas = filas[mascara]
+        return filas
+
+    # Función para aplicar los filtros a un DataFrame con una sola copia
+    def filtrar(self, df, **filtros):
+        filas = self.seleccionar(**filtros)
+        if filas is None:
+            return df
+        return df.iloc[filas]
+
+    def _conteo_fechas(self, fecha_inicio, fecha_fin):
+        inicio = 0 if fecha_inicio is None else np.searchsorted(
+            self._fechas_ordenadas, np.datetime64(pd.Timestamp(fecha_inicio), 'ns'), side='left')
+        fin = self.filas if fecha_fin is None else np.searchsorted(
+            self._fechas_ordenadas, np.datetime64(pd.Timestamp(fecha_fin), 'ns'), side='right')
+        return max(fin - inicio, 0)
+
+
+class _MapaCategorias:
+    # Posiciones de fila agrupadas por código de categoría (formato CSR)
+
+    def __init__(self, serie):
+        self.categorias = serie.cat.categories
+        self.codigos = serie.cat.codes.to_numpy()
+        self._orden = np.argsort(self.codigos, kind='stable')
+        conteos = np.bincount(self.codigos[self.codigos >= 0], minlength=len(self.categorias))
+        # Las filas sin valor (código -1) quedan al inicio del orden y se saltan
+        self._inicio_validos = int((self.codigos < 0).sum())
+        self._limites = np.concatenate([[0], np.cumsum(conteos)]) + self._inicio_validos
+        # Códigos con filas ordenados por su primera fila (el orden es estable: la primera es la del límite)
+        con_filas = np.flatnonzero(conteos)
+        self._presentes = con_filas[np.argsort(self._orden[self._limites[con_filas]], kind='stable')]
+
+    def etiquetas(self):
+        return self.categorias.take(self._presentes)
+
+    def codigo(self, valor):
+        posicion = self.categorias.get_indexer([valor])[0]
+        return int(posicion)
+
+    def conteo(self, valor):
+        codigo = self.codigo(valor)
+        if codigo < 0:
+            return 0
+        return int(self._limites[codigo + 1] - self._limites[codigo])
+
+    def filas(self, valor):
+        codigo = self.codigo(valor)
+        if codigo < 0:
+            return np.array([], dtype=self._orden.dtype)
+        return self._orden[self._limites[codigo]:self._limites[codigo + 1]]
+
+    def contiene(self, filas, valor):
+        return self.codigos[filas] == self.codigo(valor)
@@ -0,0 +1,214 @@
+"""Ingesta de archivos de ventas: lectura con esquema explícito y normalización."""
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_DISPONIBLE = True
+except ImportError:
+    PYARROW_DISPONIBLE = False
+
+
+# Columnas de texto repetidas en cada línea: se guardan como categorías
+COLUMNAS_CATEGORICAS = ['Cliente', 'Vendedor', 'Descripcion', 'Localidad Nombre', 'Condicion Pago']
+
+# Columnas numéricas y su tipo compacto. 'Total Vendido' se deja en float64
+# porque los KPIs suman millones de filas y en float32 se pierden centavos.
+COLUMNAS_NUMERICAS = {
+    'Cantidad': 'float32',
+    'Precio': 'float32',
+    'Descuento': 'float32',
+    'Total Vendido': 'float64',
+}
+
+COLUMNA_FECHA = 'FechaPedidoServerN'
+COLUMNA_MES = 'MesClave'  # Mes como entero AAAAMM (p. ej. 202405)
+FORMATO_FECHA = '%d/%m/%Y'
+
+# Columnas que usa el tablero; del Excel no se lee ninguna otra
+COLUMNAS_VENTAS = ['Cliente', 'Vendedor', 'Descripcion', 'Cantidad', 'Precio', 'Descuento', 'Total Vendido',
+                   COLUMNA_FECHA, 'NoPedidoStr', 'Localidad Nombre', 'Condicion Pago']
+
+
+# Tipos declarados para la lectura del CSV. La fecha se lee como categoría para
+# convertir cada texto distinto una sola vez en lugar de una vez por fila.
+ESQUEMA_CSV = {
+    **{columna: 'category' for columna in COLUMNAS_CATEGORICAS},
+    **COLUMNAS_NUMERICAS,
+    COLUMNA_FECHA: 'category',
+    'NoPedidoStr': 'str',
+}
+
+
+# Función para leer un archivo CSV o XLSX y devolver el DataFrame normalizado
+def leer_ventas(archivo, motor='auto'):
+    return normalizar_ventas(leer_crudo(archivo, motor))
+
+
+# Función para leer un archivo CSV o XLSX con el esquema explícito, sin normalizar (fechas sin
+# convertir ni clave de mes). Es el primer paso de leer_ventas; se usa por separado para medirlo.
+def leer_crudo(archivo, motor='auto'):
+    nombre = getattr(archivo, 'name', str(archivo))
+    if nombre.endswith('.csv'):
+        return _leer_csv(archivo, motor)
+    if nombre.endswith('.xlsx'):
+        return leer_xlsx(archivo)
+    raise ValueError("Tipo de archivo no soportado. Por favor, carga un archivo CSV o XLSX.")
+
+
+def _leer_csv(archivo, motor):
+    if motor == 'auto':
+        motor = 'pyarrow' if PYARROW_DISPONIBLE else 'c'
+    if motor == 'pyarrow':
+        try:
+            return pd.read_csv(archivo, engine='pyarrow', dtype=ESQUEMA_CSV)
+        except (ValueError, TypeError):
+            # Si pyarrow no acepta el archivo o el esquema, se vuelve al lector de C
+            if hasattr(archivo, 'seek'):
+                archivo.seek(0)
+    return pd.read_csv(archivo, dtype=ESQUEMA_CSV)
+
+
+# Función para leer la primera hoja de un XLSX en modo de solo lectura (openpyxl la recorre
+# fila a fila sin cargar el libro completo) y solo con las columnas indicadas.
+# Las columnas de la hoja que no están en `columnas` no se convierten; las que faltan se omiten.
+def leer_xlsx(archivo, columnas=COLUMNAS_VENTAS):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        hoja = libro.worksheets[0]
+        filas = hoja.iter_rows(values_only=True)
+        encabezado = next(filas, ())
+        posiciones = {nombre: i for i, nombre in enumerate(encabezado) if nombre in columnas}
+        if not posiciones:
+            return pd.DataFrame()
+        # Solo se recorre el rango de columnas que contiene a las pedidas
+        primera, ultima = min(posiciones.values()), max(posiciones.values())
+        filas = hoja.iter_rows(min_row=2, min_col=primera + 1, max_col=ultima + 1, values_only=True)
+        valores = list(zip(*filas)) or [()] * (ultima - primera + 1)
+    finally:
+        libro.close()
+
+    datos = {}
+    for nombre in columnas:
+        if nombre not in posiciones:
+            continue
+        columna = valores[posiciones[nombre] - primera]
+        if nombre in COLUMNAS_NUMERICAS:
+            datos[nombre] = pd.to_numeric(pd.Series(columna, dtype=object), errors='coerce').astype(COLUMNAS_NUMERICAS[nombre])
+        elif nombre == 'NoPedidoStr':
+            datos[nombre] = pd.Series(columna, dtype=object).astype(str)
+        else:
+            # Categorías directamente: cada texto (o fecha) distinto se guarda una sola vez
+            datos[nombre] = pd.Categorical(columna)
+    return pd.DataFrame(datos)
+
+
+# Función para dejar el DataFrame con tipos compactos, fechas convertidas y la clave de mes
+def normalizar_ventas(df):
+    df = df.copy()
+
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in df.columns and not isinstance(df[columna].dtype, pd.CategoricalDtype):
+            df[columna] = df[columna].astype('category')
+
+    for columna, tipo in COLUMNAS_NUMERICAS.items():
+        if columna in df.columns:
+            df[columna] = pd.to_numeric(df[columna], errors='coerce').astype(tipo)
+
+    # La cantidad se deja entera cuando todos los valores lo son
+    if 'Cantidad' in df.columns:
+        cantidad = df['Cantidad']
+        if cantidad.notna().all() and (cantidad == np.floor(cantidad)).all() and cantidad.abs().max() < 2**31:
+            df['Cantidad'] = cantidad.astype('int32')
+
+    if 'NoPedidoStr' in df.columns:
+        df['NoPedidoStr'] = df['NoPedidoStr'].astype(str)
+
+    if COLUMNA_FECHA in df.columns:
+        df[COLUMNA_FECHA] = convertir_fechas(df[COLUMNA_FECHA])
+        # Eliminar filas sin fecha válida
+        df = df[df[COLUMNA_FECHA].notna()].reset_index(drop=True)
+        fechas = df[COLUMNA_FECHA].dt
+        df[COLUMNA_MES] = (fechas.year * 100 + fechas.month).astype('int32')
+
+    return df
+
+
+# Función para convertir la columna de fechas una sola vez por valor distinto
+def convertir_fechas(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype('category')
+    categorias = serie.cat.categories
+    if pd.api.types.is_datetime64_any_dtype(categorias):
+        fechas = pd.DatetimeIndex(categorias)
+    else:
+        textos = categorias.astype(str)
+        fechas = pd.to_datetime(textos, format=FORMATO_FECHA, errors='coerce')
+        # Valores que no siguen dd/mm/aaaa (p. ej. fechas de Excel exportadas como texto ISO)
+        pendientes = np.asarray(fechas.isna())
+        if pendientes.any():
+            restantes = textos[pendientes]
+            alternativas = pd.to_datetime(restantes, format='ISO8601', errors='coerce')
+            faltantes = np.asarray(alternativas.isna())
+            if faltantes.any():
+                valores_alt = alternativas.to_numpy().copy()
+                valores_alt[faltantes] = pd.to_datetime(restantes[faltantes], errors='coerce', dayfirst=True).to_numpy()
+                alternativas = pd.DatetimeIndex(valores_alt)
+            valores = fechas.to_numpy().copy()
+            valores[pendientes] = alternativas.to_numpy()
+            fechas = pd.DatetimeIndex(valores)
+    codigos = serie.cat.codes.to_numpy()
+    valores = fechas.to_numpy().astype('datetime64[ns]')
+    resultado = np.where(codigos >= 0, valores[codigos], np.datetime64('NaT'))
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+
+# Función para obtener las etiquetas con filas de una columna categórica en orden de aparición (como
+# unique()), buscando entre los códigos enteros: solo se decodifica una etiqueta por valor distinto
+def etiquetas_presentes(serie):
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        return pd.Index(serie.unique())
+    codigos = serie.cat.codes.to_numpy()
+    return serie.cat.categories.take(pd.unique(codigos[codigos >= 0]))
+
+
+# Función para dejar en las columnas categóricas de una tabla solo las etiquetas de sus filas. Se usa
+# con las filas que se muestran: Streamlit envía al navegador el diccionario completo de cada columna
+# categórica, y sin esto las 10 filas de un top llevarían los textos de todos los clientes o productos.
+def compactar_etiquetas(tabla):
+    categoricas = [columna for columna in tabla.columns if isinstance(tabla[columna].dtype, pd.CategoricalDtype)]
+    if not categoricas:
+        return tabla
+    return tabla.assign(**{columna: tabla[columna].cat.remove_unused_categories() for columna in categoricas})
+
+
+# Nombres cortos aceptados en los filtros para cada columna
+ALIAS_COLUMNAS = {
+    'localidad': 'Localidad Nombre',
+    'condicion_pago': 'Condicion Pago',
+    'cliente': 'Cliente',
+    'vendedor': 'Vendedor',
+    'producto': 'Descripcion',
+}
+
+
+# Función para traducir los filtros por nombre corto (localidad=, cliente=, ...) a nombres de columna
+def resolver_filtros(igualdades):
+    return {ALIAS_COLUMNAS.get(nombre, nombre): valor for nombre, valor in igualdades.items()}
+
+
+# Función para convertir el texto de un mes 'AAAA-MM' a la clave entera AAAAMM
+def mes_a_clave(mes):
+    anio, numero = str(mes).split('-')[:2]
+    return int(anio) * 100 + int(numero)
+
+
+# Función para convertir la clave entera AAAAMM al texto 'AAAA-MM'
+def clave_a_mes(clave):
+    clave = int(clave)
+    return f'{clave // 100:04d}-{clave % 100:02d}'
@@ -0,0 +1,135 @@
+"""Gráficos de dispersión interactivos (Plotly WebGL) con los puntos reducidos en el servidor."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+# Puntos que se envían al navegador como máximo por gráfico. Con más filas los puntos se agregan
+# en una cuadrícula (una marca por celda ocupada, en el centro de sus filas y con su conteo).
+MAX_PUNTOS = int(os.environ.get('ANALISIS_MAX_PUNTOS', '20000'))
+
+# Categorías con color propio en la leyenda; las demás se juntan en una sola serie
+MAX_SERIES = 10
+ETIQUETA_OTROS = 'Otros'
+
+# Diámetro en píxeles de las marcas más pequeña y más grande cuando el tamaño depende de una medida
+TAMANOS_MARCA = (5, 18)
+
+
+# Función para convertir una columna en números para la cuadrícula; las fechas pasan a nanosegundos
+def _a_numeros(valores):
+    valores = np.asarray(valores)
+    if np.issubdtype(valores.dtype, np.datetime64):
+        return valores.astype('datetime64[ns]').astype('int64').astype('float64'), True
+    return valores.astype('float64'), False
+
+
+# Función para reducir a lo sumo `maximo` puntos. Si hay más filas que `maximo` se agregan en una
+# cuadrícula de unas raíz(maximo) x raíz(maximo) celdas: cada celda ocupada queda como un punto en el
+# promedio de sus filas, con el número de filas y la suma de `pesos`. Devuelve un DataFrame con
+# las columnas x, y, filas y peso.
+def reducir_puntos(x, y, maximo=MAX_PUNTOS, pesos=None):
+    x_num, x_fecha = _a_numeros(x)
+    y_num, _ = _a_numeros(y)
+    pesos = np.ones(len(x_num)) if pesos is None else np.asarray(pesos, dtype='float64')
+    validos = np.isfinite(x_num) & np.isfinite(y_num)
+    if not validos.all():
+        x_num, y_num, pesos = x_num[validos], y_num[validos], pesos[validos]
+
+    if len(x_num) <= maximo:
+        puntos = pd.DataFrame({'x': x_num, 'y': y_num, 'filas': 1, 'peso': pesos})
+    else:
+        lado = max(1, int(np.sqrt(maximo)))
+        columna = _celda(x_num, lado)
+        fila = _celda(y_num, lado)
+        celdas, codigos = np.unique(columna * lado + fila, return_inverse=True)
+        filas = np.bincount(codigos, minlength=len(celdas))
+        puntos = pd.DataFrame({
+            'x': np.bincount(codigos, weights=x_num, minlength=len(celdas)) / filas,
+            'y': np.bincount(codigos, weights=y_num, minlength=len(celdas)) / filas,
+            'filas': filas,
+            'peso': np.bincount(codigos, weights=pesos, minlength=len(celdas)),
+        })
+    if x_fecha:
+        puntos['x'] = pd.to_datetime(puntos['x'].round().astype('int64'))
+    return puntos
+
+
+# Función para el número de celda (0 a lado - 1) de cada valor en una cuadrícula de `lado` celdas
+def _celda(valores, lado):
+    minimo, maximo = valores.min(), valores.max()
+    if maximo <= minimo:
+        return np.zeros(len(valores), dtype='int64')
+    return np.minimum(((valores - minimo) / (maximo - minimo) * lado).astype('int64'), lado - 1)
+
+
+# Función para separar las filas por categoría: las `max_series` con más peso (o más filas)
+# conservan su nombre y las demás van a 'Otros'. Devuelve [(nombre, máscara de filas)].
+def _series_por_color(categorias, pesos=None, max_series=MAX_SERIES):
+    categorias = pd.Series(pd.Categorical(categorias))
+    totales = (categorias.value_counts() if pesos is None
+               else pd.Series(np.asarray(pesos, dtype='float64')).groupby(categorias, observed=True).sum())
+    principales = list(totales.nlargest(max_series).index)
+    codigos = categorias.cat.codes.to_numpy()
+    posiciones = categorias.cat.categories.get_indexer(principales)
+    series = [(str(nombre), codigos == posicion) for nombre, posicion in zip(principales, posiciones)]
+    resto = ~np.isin(codigos, posiciones)
+    if resto.any():
+        series.append((ETIQUETA_OTROS, resto))
+    return series
+
+
+# Función para construir un gráfico de dispersión Scattergl con los puntos ya reducidos.
+# `color` separa una serie por categoría (como hue en seaborn) y `tamano` es la columna que da
+# el tamaño de las marcas; en modo agregado el tamaño es la suma de esa columna (o las filas) por celda.
+# El número de puntos enviados no pasa de `maximo` sin importar cuántas filas tenga `df`.
+def dispersion_interactiva(df, x, y, color=None, tamano=None, titulo=None, etiquetas=None,
+                           maximo=MAX_PUNTOS, max_series=MAX_SERIES):
+    etiquetas = etiquetas or {}
+    pesos = df[tamano].to_numpy(dtype='float64') if tamano else None
+    if color:
+        series = _series_por_color(df[color], pesos, max_series)
+    else:
+        series = [(None, np.ones(len(df), dtype=bool))]
+    maximo_serie = max(1, maximo // len(series))
+    valores_x, valores_y = df[x].to_numpy(), df[y].to_numpy()
+    agregado = any(filas.sum() > maximo_serie for _, filas in series)
+
+    reducidas = []
+    for nombre, filas in series:
+        puntos = reducir_puntos(valores_x[filas], valores_y[filas], maximo_serie,
+                                pesos[filas] if pesos is not None else None)
+        reducidas.append((nombre, puntos))
+
+    # Tamaño de las marcas con la misma escala para todas las series
+    medida = 'peso' if tamano else 'filas'
+    tope = max((puntos[medida].max() for _, puntos in reducidas if len(puntos)), default=0)
+    escalar = (tamano or agregado) and tope > 0
+
+    fig = go.Figure()
+    for nombre, puntos in reducidas:
+        if escalar:
+            proporcion = np.sqrt(np.clip(puntos[medida].to_numpy(), 0, None) / tope)
+            tamanos = TAMANOS_MARCA[0] + proporcion * (TAMANOS_MARCA[1] - TAMANOS_MARCA[0])
+        else:
+            tamanos = TAMANOS_MARCA[0]
+        plantilla = f"{etiquetas.get(x, x)}: %{{x}}<br>{etiquetas.get(y, y)}: %{{y:,.2f}}"
+        if agregado:
+            plantilla += '<br>Filas: %{customdata[0]:,}'
+        if tamano:
+            plantilla += f"<br>{etiquetas.get(tamano, tamano)}: %{{customdata[1]:,.2f}}"
+        fig.add_trace(go.Scattergl(
+            x=puntos['x'], y=puntos['y'], mode='markers', name=nombre, showlegend=nombre is not None,
+            marker={'size': tamanos, 'opacity': 0.7},
+            customdata=np.column_stack([puntos['filas'], puntos['peso']]),
+            hovertemplate=plantilla + (f'<extra>{nombre}</extra>' if nombre is not None else '<extra></extra>'),
+        ))
+
+    if agregado:
+        titulo = f"{titulo or ''} ({len(df):,} filas agregadas)".strip()
+    fig.update_layout(title=titulo, xaxis_title=etiquetas.get(x, x), yaxis_title=etiquetas.get(y, y),
+                      legend_title_text=etiquetas.get(color, color) if color else None)
+    return fig
@@ -0,0 +1,111 @@
+"""Matrices dispersas en formato de coordenadas para cruces como producto x mes o vendedor x mes."""
+
+import numpy as np
+import pandas as pd
+
+from analisis_ventas.ingesta import COLUMNA_MES, clave_a_mes
+
+
+class MatrizDispersa:
+    # Matriz filas x columnas guardada en formato de coordenadas (COO): por cada celda con
+    # valor, el código de su fila, el de su columna y el valor. Las celdas vacías valen 0 y no
+    # ocupan memoria, y las etiquetas de filas y columnas se guardan una sola vez. Solo la parte
+    # que se muestra (p. ej. los n productos principales) se convierte en un DataFrame denso.
+    # Es de solo lectura: las cachés la comparten sin copiarla.
+
+    def __init__(self, etiquetas_filas, etiquetas_columnas, filas, columnas, valores):
+        self.etiquetas_filas = pd.Index(etiquetas_filas)
+        self.etiquetas_columnas = pd.Index(etiquetas_columnas)
+        self.filas = np.asarray(filas, dtype='int32')
+        self.columnas = np.asarray(columnas, dtype='int32')
+        self.valores = np.asarray(valores)
+
+    # Función para construir la matriz desde una tabla en formato largo (una fila por celda).
+    # Con `etiquetas_columnas` las columnas siguen ese orden e incluyen las que no tienen valores.
+    @classmethod
+    def desde_largo(cls, largo, fila, columna, medida, etiquetas_columnas=None):
+        codigos_fila, etiquetas_filas = pd.factorize(largo[fila], sort=True)
+        if etiquetas_columnas is None:
+            codigos_columna, etiquetas_columnas = pd.factorize(largo[columna], sort=True)
+        else:
+            etiquetas_columnas = pd.Index(etiquetas_columnas)
+            codigos_columna = etiquetas_columnas.get_indexer(largo[columna])
+            if (codigos_columna < 0).any():
+                raise ValueError(f"Hay valores de '{columna}' que no están entre las columnas de la matriz.")
+        valores = largo[medida].to_numpy()
+        con_valor = valores != 0
+        return cls(pd.Index(etiquetas_filas, name=fila), pd.Index(etiquetas_columnas, name=columna),
+                   codigos_fila[con_valor], codigos_columna[con_valor], valores[con_valor])
+
+    @property
+    def shape(self):
+        return len(self.etiquetas_filas), len(self.etiquetas_columnas)
+
+    def __len__(self):
+        return len(self.etiquetas_filas)
+
+    # Número de celdas con valor
+    @property
+    def celdas(self):
+        return len(self.valores)
+
+    # Función para la memoria de los arreglos de la matriz en bytes (sin las etiquetas)
+    def memoria(self):
+        return self.filas.nbytes + self.columnas.nbytes + self.valores.nbytes
+
+    # Función para obtener la misma matriz con otras columnas (p. ej. todos los meses del rango);
+    # las celdas de columnas que no están en `etiquetas_columnas` se descartan
+    def con_columnas(self, etiquetas_columnas):
+        etiquetas_columnas = pd.Index(etiquetas_columnas, name=self.etiquetas_columnas.name)
+        nuevas = etiquetas_columnas.get_indexer(self.etiquetas_columnas)[self.columnas]
+        quedan = nuevas >= 0
+        return MatrizDispersa(self.etiquetas_filas, etiquetas_columnas,
+                              self.filas[quedan], nuevas[quedan], self.valores[quedan])
+
+    # Función para sumar cada fila (Serie indexada por las etiquetas de fila)
+    def totales_filas(self):
+        return pd.Series(np.bincount(self.filas, weights=self.valores, minlength=len(self)), index=self.etiquetas_filas)
+
+    # Función para la media de cada fila en sus últimas `n` columnas
+    def media_ultimas_columnas(self, n):
+        ultimas = self.columnas >= self.shape[1] - n
+        sumas = np.bincount(self.filas[ultimas], weights=self.valores[ultimas], minlength=len(self))
+        return pd.Series(sumas / n, index=self.etiquetas_filas)
+
+    # Función para las etiquetas de las `n` filas de mayor total (o de mayor `por`, una Serie por
+    # etiqueta de fila), en el orden de las filas de la matriz
+    def principales(self, n, por=None):
+        por = self.totales_filas() if por is None else por
+        if n >= len(self):
+            return self.etiquetas_filas
+        posiciones = np.argsort(-por.to_numpy(dtype='float64'), kind='stable')[:n]
+        return self.etiquetas_filas[np.sort(posiciones)]
+
+    # Función para convertir en DataFrame denso las filas con las etiquetas indicadas (todas si no
+    # se indican), en el orden dado y con ceros en las celdas vacías
+    def a_densa(self, etiquetas=None):
+        if etiquetas is None:
+            posiciones = np.arange(len(self))
+        else:
+            posiciones = self.etiquetas_filas.get_indexer(etiquetas)
+            if (posiciones < 0).any():
+                raise KeyError('Hay filas que no están en la matriz.')
+        destino = np.full(len(self), -1, dtype='int64')
+        destino[posiciones] = np.arange(len(posiciones))
+        filas = destino[self.filas]
+        elegidas = filas >= 0
+        densa = np.zeros((len(posiciones), self.shape[1]), dtype=self.valores.dtype)
+        densa[filas[elegidas], self.columnas[elegidas]] = self.valores[elegidas]
+        return pd.DataFrame(densa, index=self.etiquetas_filas[posiciones], columns=self.etiquetas_columnas)
+
+
+# Función para construir la matriz desde los totales en formato largo de un cubo (o de una consulta
+# SQL). Las columnas de mes (claves AAAAMM) se nombran AAAA-MM.
+def matriz_desde_totales(largo, filas, columnas, medida):
+    if columnas == COLUMNA_MES:
+        meses = {clave: clave_a_mes(clave) for clave in largo[columnas].unique()}
+        largo = largo.assign(**{columnas: largo[columnas].map(meses)})
+    matriz = MatrizDispersa.desde_largo(largo, filas, columnas, medida)
+    if columnas == COLUMNA_MES:
+        matriz.etiquetas_columnas.name = 'Mes'
+    return matriz
@@ -0,0 +1,129 @@
+"""Medición de tiempo, filas y memoria por etapa, con registro en JSON o CSV."""
+
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import psutil
+    PSUTIL_DISPONIBLE = True
+except ImportError:
+    PSUTIL_DISPONIBLE = False
+
+
+# Archivo (.jsonl o .csv) al que el tablero agrega los tiempos de cada recarga; sin valor no se registra
+RUTA_MEDICIONES = os.environ.get('ANALISIS_MEDICIONES')
+
+CAMPOS_MEDICION = ['etapa', 'segundos', 'filas', 'rss_mb', 'delta_mb', 'pico_mb', 'inicio']
+
+
+# Función para obtener la memoria residente (RSS) actual del proceso en MB, o None si no se puede medir
+def memoria_rss_mb():
+    try:
+        with open('/proc/self/statm') as archivo:
+            paginas = int(archivo.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        pass
+    if PSUTIL_DISPONIBLE:
+        return psutil.Process().memory_info().rss / 1024 ** 2
+    return None
+
+
+# Función para reiniciar el pico de memoria del proceso (solo en Linux); devuelve si se pudo
+def reiniciar_pico_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as archivo:
+            archivo.write('5')
+        return True
+    except OSError:
+        return False
+
+
+# Función para leer el pico de memoria residente en MB desde el último reinicio
+def pico_rss_mb():
+    try:
+        with open('/proc/self/status') as archivo:
+            for linea in archivo:
+                if linea.startswith('VmHWM:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    if sys.platform != 'win32':
+        import resource
+        # Sin /proc el pico es el de toda la vida del proceso (KB en Linux, bytes en macOS)
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 1024 ** 2 if sys.platform == 'darwin' else pico / 1024
+    return None
+
+
+class Medidor:
+    # Acumula una medición por etapa: segundos de reloj, filas procesadas, memoria
+    # residente al terminar, su variación y, si `pico` es verdadero, el pico de memoria
+    # de la etapa. El pico reinicia el contador de todo el proceso, por lo que no se
+    # usa cuando varias sesiones comparten el proceso (p. ej. en el servidor de Streamlit).
+
+    def __init__(self, pico=False):
+        self.pico = pico and reiniciar_pico_rss()
+        self.registros = []
+
+    # Función para medir un bloque: `with medidor.etapa('kpis') as registro: ...`.
+    # El bloque puede fijar registro['filas'] cuando conoce el número de filas procesadas.
+    @contextmanager
+    def etapa(self, nombre, filas=None):
+        registro = {'etapa': nombre, 'filas': filas, 'inicio': datetime.now().isoformat(timespec='seconds')}
+        if self.pico:
+            reiniciar_pico_rss()
+        memoria_inicial = memoria_rss_mb()
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro['segundos'] = time.perf_counter() - inicio
+            registro['rss_mb'] = memoria_rss_mb()
+            registro['delta_mb'] = (registro['rss_mb'] - memoria_inicial
+                                    if memoria_inicial is not None and registro['rss_mb'] is not None else None)
+            registro['pico_mb'] = pico_rss_mb() if self.pico else None
+            self.registros.append(registro)
+
+    def total_segundos(self):
+        return sum(registro['segundos'] for registro in self.registros)
+
+    # Función para agregar los registros a un archivo JSON (una línea por registro) o CSV.
+    # `extra` son columnas fijas que se añaden a cada registro (p. ej. el tamaño del archivo).
+    def guardar(self, ruta, **extra):
+        filas = [dict(extra, **registro) for registro in self.registros]
+        if not filas:
+            return
+        carpeta = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(carpeta, exist_ok=True)
+        if ruta.endswith('.csv'):
+            campos = list(extra) + CAMPOS_MEDICION
+            nuevo = not os.path.exists(ruta) or os.path.getsize(ruta) == 0
+            with open(ruta, 'a', newline='', encoding='utf-8') as archivo:
+                escritor = csv.DictWriter(archivo, fieldnames=campos, extrasaction='ignore')
+                if nuevo:
+                    escritor.writeheader()
+                escritor.writerows(filas)
+        else:
+            with open(ruta, 'a', encoding='utf-8') as archivo:
+                for fila in filas:
+                    archivo.write(json.dumps(fila, ensure_ascii=False, default=str) + '\n')
+
+
+# Función para dar formato de tabla de texto a los registros de un medidor
+def tabla_mediciones(registros):
+    lineas = [f"{'Etapa':<14}{'Segundos':>10}{'Filas':>13}{'RSS MB':>10}{'Delta MB':>10}{'Pico MB':>10}"]
+    for registro in registros:
+        lineas.append(f"{registro['etapa']:<14}{registro['segundos']:>10.3f}"
+                      f"{_numero(registro['filas'], ',.0f'):>13}{_numero(registro['rss_mb'], ',.0f'):>10}"
+                      f"{_numero(registro['delta_mb'], '+,.0f'):>10}{_numero(registro['pico_mb'], ',.0f'):>10}")
+    return '\n'.join(lineas)
+
+
+def _numero(valor, formato):
+    return '-' if valor is None else format(valor, formato)
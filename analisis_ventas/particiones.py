@@ -0,0 +1,195 @@
+"""Conjuntos de ventas repartidos en varios archivos (p. ej. uno por localidad y mes): descubrimiento, poda y lectura en paralelo."""
+
+import argparse
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from analisis_ventas.ingesta import COLUMNA_MES, COLUMNAS_CATEGORICAS, COLUMNAS_VENTAS, leer_ventas
+
+
+EXTENSIONES = ('.csv', '.xlsx')
+
+# Claves de partición en las carpetas, al estilo clave=valor (p. ej. localidad=La Vega/mes=2024-05/ventas.csv)
+CLAVES_LOCALIDAD = ('localidad', 'localidad nombre', 'sucursal')
+CLAVES_ANIO = ('anio', 'año', 'ano')
+CLAVES_MES = ('mes',)
+
+# Mes en el nombre del archivo: AAAA-MM, AAAA_MM o AAAAMM (p. ej. santiago_2024-05.csv)
+PATRON_MES = re.compile(r'(?<!\d)(\d{4})[-_]?(\d{2})(?!\d)')
+
+
+# Función para obtener las particiones de una carpeta, de un archivo o de una lista de archivos (rutas
+# o archivos subidos). Cada partición es un diccionario con el origen, el nombre, la localidad y el mes
+# (clave AAAAMM) que indican la carpeta o el nombre del archivo, o None si no los indican.
+def particiones_de(fuentes):
+    if isinstance(fuentes, (str, os.PathLike)):
+        fuentes = [fuentes]
+    particiones = []
+    for fuente in fuentes:
+        if isinstance(fuente, (str, os.PathLike)) and os.path.isdir(fuente):
+            for carpeta, subcarpetas, archivos in os.walk(fuente):
+                subcarpetas.sort()
+                for nombre in sorted(archivos):
+                    if nombre.lower().endswith(EXTENSIONES):
+                        ruta = os.path.join(carpeta, nombre)
+                        particiones.append(_particion(ruta, os.path.relpath(ruta, fuente)))
+        elif isinstance(fuente, (str, os.PathLike)):
+            particiones.append(_particion(os.fspath(fuente), os.path.basename(fuente)))
+        else:
+            # Archivo subido: se envía a los procesos como (nombre, contenido)
+            fuente.seek(0)
+            particiones.append(_particion((fuente.name, fuente.read()), fuente.name))
+    return particiones
+
+
+def _particion(origen, relativa):
+    claves = {}
+    partes = relativa.replace('\\', '/').split('/')
+    for parte in partes[:-1] + [os.path.splitext(partes[-1])[0]]:
+        for trozo in re.split(r'[_&]+(?=[^_&=]+=)', parte):
+            if '=' in trozo:
+                clave, valor = trozo.split('=', 1)
+                claves[clave.strip().lower()] = valor.strip()
+    localidad = next((claves[clave] for clave in CLAVES_LOCALIDAD if clave in claves), None)
+    mes = _mes_de(claves, partes)
+    return {'origen': origen, 'nombre': relativa, 'localidad': localidad, 'mes': mes}
+
+
+# Función para la clave AAAAMM de una partición: mes=AAAA-MM, anio=AAAA/mes=MM o el mes en el nombre
+def _mes_de(claves, partes):
+    anio = next((claves[clave] for clave in CLAVES_ANIO if clave in claves), None)
+    mes = next((claves[clave] for clave in CLAVES_MES if clave in claves), None)
+    candidatos = []
+    if mes is not None and anio is not None and mes.isdigit():
+        candidatos.append((anio, mes))
+    if mes is not None:
+        candidatos.extend(PATRON_MES.findall(mes))
+    candidatos.extend(PATRON_MES.findall(partes[-1]))
+    for texto_anio, texto_mes in candidatos:
+        if texto_anio.isdigit() and 1 <= int(texto_mes) <= 12:
+            return int(texto_anio) * 100 + int(texto_mes)
+    return None
+
+
+# Función para descartar, antes de leerlas, las particiones fuera del rango de fechas o de las
+# localidades elegidas. Las particiones sin mes o sin localidad conocidos se conservan.
+def podar_particiones(particiones, fecha_inicio=None, fecha_fin=None, localidades=None):
+    desde = None if fecha_inicio is None else _clave_mes(fecha_inicio)
+    hasta = None if fecha_fin is None else _clave_mes(fecha_fin)
+    if isinstance(localidades, str):
+        localidades = [localidades]
+    elegidas = None if not localidades or any(l in ('Todas', None) for l in localidades) else set(localidades)
+    return [particion for particion in particiones
+            if (particion['mes'] is None or ((desde is None or particion['mes'] >= desde)
+                                             and (hasta is None or particion['mes'] <= hasta)))
+            and (particion['localidad'] is None or elegidas is None or particion['localidad'] in elegidas)]
+
+
+def _clave_mes(fecha):
+    fecha = pd.Timestamp(fecha)
+    return fecha.year * 100 + fecha.month
+
+
+# Función para identificar el contenido de un conjunto de particiones sin leerlas completas: nombre,
+# tamaño y fecha de modificación de cada archivo (o su contenido, para los archivos subidos)
+def huella_particiones(particiones):
+    resumen = hashlib.blake2b(digest_size=16)
+    for particion in particiones:
+        origen = particion['origen']
+        resumen.update(particion['nombre'].encode())
+        if isinstance(origen, tuple):
+            resumen.update(hashlib.blake2b(origen[1], digest_size=16).digest())
+        else:
+            estado = os.stat(origen)
+            resumen.update(f'{estado.st_size}:{estado.st_mtime_ns}'.encode())
+    return resumen.hexdigest()
+
+
+# Función para leer y normalizar una partición (en un proceso hijo). Si el archivo no trae la
+# columna de localidad, se toma la de la partición y se coloca donde la pondría leer_ventas.
+def _leer_particion(particion):
+    origen = particion['origen']
+    if isinstance(origen, tuple):
+        nombre, contenido = origen
+        origen = io.BytesIO(contenido)
+        origen.name = nombre
+    df = leer_ventas(origen)
+    if particion['localidad'] is not None and 'Localidad Nombre' not in df.columns:
+        df.insert(_posicion_columna(df, 'Localidad Nombre'), 'Localidad Nombre',
+                  pd.Categorical([particion['localidad']] * len(df)))
+    return df
+
+
+# Función para la posición de una columna que falta: antes de la primera de las columnas que la siguen
+# en COLUMNAS_VENTAS, o antes de la clave de mes (que normalizar_ventas agrega al final)
+def _posicion_columna(df, columna):
+    siguientes = COLUMNAS_VENTAS[COLUMNAS_VENTAS.index(columna) + 1:] + [COLUMNA_MES]
+    return next((df.columns.get_loc(otra) for otra in siguientes if otra in df.columns), len(df.columns))
+
+
+# Función para leer las particiones en procesos en paralelo y unirlas en un solo DataFrame normalizado
+def leer_particiones(particiones, procesos=None):
+    if not particiones:
+        raise ValueError("No hay archivos de ventas que leer con los filtros elegidos.")
+    procesos = min(procesos or os.cpu_count() or 1, len(particiones))
+    if procesos == 1:
+        partes = list(map(_leer_particion, particiones))
+    else:
+        # 'spawn' evita heredar los hilos del servidor de Streamlit en los procesos hijos
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as ejecutor:
+            partes = list(ejecutor.map(_leer_particion, particiones))
+    return concatenar_ventas(partes)
+
+
+# Función para unir DataFrames normalizados. Las columnas categóricas se unen con union_categoricals
+# (categorías combinadas y códigos reasignados), sin pasar por textos como haría pd.concat.
+def concatenar_ventas(partes):
+    if len(partes) == 1:
+        return partes[0]
+    columnas = list(dict.fromkeys(columna for parte in partes for columna in parte.columns))
+    categoricas = [columna for columna in columnas
+                   if columna in COLUMNAS_CATEGORICAS or any(isinstance(parte[columna].dtype, pd.CategoricalDtype)
+                                                             for parte in partes if columna in parte.columns)]
+    resto = pd.concat([parte.drop(columns=[c for c in categoricas if c in parte.columns]) for parte in partes],
+                      ignore_index=True)
+    unidas = {}
+    for columna in categoricas:
+        valores = [parte[columna] if columna in parte.columns else pd.Series(pd.Categorical([None] * len(parte)))
+                   for parte in partes]
+        valores = [v if isinstance(v.dtype, pd.CategoricalDtype) else v.astype('category') for v in valores]
+        unidas[columna] = union_categoricals(valores, sort_categories=True, ignore_order=True)
+    df = resto.assign(**unidas)
+    return df[columnas]
+
+
+# Uso: python -m analisis_ventas.particiones carpeta [--desde 2024-01-01] [--hasta 2024-06-30] [--localidad "La Vega"]
+# Muestra las particiones que se leen tras la poda y el tiempo de la lectura en paralelo.
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description='Lee un conjunto de ventas repartido en varios archivos.')
+    parser.add_argument('fuentes', nargs='+', help='Carpeta o archivos de ventas (CSV o XLSX)')
+    parser.add_argument('--desde', default=None, help='Fecha de inicio (se descartan los meses anteriores)')
+    parser.add_argument('--hasta', default=None, help='Fecha de fin (se descartan los meses posteriores)')
+    parser.add_argument('--localidad', action='append', help='Localidad que se lee; se puede repetir (por defecto, todas)')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos en paralelo (por defecto, todos los núcleos)')
+    argumentos = parser.parse_args(argumentos)
+
+    particiones = particiones_de(argumentos.fuentes if len(argumentos.fuentes) > 1 else argumentos.fuentes[0])
+    elegidas = podar_particiones(particiones, argumentos.desde, argumentos.hasta, argumentos.localidad)
+    print(f'{len(elegidas)} de {len(particiones)} archivos tras la poda')
+    inicio = time.perf_counter()
+    df = leer_particiones(elegidas, argumentos.procesos)
+    segundos = time.perf_counter() - inicio
+    print(f'{len(df):,} filas en {segundos:,.2f} s ({len(df) / max(segundos, 1e-9):,.0f} filas/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Pronósticos Holt-Winters por lotes para todos los productos o clientes."""
+
+import multiprocessing
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analisis_ventas.ingesta import COLUMNA_MES
+
+
+PASOS_PRONOSTICO = 12  # Proyección para los próximos 12 meses
+MESES_MINIMOS = 12  # Necesitamos al menos 12 meses de datos
+MESES_ESTACIONALIDAD = 24  # Usar estacionalidad solo si hay suficientes datos
+
+# Por debajo de este número de series no compensa arrancar procesos
+SERIES_MINIMAS_PARALELO = 32
+
+
+# Función para construir con un solo groupby las series mensuales de todas las entidades de una dimensión.
+# Acepta el DataFrame normalizado o un cubo de agregación; devuelve {entidad: Serie indexada por mes}.
+def series_mensuales(datos, dimension, medida='Total Vendido'):
+    if hasattr(datos, 'totales'):
+        largo = datos.totales([dimension, COLUMNA_MES], [medida], ordenar=False)
+    else:
+        largo = datos.groupby([dimension, COLUMNA_MES], observed=True)[medida].sum().reset_index()
+    largo = largo.sort_values([dimension, COLUMNA_MES], kind='stable')
+    meses = pd.to_datetime(largo[COLUMNA_MES].astype(str), format='%Y%m')
+    series = {}
+    for entidad, posiciones in largo.groupby(dimension, observed=True, sort=False).indices.items():
+        serie = pd.Series(largo[medida].to_numpy()[posiciones], index=pd.DatetimeIndex(meses.to_numpy()[posiciones], name='Mes'), name=medida)
+        # Los meses sin ventas entre el primero y el último cuentan como cero; así el índice
+        # tiene frecuencia mensual y el modelo puede pronosticar. Los umbrales de meses se
+        # aplican a los meses con ventas, que se guardan antes de rellenar.
+        serie = serie.asfreq('MS', fill_value=0)
+        serie.attrs['meses_con_ventas'] = len(posiciones)
+        series[entidad] = serie
+    return series
+
+
+# Función para contar los meses con ventas de una serie mensual (los rellenados con cero no cuentan)
+def meses_con_ventas(serie):
+    return serie.attrs.get('meses_con_ventas', int((serie != 0).sum()))
+
+
+# Función para ajustar el modelo Holt-Winters de una serie y pronosticar los próximos meses.
+# Con `parametros_iniciales` (un ajuste anterior de la misma entidad) la optimización arranca desde ellos.
+# Devuelve None si la serie no tiene suficientes meses.
+def ajustar_pronostico(serie, pasos=PASOS_PRONOSTICO, parametros_iniciales=None):
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+    meses = meses_con_ventas(serie)
+    if meses < MESES_MINIMOS:
+        return None
+    with warnings.catch_warnings():
+        # Con miles de series los avisos de convergencia de cada ajuste solo llenarían el registro
+        warnings.simplefilter('ignore')
+        if meses >= MESES_ESTACIONALIDAD:
+            modelo = 'estacional'
+            model = ExponentialSmoothing(serie, seasonal='add', seasonal_periods=12)
+        else:
+            modelo = 'tendencia'
+            model = ExponentialSmoothing(serie, trend='add', seasonal=None)
+        if parametros_iniciales is not None and parametros_iniciales.get('modelo') == modelo:
+            model_fit = _ajustar_desde(model, parametros_iniciales['parametros'])
+        else:
+            model_fit = model.fit()
+        forecast = np.asarray(model_fit.forecast(steps=pasos), dtype='float64')
+    return {
+        'modelo': modelo,
+        'parametros': _parametros_a_dict(model_fit.params),
+        'historia': serie,
+        'indice': indice_pronostico(serie.index[-1], pasos),
+        'pronostico': forecast,
+    }
+
+
+# Función para obtener los meses pronosticados a partir del último mes con datos
+def indice_pronostico(ultimo_mes, pasos=PASOS_PRONOSTICO):
+    return pd.date_range(start=pd.Timestamp(ultimo_mes) + pd.DateOffset(months=1), periods=pasos,
+                         freq=pd.offsets.MonthEnd())
+
+
+# Orden del vector de parámetros libres de ExponentialSmoothing
+PARAMETROS_MODELO = ['smoothing_level', 'smoothing_trend', 'smoothing_seasonal', 'initial_level', 'initial_trend', 'damping_trend']
+
+
+def _ajustar_desde(model, parametros):
+    # Los parámetros que no aplican al modelo (p. ej. la tendencia del estacional) se guardan como None
+    inicio = [parametros[nombre] for nombre in PARAMETROS_MODELO if parametros.get(nombre) is not None]
+    inicio += list(parametros.get('initial_seasons') or [])
+    try:
+        return model.fit(start_params=np.asarray(inicio, dtype='float64'), use_brute=False)
+    except ValueError:
+        # Parámetros incompatibles con el modelo actual: ajuste completo
+        return model.fit()
+
+
+def _parametros_a_dict(params):
+    resultado = {}
+    for nombre, valor in params.items():
+        if valor is None or (np.isscalar(valor) and not np.isfinite(valor)):
+            resultado[nombre] = None
+        elif np.ndim(valor):
+            resultado[nombre] = [float(v) for v in np.ravel(valor)]
+        elif isinstance(valor, (bool, np.bool_)):
+            resultado[nombre] = bool(valor)
+        else:
+            resultado[nombre] = float(valor)
+    return resultado
+
+
+def _ajustar_item(item):
+    entidad, valores, meses, con_ventas, pasos, parametros_iniciales = item
+    serie = pd.Series(valores, index=pd.DatetimeIndex(meses, name='Mes', freq='MS'), name='Total Vendido')
+    serie.attrs['meses_con_ventas'] = con_ventas
+    return entidad, ajustar_pronostico(serie, pasos, parametros_iniciales)
+
+
+# Función para ajustar en paralelo los modelos de muchas series.
+# `parametros_iniciales` es {entidad: ajuste anterior} para arrancar en caliente.
+# Devuelve {entidad: pronóstico} solo para las series con suficientes meses.
+def pronosticar_lote(series, pasos=PASOS_PRONOSTICO, procesos=None, parametros_iniciales=None):
+    parametros_iniciales = parametros_iniciales or {}
+    items = [(entidad, serie.to_numpy(), serie.index.to_numpy(), meses_con_ventas(serie), pasos,
+              parametros_iniciales.get(entidad))
+             for entidad, serie in series.items() if meses_con_ventas(serie) >= MESES_MINIMOS]
+    if not items:
+        return {}
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1 or len(items) < SERIES_MINIMAS_PARALELO:
+        resultados = map(_ajustar_item, items)
+        return {entidad: pronostico for entidad, pronostico in resultados if pronostico is not None}
+
+    # 'spawn' evita heredar los hilos del servidor de Streamlit en los procesos hijos
+    contexto = multiprocessing.get_context('spawn')
+    bloque = max(1, len(items) // (procesos * 4))
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as ejecutor:
+        resultados = list(ejecutor.map(_ajustar_item, items, chunksize=bloque))
+    return {entidad: pronostico for entidad, pronostico in resultados if pronostico is not None}
+
+
+# Función para armar la tabla de ventas actuales y proyección que se muestra en el reporte
+def tabla_pronostico(pronostico, dimension, entidad):
+    historia = pronostico['historia']
+    df_pivot = pd.DataFrame({'Mes': historia.index, dimension: entidad, 'Ventas Actuales': historia.to_numpy()})
+    df_forecast = pd.DataFrame({'Mes': pronostico['indice'], 'Proyección': pronostico['pronostico']})
+    df_pivot = pd.concat([df_pivot, df_forecast], ignore_index=True)
+    return df_pivot.set_index('Mes')
@@ -0,0 +1,159 @@
+"""Registro de conjuntos de datos del proceso: una sola copia de solo lectura por contenido para todas las sesiones."""
+
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# Segundos sin uso tras los que una sesión deja de contar como referencia (p. ej. una pestaña cerrada)
+INACTIVIDAD_SEGUNDOS = int(os.environ.get('ANALISIS_REGISTRO_INACTIVIDAD', '1800'))
+
+
+class RegistroDatos:
+    # Conjuntos de datos cargados, por huella de contenido. Cada contenido se carga una sola vez
+    # por proceso y todas las sesiones reciben vistas del mismo DataFrame (copias superficiales:
+    # comparten las columnas, así que no duplican memoria, y añadir o reemplazar una columna en
+    # la vista no cambia el original). Los arreglos de las columnas se marcan de solo lectura, así
+    # que escribir en el sitio desde una sesión falla en lugar de cambiar los datos de las demás.
+    # Con la copia columnar mapeada en memoria las páginas del archivo las comparten además todos
+    # los procesos del servidor.
+    # Cada entrada cuenta las sesiones que la usan; la que ninguna sesión usa se desaloja junto
+    # con sus derivados (cubo, índice).
+
+    def __init__(self, inactividad=INACTIVIDAD_SEGUNDOS):
+        self.inactividad = inactividad
+        self._entradas = {}
+        self._sesiones = {}
+        self._cerrojo = threading.Lock()
+        self._cargas = {}
+        self.cargas = 0
+        self.desalojos = 0
+
+    # Función para obtener una vista del conjunto de datos de una huella. Si no está cargado se
+    # llama a `cargar()` (una sola vez aunque varias sesiones lo pidan a la vez). Con `sesion` el
+    # conjunto queda referenciado por esa sesión, y se libera el que la sesión usaba antes.
+    def obtener(self, huella, cargar, sesion=None):
+        with self._cerrojo:
+            cerrojo_carga = self._cargas.setdefault(huella, threading.Lock())
+        with cerrojo_carga:
+            with self._cerrojo:
+                entrada = self._entradas.get(huella)
+            if entrada is None:
+                datos = solo_lectura(cargar())
+                entrada = {'datos': datos, 'derivados': {}, 'cerrojos': {}, 'sesiones': {},
+                           'ultimo_uso': time.monotonic()}
+                with self._cerrojo:
+                    self._entradas[huella] = entrada
+                    self.cargas += 1
+        with self._cerrojo:
+            self._cargas.pop(huella, None)
+            ahora = time.monotonic()
+            entrada['ultimo_uso'] = ahora
+            if sesion is not None:
+                anterior = self._sesiones.get(sesion)
+                if anterior is not None and anterior != huella:
+                    self._soltar(anterior, sesion)
+                self._sesiones[sesion] = huella
+                entrada['sesiones'][sesion] = ahora
+            self._desalojar_inactivos(ahora)
+        return vista(entrada['datos'])
+
+    # Función para obtener un objeto derivado del conjunto (p. ej. su cubo o su índice), construido
+    # una sola vez con `construir(datos)` y desalojado con el conjunto. Los derivados se comparten
+    # entre sesiones y no se deben modificar.
+    def derivado(self, huella, nombre, construir):
+        with self._cerrojo:
+            entrada = self._entradas.get(huella)
+        if entrada is None:
+            raise KeyError(f"El conjunto {huella} no está en el registro.")
+        with self._cerrojo:
+            cerrojo = entrada['cerrojos'].setdefault(nombre, threading.Lock())
+        with cerrojo:
+            if nombre not in entrada['derivados']:
+                entrada['derivados'][nombre] = construir(entrada['datos'])
+        return entrada['derivados'][nombre]
+
+    # Función para dejar de referenciar desde una sesión el conjunto que usa
+    def liberar(self, sesion):
+        with self._cerrojo:
+            huella = self._sesiones.pop(sesion, None)
+            if huella is not None:
+                self._soltar(huella, sesion)
+
+    # Función para desalojar los conjuntos sin sesiones activas en los últimos `inactividad` segundos
+    def desalojar_inactivos(self):
+        with self._cerrojo:
+            return self._desalojar_inactivos(time.monotonic())
+
+    def _soltar(self, huella, sesion):
+        entrada = self._entradas.get(huella)
+        if entrada is None:
+            return
+        entrada['sesiones'].pop(sesion, None)
+        if not entrada['sesiones']:
+            self._desalojar(huella)
+
+    def _desalojar_inactivos(self, ahora):
+        limite = ahora - self.inactividad
+        for sesion, huella in list(self._sesiones.items()):
+            entrada = self._entradas.get(huella)
+            if entrada is None or entrada['sesiones'].get(sesion, ahora) < limite:
+                del self._sesiones[sesion]
+                if entrada is not None:
+                    entrada['sesiones'].pop(sesion, None)
+        desalojadas = [huella for huella, entrada in self._entradas.items()
+                       if not entrada['sesiones'] and entrada['ultimo_uso'] < limite]
+        for huella in desalojadas:
+            self._desalojar(huella)
+        return len(desalojadas)
+
+    def _desalojar(self, huella):
+        if self._entradas.pop(huella, None) is not None:
+            self.desalojos += 1
+
+    def __contains__(self, huella):
+        return huella in self._entradas
+
+    # Función para obtener los contadores del registro (conjuntos, sesiones, memoria de las columnas)
+    def estadisticas(self):
+        with self._cerrojo:
+            entradas = list(self._entradas.values())
+            sesiones = len(self._sesiones)
+        return {
+            'conjuntos': len(entradas),
+            'sesiones': sesiones,
+            'mb_datos': sum(int(entrada['datos'].memory_usage(index=True).sum()) for entrada in entradas) / 1024 ** 2,
+            'cargas': self.cargas,
+            'desalojos': self.desalojos,
+        }
+
+
+# Función para obtener una vista del DataFrame que comparte sus columnas (no copia los datos)
+def vista(df):
+    return df.copy(deep=False)
+
+
+# Función para dejar un DataFrame con un arreglo de solo lectura por columna. Los arreglos que ya
+# son de solo lectura (p. ej. mapeados desde la copia columnar) se usan tal cual; los demás se
+# copian una vez al cargar, porque marcar una vista no protegería el bloque del que sale.
+def solo_lectura(df):
+    columnas = {}
+    for columna in df.columns:
+        serie = df[columna]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            # Los códigos son enteros pequeños; las etiquetas de las categorías ya son inmutables
+            columnas[columna] = pd.Categorical.from_codes(_arreglo_solo_lectura(serie.cat.codes.to_numpy(), copiar=True),
+                                                          dtype=serie.dtype)
+        else:
+            columnas[columna] = _arreglo_solo_lectura(serie.to_numpy())
+    return pd.DataFrame(columnas, index=df.index, copy=False)
+
+
+def _arreglo_solo_lectura(arreglo, copiar=False):
+    if copiar or arreglo.flags.writeable:
+        arreglo = np.array(arreglo, copy=True)
+        arreglo.flags.writeable = False
+    return arreglo
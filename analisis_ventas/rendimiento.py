@@ -0,0 +1,272 @@
+"""Pruebas de rendimiento del proceso del tablero con archivos de ventas sintéticos."""
+
+import argparse
+import gc
+import os
+import tempfile
+import warnings
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from analisis_ventas.almacen_sql import MOTOR_SQL, AlmacenSQL
+from analisis_ventas.calculos import (analisis_abc, calcular_kpis, proyeccion_mensual, tabla_proyeccion, tabla_resumen,
+                                       ventas_diarias)
+from analisis_ventas.cache import huella_archivo
+from analisis_ventas.cubo import CuboVentas
+from analisis_ventas.distribuciones import estadisticas_caja, histograma_fechas, muestra_estratificada
+from analisis_ventas.graficos import anotar_celdas, etiquetar_barras, graficar_cajas, graficar_histograma, imagen_grafico, nueva_figura
+from analisis_ventas.indice import IndiceVentas
+from analisis_ventas.ingesta import COLUMNA_FECHA, COLUMNA_MES, COLUMNAS_VENTAS, FORMATO_FECHA, leer_crudo, normalizar_ventas
+from analisis_ventas.interactivos import dispersion_interactiva
+from analisis_ventas.medicion import Medidor, tabla_mediciones
+from analisis_ventas.pronosticos import pronosticar_lote, series_mensuales
+
+
+# Tamaños de archivo predefinidos (nombre -> filas)
+TAMANOS = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+# Cardinalidades por defecto de las dimensiones del archivo sintético
+CARDINALIDADES = {
+    'clientes': 2_000,
+    'vendedores': 50,
+    'productos': 5_000,
+    'localidades': 10,
+    'condiciones': 4,
+}
+
+LINEAS_POR_PEDIDO = 3
+FILAS_POR_BLOQUE = 1_000_000
+# Números de pedido reservados a cada bloque: el bloque n usa desde n * PEDIDOS_POR_BLOQUE,
+# así los bloques (de hasta FILAS_POR_BLOQUE filas) nunca comparten pedidos.
+PEDIDOS_POR_BLOQUE = -(-FILAS_POR_BLOQUE // LINEAS_POR_PEDIDO)
+
+# Series que se pronostican en la etapa de pronósticos (las de mayor venta); 0 = todas
+SERIES_PRONOSTICO = 50
+
+
+# Función para generar un bloque de filas con el esquema del archivo de ventas.
+# El resultado depende solo de (semilla, número de bloque), así el archivo es reproducible.
+# Los clientes y productos siguen una distribución de Zipf para que el análisis ABC tenga forma real.
+def generar_bloque(filas, numero_bloque=0, semilla=0, fecha_inicio='2023-01-01', meses=24, **cardinalidades):
+    cardinalidades = dict(CARDINALIDADES, **cardinalidades)
+    azar = np.random.default_rng([semilla, numero_bloque])
+    pedidos = -(-filas // LINEAS_POR_PEDIDO)
+
+    inicio = pd.Timestamp(fecha_inicio)
+    dias = pd.date_range(inicio, inicio + pd.DateOffset(months=meses) - pd.Timedelta(days=1), freq='D')
+    textos_dias = dias.strftime(FORMATO_FECHA)
+
+    # Atributos de cada pedido, repetidos en sus líneas
+    por_pedido = {
+        'Cliente': _zipf(azar, cardinalidades['clientes'], pedidos),
+        'Vendedor': azar.integers(0, cardinalidades['vendedores'], pedidos),
+        COLUMNA_FECHA: azar.integers(0, len(dias), pedidos),
+        'Localidad Nombre': _zipf(azar, cardinalidades['localidades'], pedidos),
+        'Condicion Pago': azar.integers(0, cardinalidades['condiciones'], pedidos),
+    }
+    por_pedido = {columna: np.repeat(codigos, LINEAS_POR_PEDIDO)[:filas] for columna, codigos in por_pedido.items()}
+    numero_pedido = numero_bloque * PEDIDOS_POR_BLOQUE + np.arange(filas) // LINEAS_POR_PEDIDO
+
+    cantidad = azar.integers(1, 20, filas)
+    precio = azar.uniform(10, 500, filas).round(2)
+    descuento = azar.uniform(0, 20, filas).round(2)
+    datos = {
+        'Cliente': _categorias('Cliente', por_pedido['Cliente'], cardinalidades['clientes']),
+        'Vendedor': _categorias('Vendedor', por_pedido['Vendedor'], cardinalidades['vendedores']),
+        'Descripcion': _categorias('Producto', _zipf(azar, cardinalidades['productos'], filas), cardinalidades['productos']),
+        'Cantidad': cantidad,
+        'Precio': precio,
+        'Descuento': descuento,
+        'Total Vendido': (cantidad * precio - descuento).round(2),
+        COLUMNA_FECHA: pd.Categorical.from_codes(por_pedido[COLUMNA_FECHA], categories=textos_dias),
+        'NoPedidoStr': pd.Series(numero_pedido).map('P{:09d}'.format),
+        'Localidad Nombre': _categorias('Localidad', por_pedido['Localidad Nombre'], cardinalidades['localidades']),
+        'Condicion Pago': _categorias('Condicion', por_pedido['Condicion Pago'], cardinalidades['condiciones']),
+    }
+    return pd.DataFrame(datos, columns=COLUMNAS_VENTAS)
+
+
+def _zipf(azar, cardinalidad, filas, exponente=1.1):
+    pesos = 1.0 / np.arange(1, cardinalidad + 1) ** exponente
+    return azar.choice(cardinalidad, size=filas, p=pesos / pesos.sum())
+
+
+def _categorias(prefijo, codigos, cardinalidad):
+    return pd.Categorical.from_codes(codigos, categories=[f'{prefijo} {i}' for i in range(cardinalidad)])
+
+
+# Función para escribir un CSV sintético por bloques (sin tener todas las filas en memoria).
+# Si el archivo con los mismos parámetros ya existe, se reutiliza.
+def escribir_ventas_sinteticas(carpeta, filas, semilla=0, **cardinalidades):
+    cardinalidades = dict(CARDINALIDADES, **cardinalidades)
+    nombre = 'ventas_{}_c{clientes}_v{vendedores}_p{productos}_s{}.csv'.format(filas, semilla, **cardinalidades)
+    ruta = os.path.join(carpeta, nombre)
+    if os.path.exists(ruta):
+        return ruta
+    os.makedirs(carpeta, exist_ok=True)
+    temporal = ruta + '.tmp'
+    for numero_bloque, inicio in enumerate(range(0, filas, FILAS_POR_BLOQUE)):
+        bloque = generar_bloque(min(FILAS_POR_BLOQUE, filas - inicio), numero_bloque, semilla, **cardinalidades)
+        bloque.to_csv(temporal, mode='w' if numero_bloque == 0 else 'a', header=numero_bloque == 0, index=False)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+# Función para medir cada etapa del tablero sobre un archivo, fuera de Streamlit.
+# Repite los pasos que hace ANALISIS_DATOS.py en una primera carga con los filtros por defecto.
+def medir_proceso(ruta, series_pronostico=SERIES_PRONOSTICO, pico=True):
+    medidor = Medidor(pico=pico)
+
+    with medidor.etapa('carga') as registro:
+        crudo = leer_crudo(ruta)
+        registro['filas'] = len(crudo)
+    with medidor.etapa('fechas', len(crudo)):
+        df = normalizar_ventas(crudo)
+    del crudo
+    gc.collect()
+
+    with medidor.etapa('cubo', len(df)):
+        cubo = CuboVentas.desde_ventas(df)
+    with medidor.etapa('indice', len(df)):
+        indice = IndiceVentas(df)
+
+    # Filtros: el último trimestre en la localidad con más ventas, y el último mes completo
+    fecha_fin = df[COLUMNA_FECHA].max()
+    fecha_inicio = fecha_fin - pd.Timedelta(days=90)
+    localidad = cubo.top('Localidad Nombre', 1)['Localidad Nombre'].iloc[0]
+    mes = int(cubo.tabla[COLUMNA_MES].max())
+    with medidor.etapa('filtro', len(df)):
+        df_filtrado = indice.filtrar(df, fecha_inicio=fecha_inicio, fecha_fin=fecha_fin, localidad=localidad)
+        cubo_filtrado = cubo.filtrar(fecha_inicio, fecha_fin, localidad=localidad)
+        df_mes = indice.filtrar(df, mes=mes)
+        cubo_mes = cubo.filtrar(mes=mes)
+
+    with medidor.etapa('kpis', len(df_filtrado)):
+        calcular_kpis(df_filtrado)
+
+    with medidor.etapa('resumen', len(cubo_filtrado)):
+        for columna in ('Cliente', 'Vendedor', 'Descripcion', 'Localidad Nombre'):
+            tabla_resumen(cubo_filtrado, columna, cantidad=True)
+        ventas_diarias(cubo_mes)
+        cubo.totales(COLUMNA_MES, ordenar=False)
+
+    with medidor.etapa('abc', len(cubo_mes)):
+        for columna in ('Cliente', 'Descripcion', 'Vendedor'):
+            analisis_abc(cubo_mes, columna)
+
+    with medidor.etapa('pivote', len(cubo)):
+        proyeccion_mensual(cubo)
+        tabla_proyeccion(cubo, n=50)
+
+    with medidor.etapa('pronosticos') as registro:
+        series = series_mensuales(cubo, 'Descripcion')
+        if series_pronostico:
+            principales = cubo.top('Descripcion', series_pronostico)['Descripcion']
+            series = {producto: series[producto] for producto in principales if producto in series}
+        pronosticar_lote(series)
+        registro['filas'] = len(series)
+
+    with medidor.etapa('graficos', len(df_mes)):
+        _dibujar_graficos(cubo_mes, df_mes)
+    with medidor.etapa('interactivos', len(df_mes)):
+        # Figuras de Plotly serializadas como las recibe el navegador
+        dispersion_interactiva(df_mes, COLUMNA_FECHA, 'Total Vendido').to_json()
+        dispersion_interactiva(df_mes, 'Cantidad', 'Precio', color='Cliente', tamano='Total Vendido').to_json()
+
+    # Las mismas consultas con el motor SQL, sobre una base temporal
+    with tempfile.TemporaryDirectory() as carpeta:
+        almacen = AlmacenSQL(os.path.join(carpeta, f'ventas.{MOTOR_SQL}'))
+        with medidor.etapa('sql_carga', len(df)):
+            consulta = almacen.cargar(df, huella_archivo(ruta))
+        with medidor.etapa('sql_consultas', len(df)):
+            consulta_filtrada = consulta.filtrar(fecha_inicio, fecha_fin, localidad=localidad)
+            consulta_mes = consulta.filtrar(mes=mes)
+            calcular_kpis(consulta_filtrada)
+            for columna in ('Cliente', 'Vendedor', 'Descripcion', 'Localidad Nombre'):
+                tabla_resumen(consulta_filtrada, columna, cantidad=True)
+            ventas_diarias(consulta_mes)
+            for columna in ('Cliente', 'Descripcion', 'Vendedor'):
+                analisis_abc(consulta_mes, columna)
+            consulta_mes.matriz('Vendedor', COLUMNA_MES, n=30)
+
+    return medidor
+
+
+# Gráficos representativos del tablero: barras anotadas, mapa de calor, dispersión y distribuciones
+def _dibujar_graficos(cubo_mes, df_mes):
+    def barras():
+        top = cubo_mes.top('Cliente', 10)
+        fig, ax = nueva_figura(figsize=(12, 6))
+        sns.barplot(x='Cliente', y='Total Vendido', data=top, order=top['Cliente'], ax=ax)
+        etiquetar_barras(ax)
+        return fig
+
+    def mapa_calor():
+        fig, ax = nueva_figura(figsize=(8, 8))
+        matriz = cubo_mes.matriz('Vendedor', COLUMNA_MES)
+        sns.heatmap(matriz, cmap='YlGnBu', annot=anotar_celdas(matriz), fmt='.0f', ax=ax)
+        return fig
+
+    def dispersion():
+        fig, ax = nueva_figura(figsize=(12, 6))
+        sns.scatterplot(x=COLUMNA_FECHA, y='Total Vendido', data=df_mes, ax=ax)
+        return fig
+
+    def violin():
+        fig, ax = nueva_figura(figsize=(8, 6))
+        sns.violinplot(x='Vendedor', y='Total Vendido', data=muestra_estratificada(df_mes, 'Vendedor'),
+                       order=df_mes['Vendedor'].unique(), ax=ax)
+        return fig
+
+    def cajas():
+        fig, ax = nueva_figura(figsize=(8, 6))
+        graficar_cajas(ax, estadisticas_caja(df_mes, 'Vendedor', 'Descuento', df_mes['Vendedor'].unique()), 'Blues')
+        return fig
+
+    def histograma():
+        fig, ax = nueva_figura(figsize=(8, 6))
+        graficar_histograma(ax, *histograma_fechas(df_mes[COLUMNA_FECHA], bins=20))
+        return fig
+
+    for dibujar in (barras, mapa_calor, dispersion, violin, cajas, histograma):
+        imagen_grafico(dibujar)
+
+
+# Uso: python -m analisis_ventas.rendimiento --tamanos 10k 1m --salida rendimiento.jsonl
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description='Mide el tiempo y la memoria de cada etapa del tablero con datos sintéticos.')
+    parser.add_argument('--tamanos', nargs='+', default=['10k'],
+                        help=f"Filas de cada archivo: {', '.join(TAMANOS)} o un número")
+    parser.add_argument('--carpeta', default=os.path.join(tempfile.gettempdir(), 'analisis_ventas_rendimiento'),
+                        help='Carpeta donde se generan (y se reutilizan) los archivos sintéticos')
+    for nombre, valor in CARDINALIDADES.items():
+        parser.add_argument(f'--{nombre}', type=int, default=valor, help=f'Valores distintos de {nombre} (por defecto: {valor})')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--series', type=int, default=SERIES_PRONOSTICO,
+                        help='Productos que se pronostican, los de mayor venta (0 = todos)')
+    parser.add_argument('--salida', help='Archivo .jsonl o .csv al que se agregan los resultados')
+    argumentos = parser.parse_args(argumentos)
+    # Los avisos de obsolescencia de seaborn y pandas se repetirían en cada gráfico
+    warnings.simplefilter('ignore', FutureWarning)
+
+    cardinalidades = {nombre: getattr(argumentos, nombre) for nombre in CARDINALIDADES}
+    for tamano in argumentos.tamanos:
+        filas = TAMANOS.get(tamano.lower()) or int(tamano.replace('_', ''))
+        print(f'Generando {filas:,} filas en {argumentos.carpeta}...')
+        ruta = escribir_ventas_sinteticas(argumentos.carpeta, filas, argumentos.semilla, **cardinalidades)
+
+        medidor = medir_proceso(ruta, argumentos.series)
+        print(tabla_mediciones(medidor.registros))
+        print(f'Total: {medidor.total_segundos():,.2f} s\n')
+        if argumentos.salida:
+            medidor.guardar(argumentos.salida, archivo=os.path.basename(ruta), filas_archivo=filas, **cardinalidades)
+        del medidor
+        gc.collect()
+
+
+if __name__ == '__main__':
+    main()
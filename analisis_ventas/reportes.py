@@ -0,0 +1,228 @@
+"""Generación por lotes de reportes PDF y XLSX por combinación de filtros, sin la interfaz de Streamlit."""
+
+import argparse
+import io
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+import pandas as pd
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from analisis_ventas.cache_columnar import leer_ventas_con_copia
+from analisis_ventas.calculos import analisis_abc
+from analisis_ventas.cubo import CuboVentas
+from analisis_ventas.graficos import figura_a_bytes, nueva_figura
+from analisis_ventas.ingesta import ALIAS_COLUMNAS, COLUMNA_FECHA, COLUMNA_MES, clave_a_mes
+
+
+# Dimensiones por las que se pueden combinar los reportes (nombre corto -> columna)
+DIMENSIONES_REPORTE = dict(ALIAS_COLUMNAS, mes=COLUMNA_MES)
+FORMATOS_REPORTE = ('pdf', 'xlsx')
+SECCIONES_REPORTE = [('Cliente', 'Clientes'), ('Vendedor', 'Vendedores'), ('Descripcion', 'Productos')]
+
+
+# Función para listar las combinaciones de valores que tienen ventas, p. ej. cada Localidad x mes
+def combinaciones(cubo, por):
+    columnas = [DIMENSIONES_REPORTE[nombre] for nombre in por]
+    presentes = cubo.totales(columnas, ordenar=False).sort_values(columnas)
+    return [{nombre: _valor_python(valor) for nombre, valor in zip(por, fila)}
+            for fila in presentes[columnas].itertuples(index=False)]
+
+
+# Función para contar los pedidos distintos de cada combinación con un solo groupby
+# (el cubo no guarda el número de pedido, por lo que este conteo sale de las filas)
+def pedidos_por_combinacion(df, por):
+    columnas = [DIMENSIONES_REPORTE[nombre] for nombre in por]
+    conteos = df.groupby(columnas, observed=True)['NoPedidoStr'].nunique()
+    if len(columnas) == 1:
+        return {(_valor_python(clave),): int(valor) for clave, valor in conteos.items()}
+    return {tuple(_valor_python(v) for v in clave): int(valor) for clave, valor in conteos.items()}
+
+
+def _valor_python(valor):
+    return valor.item() if hasattr(valor, 'item') else valor
+
+
+# Función para calcular las tablas de un reporte a partir del cubo
+def datos_reporte(cubo, filtros, num_pedidos, top=10):
+    igualdades = {nombre: valor for nombre, valor in filtros.items() if nombre != 'mes'}
+    mes = filtros.get('mes')
+    seleccion = cubo.filtrar(mes=mes, **igualdades)
+    tabla = seleccion.tabla
+
+    kpis = pd.DataFrame({
+        'KPI': ['Número de Vendedores', 'Número de Pedidos', 'Número de Clientes', 'Número de Productos',
+                'Cantidad Total Vendida', 'Monto Total Vendido'],
+        'Valor': [tabla['Vendedor'].nunique(), num_pedidos, tabla['Cliente'].nunique(), tabla['Descripcion'].nunique(),
+                  tabla['Cantidad'].sum(), tabla['Total Vendido'].sum()],
+    })
+
+    # Con un mes elegido la serie es diaria; sin mes, mensual
+    if mes is not None:
+        serie = seleccion.serie(COLUMNA_FECHA)
+        serie.index = serie.index.strftime('%Y-%m-%d')
+    else:
+        serie = seleccion.serie(COLUMNA_MES)
+        serie.index = [clave_a_mes(clave) for clave in serie.index]
+    serie = serie.rename_axis('Fecha').reset_index()
+
+    datos = {'kpis': kpis, 'serie': serie, 'tops': {}, 'abc': {}}
+    for columna, plural in SECCIONES_REPORTE:
+        datos['tops'][plural] = seleccion.top(columna, top, 'Total Vendido')
+        datos['abc'][plural] = analisis_abc(seleccion, columna).resumen
+    return datos
+
+
+# Función para el título legible de una combinación de filtros
+def titulo_reporte(filtros):
+    partes = [f"{nombre.replace('_', ' ').capitalize()}: {clave_a_mes(valor) if nombre == 'mes' else valor}"
+              for nombre, valor in filtros.items()]
+    return 'Reporte de Ventas' + (' - ' + ' | '.join(partes) if partes else '')
+
+
+# Función para el nombre de archivo de una combinación de filtros
+def nombre_reporte(filtros):
+    partes = [f"{nombre}-{clave_a_mes(valor) if nombre == 'mes' else valor}" for nombre, valor in filtros.items()]
+    return re.sub(r'[^\w\-]+', '_', '_'.join(['reporte'] + partes)).strip('_')
+
+
+def _formatear(valor):
+    if isinstance(valor, float):
+        return f'{valor:,.2f}'
+    if isinstance(valor, int):
+        return f'{valor:,}'
+    return str(valor)
+
+
+def _tabla_pdf(df):
+    filas = [list(df.columns)] + [[_formatear(_valor_python(v)) for v in fila] for fila in df.itertuples(index=False)]
+    tabla = Table(filas, repeatRows=1)
+    tabla.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4CAF50')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 8),
+        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F2F2F2')]),
+    ]))
+    return tabla
+
+
+def _grafico_serie(serie):
+    fig, ax = nueva_figura(figsize=(8, 3))
+    ax.plot(serie['Fecha'], serie['Total Vendido'], marker='o')
+    ax.set_title('Ventas Totales por Fecha', fontsize=10)
+    ax.set_ylabel('Total Vendido', fontsize=8)
+    ax.tick_params(axis='x', rotation=45, labelsize=6)
+    ax.tick_params(axis='y', labelsize=7)
+    ax.grid(True)
+    fig.tight_layout()
+    return figura_a_bytes(fig, 'png', dpi=100)
+
+
+# Función para escribir un reporte en PDF con reportlab
+def escribir_pdf(ruta, titulo, datos):
+    estilos = getSampleStyleSheet()
+    elementos = [Paragraph(titulo, estilos['Title']), Spacer(1, 12),
+                 Paragraph('Resumen de KPIs', estilos['Heading2']), _tabla_pdf(datos['kpis']), Spacer(1, 12)]
+    if len(datos['serie']) > 1:
+        elementos += [Image(io.BytesIO(_grafico_serie(datos['serie'])), width=7.5 * inch, height=2.8 * inch), Spacer(1, 12)]
+    for plural, top in datos['tops'].items():
+        elementos += [Paragraph(f'Top {len(top)} {plural} por Ventas Totales', estilos['Heading2']), _tabla_pdf(top), Spacer(1, 12)]
+    for plural, resumen in datos['abc'].items():
+        elementos += [Paragraph(f'Clasificación ABC de {plural}', estilos['Heading2']), _tabla_pdf(resumen), Spacer(1, 12)]
+    SimpleDocTemplate(ruta, pagesize=letter, title=titulo).build(elementos)
+
+
+# Función para escribir un reporte en XLSX con openpyxl (una hoja por tabla)
+def escribir_xlsx(ruta, datos):
+    with pd.ExcelWriter(ruta, engine='openpyxl') as escritor:
+        datos['kpis'].to_excel(escritor, sheet_name='KPIs', index=False)
+        datos['serie'].to_excel(escritor, sheet_name='Ventas por Fecha', index=False)
+        for plural, top in datos['tops'].items():
+            top.to_excel(escritor, sheet_name=f'Top {plural}', index=False)
+        for plural, resumen in datos['abc'].items():
+            resumen.to_excel(escritor, sheet_name=f'ABC {plural}', index=False)
+
+
+# Función para generar los archivos de una combinación de filtros; devuelve las rutas escritas
+def generar_reporte(cubo, filtros, num_pedidos, salida, formatos=FORMATOS_REPORTE, top=10):
+    datos = datos_reporte(cubo, filtros, num_pedidos, top)
+    base = os.path.join(salida, nombre_reporte(filtros))
+    rutas = []
+    if 'pdf' in formatos:
+        escribir_pdf(base + '.pdf', titulo_reporte(filtros), datos)
+        rutas.append(base + '.pdf')
+    if 'xlsx' in formatos:
+        escribir_xlsx(base + '.xlsx', datos)
+        rutas.append(base + '.xlsx')
+    return rutas
+
+
+# Datos compartidos por cada proceso trabajador: se reciben una sola vez al iniciar el proceso
+_TRABAJADOR = {}
+
+
+def _iniciar_trabajador(tabla, pedidos, opciones):
+    _TRABAJADOR['cubo'] = CuboVentas(tabla)
+    _TRABAJADOR['pedidos'] = pedidos
+    _TRABAJADOR['opciones'] = opciones
+
+
+def _generar_en_trabajador(filtros):
+    return generar_reporte(_TRABAJADOR['cubo'], filtros, _TRABAJADOR['pedidos'].get(tuple(filtros.values()), 0),
+                           **_TRABAJADOR['opciones'])
+
+
+# Función para generar los reportes de todas las combinaciones de `por` en procesos en paralelo.
+# El archivo se lee y se agrega una sola vez; los procesos reciben el cubo ya calculado.
+def generar_reportes(df, por, salida, formatos=FORMATOS_REPORTE, procesos=None, top=10):
+    cubo = CuboVentas.desde_ventas(df)
+    lista = combinaciones(cubo, por)
+    pedidos = pedidos_por_combinacion(df, por)
+    opciones = {'salida': salida, 'formatos': tuple(formatos), 'top': top}
+    os.makedirs(salida, exist_ok=True)
+
+    procesos = min(procesos or os.cpu_count() or 1, max(len(lista), 1))
+    if procesos == 1:
+        _iniciar_trabajador(cubo.tabla, pedidos, opciones)
+        return [ruta for filtros in lista for ruta in _generar_en_trabajador(filtros)]
+    bloque = max(1, len(lista) // (procesos * 4))
+    # 'spawn' evita heredar los hilos del servidor de Streamlit y el estado de matplotlib en los procesos hijos
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto, initializer=_iniciar_trabajador,
+                             initargs=(cubo.tabla, pedidos, opciones)) as ejecutor:
+        return [ruta for rutas in ejecutor.map(_generar_en_trabajador, lista, chunksize=bloque) for ruta in rutas]
+
+
+# Uso: python -m analisis_ventas.reportes ventas.csv --por localidad --por mes --salida reportes
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description='Genera reportes PDF y XLSX para cada combinación de filtros.')
+    parser.add_argument('archivo', help='Archivo de ventas (CSV o XLSX)')
+    parser.add_argument('--por', action='append', choices=sorted(DIMENSIONES_REPORTE),
+                        help='Dimensión por la que se separan los reportes; se puede repetir (por defecto: localidad y mes)')
+    parser.add_argument('--salida', default='reportes', help='Carpeta donde se escriben los reportes')
+    parser.add_argument('--formatos', nargs='+', choices=FORMATOS_REPORTE, default=list(FORMATOS_REPORTE))
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos en paralelo (por defecto, todos los núcleos)')
+    parser.add_argument('--top', type=int, default=10, help='Puestos de las tablas de mejores clientes, vendedores y productos')
+    argumentos = parser.parse_args(argumentos)
+
+    inicio = time.perf_counter()
+    df = leer_ventas_con_copia(argumentos.archivo)
+    rutas = generar_reportes(df, argumentos.por or ['localidad', 'mes'], argumentos.salida, argumentos.formatos,
+                             argumentos.procesos, argumentos.top)
+    print(f'{len(rutas)} archivos generados en {argumentos.salida} ({time.perf_counter() - inicio:,.1f} s)')
+
+
+if __name__ == '__main__':
+    main()